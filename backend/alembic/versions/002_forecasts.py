@@ -0,0 +1,36 @@
+"""Forecasts table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Forecasts table
+    op.create_table(
+        'forecasts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('predicted_customers', sa.Integer(), nullable=True),
+        sa.Column('model_version', sa.Integer(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_forecasts_id'), 'forecasts', ['id'], unique=False)
+    op.create_index('ix_forecasts_location_date', 'forecasts', ['location_id', 'date'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_forecasts_location_date', table_name='forecasts')
+    op.drop_index(op.f('ix_forecasts_id'), table_name='forecasts')
+    op.drop_table('forecasts')
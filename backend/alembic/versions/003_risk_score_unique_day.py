@@ -0,0 +1,40 @@
+"""Unique risk score per location and day
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# Эски қаторлар тўлиқ вақт билан ёзилган - аввал кун бошига келтириш
+TRUNCATE_DATE = {
+    'postgresql': "UPDATE risk_scores SET date = date_trunc('day', date)",
+    'mysql': "UPDATE risk_scores SET date = CAST(DATE(date) AS DATETIME)",
+    'mariadb': "UPDATE risk_scores SET date = CAST(DATE(date) AS DATETIME)",
+    # SQLAlchemy SQLite'да вақтни матн сифатида (микросекунд билан) сақлайди
+    'sqlite': "UPDATE risk_scores SET date = strftime('%Y-%m-%d 00:00:00.000000', date)",
+}
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect in TRUNCATE_DATE:
+        op.execute(TRUNCATE_DATE[dialect])
+
+    # Такрорий қаторлардан энг охиргисини қолдириш
+    op.execute(
+        "DELETE FROM risk_scores WHERE id NOT IN ("
+        "SELECT keep_id FROM ("
+        "SELECT MAX(id) AS keep_id FROM risk_scores GROUP BY location_id, date"
+        ") AS keep_rows)"
+    )
+    op.create_unique_constraint('uq_risk_scores_location_date', 'risk_scores', ['location_id', 'date'])
+
+def downgrade():
+    op.drop_constraint('uq_risk_scores_location_date', 'risk_scores', type_='unique')
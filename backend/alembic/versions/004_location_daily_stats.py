@@ -0,0 +1,38 @@
+"""Location daily stats table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Location daily stats table
+    op.create_table(
+        'location_daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('worked_hours', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('kkt_receipts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('kkt_amount', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('location_id', 'date', name='uq_location_daily_stats_location_date')
+    )
+    op.create_index(op.f('ix_location_daily_stats_id'), 'location_daily_stats', ['id'], unique=False)
+
+    # Мавжуд иш вақтини тўлдириш: python -m app.services.daily_stats_service --rebuild
+
+def downgrade():
+    op.drop_index(op.f('ix_location_daily_stats_id'), table_name='location_daily_stats')
+    op.drop_table('location_daily_stats')
@@ -0,0 +1,23 @@
+"""KKT receipt cursor
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('kkt_integrations', sa.Column('last_receipt_id', sa.String(length=100), nullable=True))
+    op.add_column('kkt_integrations', sa.Column('last_receipt_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    op.drop_column('kkt_integrations', 'last_receipt_at')
+    op.drop_column('kkt_integrations', 'last_receipt_id')
@@ -0,0 +1,36 @@
+"""KKT receipts table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # KKT receipts table
+    op.create_table(
+        'kkt_receipts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kkt_serial', sa.String(length=100), nullable=False),
+        sa.Column('receipt_id', sa.String(length=100), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kkt_serial', 'receipt_id', name='uq_kkt_receipts_serial_receipt')
+    )
+    op.create_index(op.f('ix_kkt_receipts_id'), 'kkt_receipts', ['id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_kkt_receipts_id'), table_name='kkt_receipts')
+    op.drop_table('kkt_receipts')
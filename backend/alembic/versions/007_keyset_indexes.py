@@ -0,0 +1,22 @@
+"""Keyset pagination indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_analytics_location_date_id', 'analytics', ['location_id', 'date', 'id'])
+    op.create_index('ix_employees_location_id_id', 'employees', ['location_id', 'id'])
+
+def downgrade():
+    op.drop_index('ix_employees_location_id_id', table_name='employees')
+    op.drop_index('ix_analytics_location_date_id', table_name='analytics')
@@ -1,75 +1,150 @@
 """
 Аналитика API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.container import get_service
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.http_cache import conditional_response, db_version, make_etag
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, projection
+from app.core.security import get_current_active_admin, get_current_user
 from app.models.user import User
 from app.models.analytics import Analytics, RiskScore, Heatmap
+from app.models.customer import CustomerVisit
 from app.schemas.analytics import (
     Analytics as AnalyticsSchema,
     RiskScore as RiskScoreSchema,
     Heatmap as HeatmapSchema
 )
+from app.services.export_service import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
 from app.services.predictive_analytics_service import PredictiveAnalyticsService
-from app.services.risk_scoring_service import RiskScoringService
+from app.services.risk_scoring_service import RiskScoringService, day_start
 from app.services.video_analytics_service import VideoAnalyticsService
 
 router = APIRouter()
-predictive_service = PredictiveAnalyticsService()
-risk_service = RiskScoringService()
-video_service = VideoAnalyticsService()
+
+# Риск баҳолари кэши: (location_id, кун, базадаги версия) -> RiskScoreSchema
+risk_cache = TTLCache(ttl=settings.RISK_CACHE_TTL)
+
+# Cache-Control сиёсатлари: маълумот фойдаланувчига хос (private), ETag бўйича қайта текширилади
+ANALYTICS_CACHE_CONTROL = "private, no-cache"
+RISK_CACHE_CONTROL = f"private, max-age={settings.RISK_CACHE_TTL}, must-revalidate"
+HEATMAP_CACHE_CONTROL = "private, max-age=60, must-revalidate"
 
 
 @router.get("/locations/{location_id}", response_model=List[AnalyticsSchema])
 async def get_location_analytics(
     location_id: int,
+    request: Request,
+    response: Response,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Локация аналитикаси"""
-    query = db.query(Analytics).filter(Analytics.location_id == location_id)
-    
+    """Локация аналитикаси ((date, id) бўйича камайиш тартибида keyset пагинация)"""
+    criteria = [Analytics.location_id == location_id]
     if start_date:
-        query = query.filter(Analytics.date >= start_date)
+        criteria.append(Analytics.date >= start_date)
     if end_date:
-        query = query.filter(Analytics.date <= end_date)
+        criteria.append(Analytics.date <= end_date)
+    
+    etag = make_etag(
+        "analytics", location_id, start_date, end_date, cursor, limit,
+        db_version(db, Analytics.updated_at, *criteria)
+    )
+    not_modified = conditional_response(request, response, etag, ANALYTICS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    
+    query = db.query(*projection(Analytics, AnalyticsSchema)).filter(*criteria)
+    
+    return keyset_page(query, [Analytics.date, Analytics.id], cursor, limit, descending=True, response=response)
+
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    fmt: str = Query("ndjson", alias="format"),
+    location_ids: Optional[List[int]] = Query(None),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Тарихни тўлиқ экспорт қилиш (analytics, risk_scores, customer_visits)
+    NDJSON ёки CSV оқими, хотирага юкланмайди
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Датасет топилмади: {dataset}"
+        )
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Формат: {', '.join(EXPORT_FORMATS)}"
+        )
     
-    analytics = query.order_by(Analytics.date.desc()).all()
-    return analytics
+    filename = f"{dataset}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        iter_export(dataset, fmt, location_ids, start_date, end_date, compress=gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/locations/{location_id}/risk", response_model=RiskScoreSchema)
 async def get_location_risk(
     location_id: int,
+    request: Request,
+    response: Response,
     date: Optional[datetime] = None,
     db: Session = Depends(get_db),
+    risk_service: RiskScoringService = Depends(get_service("risk_scoring")),
     current_user: User = Depends(get_current_user)
 ):
     """Локация риск баҳоси"""
     if not date:
         date = datetime.utcnow()
+    day = day_start(date)
+    criteria = (RiskScore.location_id == location_id, RiskScore.date == day)
     
-    # Базадан олиш ёки ҳисоблаш
-    risk_score = db.query(RiskScore).filter(
-        RiskScore.location_id == location_id,
-        RiskScore.date >= date - timedelta(days=1),
-        RiskScore.date < date + timedelta(days=1)
-    ).first()
+    version = db_version(db, RiskScore.updated_at, *criteria)
+    etag = make_etag("risk", location_id, day, version)
+    not_modified = conditional_response(request, response, etag, RISK_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
     
-    if not risk_score:
-        # Янги ҳисоблаш
-        result = await risk_service.calculate_risk_score(location_id, date)
-        risk_score = db.query(RiskScore).filter(
-            RiskScore.location_id == location_id,
-            RiskScore.date >= date - timedelta(days=1)
-        ).order_by(RiskScore.date.desc()).first()
+    def find_risk_score():
+        return db.query(RiskScore).filter(*criteria).first()
+    
+    async def load_risk_score():
+        # Базадан олиш ёки ҳисоблаш (upsert)
+        risk_score = find_risk_score()
+        if not risk_score:
+            await risk_service.calculate_risk_score(location_id, date)
+            risk_score = find_risk_score()
+        
+        return RiskScoreSchema.model_validate(risk_score) if risk_score else None
+    
+    # Бир хил (локация, кун) учун параллел сўровлар битта ҳисоблашни кутади
+    # Қатор ҳали йўқ бўлса натижа шу калитда сақланмайди (қуйида янги версия калитида)
+    key = (location_id, day, version)
+    risk_score = await risk_cache.get_or_compute(
+        key,
+        load_risk_score,
+        cache_if=lambda result: result is not None and version[0] > 0
+    )
     
     if not risk_score:
         raise HTTPException(
@@ -77,6 +152,12 @@ async def get_location_risk(
             detail="Риск баҳоси топилмади"
         )
     
+    # Ҳисоблаш версияни оширган бўлса - ETag ва кэш калити янги версиядан
+    scored_version = db_version(db, RiskScore.updated_at, *criteria)
+    if scored_version != version:
+        response.headers["ETag"] = make_etag("risk", location_id, day, scored_version)
+        risk_cache.set((location_id, day, scored_version), risk_score)
+    
     return risk_score
 
 
@@ -84,6 +165,7 @@ async def get_location_risk(
 async def get_predictions(
     location_id: int,
     days: int = 30,
+    predictive_service: PredictiveAnalyticsService = Depends(get_service("predictive_analytics")),
     current_user: User = Depends(get_current_user)
 ):
     """Келгуси прогнозлар"""
@@ -94,10 +176,34 @@ async def get_predictions(
 @router.get("/locations/{location_id}/heatmap", response_model=HeatmapSchema)
 async def get_heatmap(
     location_id: int,
+    request: Request,
+    response: Response,
     date: datetime,
     hour: Optional[int] = None,
+    db: Session = Depends(get_db),
+    video_service: VideoAnalyticsService = Depends(get_service("video_analytics")),
     current_user: User = Depends(get_current_user)
 ):
     """Юклама харитаси"""
+    window_start = datetime.combine(date.date(), datetime.min.time())
+    window_end = window_start + timedelta(days=1)
+    if hour is not None:
+        window_start = window_start.replace(hour=hour)
+        window_end = window_start + timedelta(hours=1)
+    
+    # Харита фақат ойнадаги ташрифлар рўйхатига боғлиқ - сони ва энг катта id етарли
+    etag = make_etag(
+        "heatmap", location_id, date.date(), hour,
+        db_version(
+            db, CustomerVisit.id,
+            CustomerVisit.location_id == location_id,
+            CustomerVisit.entered_at >= window_start,
+            CustomerVisit.entered_at < window_end
+        )
+    )
+    not_modified = conditional_response(request, response, etag, HEATMAP_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    
     heatmap = await video_service.get_heatmap(location_id, date.date(), hour)
     return heatmap
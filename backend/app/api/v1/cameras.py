@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.container import get_service
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
@@ -13,13 +14,12 @@ from app.services.camera_service import CameraService
 from app.services.video_analytics_service import VideoAnalyticsService
 
 router = APIRouter()
-camera_service = CameraService()
-video_service = VideoAnalyticsService()
 
 
 @router.get("/")
 async def list_cameras(
     location_id: Optional[int] = None,
+    camera_service: CameraService = Depends(get_service("camera")),
     current_user: User = Depends(get_current_user)
 ):
     """Камералар рўйхати"""
@@ -30,6 +30,7 @@ async def list_cameras(
 @router.get("/{camera_id}/status")
 async def get_camera_status(
     camera_id: int,
+    camera_service: CameraService = Depends(get_service("camera")),
     current_user: User = Depends(get_current_user)
 ):
     """Камера статуси"""
@@ -42,6 +43,7 @@ async def analyze_camera_stream(
     camera_id: int,
     duration: Optional[int] = None,
     db: Session = Depends(get_db),
+    video_service: VideoAnalyticsService = Depends(get_service("video_analytics")),
     current_user: User = Depends(get_current_user)
 ):
     """Камера оқимини таҳлил қилиш"""
@@ -75,6 +77,7 @@ async def connect_camera(
     port: int = 80,
     username: Optional[str] = None,
     password: Optional[str] = None,
+    camera_service: CameraService = Depends(get_service("camera")),
     current_user: User = Depends(get_current_user),
     location_id: int = None
 ):
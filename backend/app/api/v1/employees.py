@@ -1,11 +1,13 @@
 """
 Ходимлар API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.core.container import get_service
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, projection
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.employee import Employee
@@ -18,23 +20,23 @@ from app.schemas.employee import (
 from app.services.face_recognition_service import FaceRecognitionService
 
 router = APIRouter()
-face_service = FaceRecognitionService()
 
 
 @router.get("/", response_model=List[EmployeeSchema])
 async def get_employees(
     location_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Ходимлар рўйхати"""
-    employees = db.query(Employee).filter(
+    """Ходимлар рўйхати (id бўйича keyset пагинация, кейинги саҳифа - X-Next-Cursor)"""
+    query = db.query(*projection(Employee, EmployeeSchema)).filter(
         Employee.location_id == location_id
-    ).offset(skip).limit(limit).all()
+    )
     
-    return employees
+    return keyset_page(query, [Employee.id], cursor, limit, response=response)
 
 
 @router.post("/", response_model=EmployeeSchema)
@@ -58,6 +60,7 @@ async def add_employee_face(
     employee_id: int,
     face_data: EmployeeFaceCreate,
     db: Session = Depends(get_db),
+    face_service: FaceRecognitionService = Depends(get_service("face_recognition")),
     current_user: User = Depends(get_current_user)
 ):
     """Ходим юзини қўшиш"""
@@ -1,22 +1,25 @@
 """
 Интеграция API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import hmac
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.container import get_service
+from app.core.security import get_current_active_admin, get_current_user
 from app.models.user import User
 from app.services.integration_service import IntegrationService
+from app.services.kkt_ingest_service import IngestError, kkt_receipt_ingestor
 
 router = APIRouter()
-integration_service = IntegrationService()
 
 
 @router.post("/tax/sync/{location_id}")
 async def sync_tax_data(
     location_id: int,
     tax_id: str,
+    integration_service: IntegrationService = Depends(get_service("integration")),
     current_user: User = Depends(get_current_user)
 ):
     """Солиқ маълумотларини синхронлаш"""
@@ -28,8 +31,51 @@ async def sync_tax_data(
 async def sync_kkt_data(
     location_id: int,
     kkt_serial: str,
+    integration_service: IntegrationService = Depends(get_service("integration")),
     current_user: User = Depends(get_current_user)
 ):
     """ККТ маълумотларини синхронлаш"""
     result = await integration_service.sync_kkt_data(location_id, kkt_serial)
     return result
+
+
+async def verify_kkt_webhook(x_kkt_token: str = Header(default="")):
+    """ККТ push токенини текшириш"""
+    if not settings.KKT_WEBHOOK_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ККТ push созланмаган"
+        )
+    if not hmac.compare_digest(x_kkt_token, settings.KKT_WEBHOOK_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Нотўғри ККТ токени"
+        )
+
+
+@router.post("/kkt/receipts")
+async def ingest_kkt_receipts(
+    request: Request,
+    _: None = Depends(verify_kkt_webhook)
+):
+    """
+    ККТ чекларини push орқали қабул қилиш
+    application/x-ndjson ёки application/json массив, Content-Encoding: gzip бўлиши мумкин
+    """
+    try:
+        return await kkt_receipt_ingestor.ingest(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            request.headers.get("content-encoding", "")
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/stats")
+async def get_connection_stats(
+    integration_service: IntegrationService = Depends(get_service("integration")),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """Ташқи API уланишларидан қайта фойдаланиш статистикаси"""
+    return integration_service.connection_stats()
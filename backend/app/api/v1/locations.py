@@ -1,11 +1,12 @@
 """
 Локациялар API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, projection
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.location import Location
@@ -16,14 +17,15 @@ router = APIRouter()
 
 @router.get("/", response_model=List[LocationSchema])
 async def get_locations(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Локациялар рўйхати"""
-    locations = db.query(Location).offset(skip).limit(limit).all()
-    return locations
+    """Локациялар рўйхати (id бўйича keyset пагинация, кейинги саҳифа - X-Next-Cursor)"""
+    query = db.query(*projection(Location, LocationSchema))
+    return keyset_page(query, [Location.id], cursor, limit, response=response)
 
 
 @router.post("/", response_model=LocationSchema)
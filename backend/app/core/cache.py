@@ -0,0 +1,109 @@
+"""
+Кэш модули
+TTL кэш ва бир хил сўровларни бирлаштириш (request coalescing)
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Кэшда йўқлигини билдирувчи белги (None ҳам қиймат бўлиши мумкин)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Процесс ичидаги TTL кэш
+    Бир хил калит учун параллел сўровлар битта ҳисоблашни кутади
+    get/set/invalidate бошқа thread'лардан ҳам чақирилади (масалан, sync эндпоинтлар commit'и) - қулф билан
+    """
+    
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+    
+    def get(self, key: Hashable) -> Any:
+        """Қийматни олиш (йўқ ёки муддати ўтган бўлса - MISSING)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                self._data.pop(key, None)
+                return MISSING
+            
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Қийматни сақлаш (энг эски калитлар LRU бўйича чиқарилади)"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Шартга мос калитларни ўчириш"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Кэшдан олиш ёки ҳисоблаш
+        N та бир хил параллел сўров битта factory чақирувини кутади
+        Ҳисоблаш алоҳида task'да - биринчи сўров бекор қилинса ҳам қолганлари натижани олади
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, factory, ttl, cache_if))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._compute_done, key))
+        return await asyncio.shield(task)
+    
+    async def _compute(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+        cache_if: Optional[Callable[[Any], bool]]
+    ) -> Any:
+        value = await factory()
+        if cache_if is None or cache_if(value):
+            self.set(key, value, ttl)
+        return value
+    
+    def _compute_done(self, key: Hashable, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Кутаётган сўров қолмаган бўлса, "exception was never retrieved" огоҳлантиришини ўчириш
+        if not task.cancelled():
+            task.exception()
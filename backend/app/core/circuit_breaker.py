@@ -0,0 +1,104 @@
+"""
+Circuit breaker модули
+Ташқи API хатоликлари кўпайганда сўровларни дарҳол рад этиш
+"""
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Circuit очиқ - сўров юборилмади"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Сирпанувчи ойнадаги хатолик улуши бўйича circuit breaker
+    closed -> (хатолик улуши >= failure_rate) -> open -> (reset_timeout) -> half_open
+    half_open ҳолатда битта синов сўрови ўтади: муваффақиятли бўлса closed, акс ҳолда open
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_requests: int = 20,
+        window: float = 60.0,
+        reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+    
+    def _prune(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window:
+            _, failed = self._calls.popleft()
+            self._failures -= failed
+    
+    def before_call(self):
+        """Сўровдан олдин чақирилади (circuit очиқ бўлса CircuitOpenError)"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} API вақтинча мавжуд эмас (circuit очиқ)")
+            self.state = HALF_OPEN
+        
+        if self.state == HALF_OPEN:
+            # Натижаси келмаган (масалан, бекор қилинган) синов reset_timeout'дан кейин такрорланади
+            now = time.monotonic()
+            if self._probe_in_flight and now - self._probe_started < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} API текширилмоқда (circuit half-open)")
+            self._probe_in_flight = True
+            self._probe_started = now
+    
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        self._record(False)
+    
+    def record_failure(self):
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        
+        self._record(True)
+        if len(self._calls) >= self.min_requests and self._failures / len(self._calls) >= self.failure_rate:
+            self._open()
+    
+    def _record(self, failed: bool):
+        now = time.monotonic()
+        self._prune(now)
+        self._calls.append((now, failed))
+        self._failures += failed
+    
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+    
+    def _close(self):
+        self.state = CLOSED
+        self._probe_in_flight = False
+        self._calls.clear()
+        self._failures = 0
+    
+    def snapshot(self) -> dict:
+        self._prune(time.monotonic())
+        return {
+            "state": self.state,
+            "calls": len(self._calls),
+            "failures": self._failures
+        }
@@ -3,7 +3,7 @@
 Барча настройкаларни бир жойда сақлайди
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 from pathlib import Path
 
@@ -20,12 +20,18 @@ class Settings(BaseSettings):
     DATABASE_URL: str 
     
     # Redis
-    REDIS_URL: str 
+    REDIS_URL: str = ""  # бўш бўлса процесс ичидаги кэш ва лимитлар
+    REDIS_CONNECT_TIMEOUT: float = 0.5  # секунд
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # секунд, битта буйруқ
+    REDIS_RETRY_INTERVAL: float = 10.0  # секунд, хатоликлардан кейин Redis'ни қайта синаш
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    USER_CACHE_TTL: int = 60  # секунд, текширилган фойдаланувчилар кэши (Redis)
+    USER_CACHE_LOCAL_TTL: int = 5  # секунд, процесс ичидаги нусха (бошқа процессдаги ўзгариш шунча кечикади)
+    PASSWORD_HASH_WORKERS: int = 4  # bcrypt учун алоҳида thread'лар сони
     
     # AI Моделлар
     AI_MODEL_PATH: str = "./models"
@@ -34,6 +40,14 @@ class Settings(BaseSettings):
     BEHAVIORAL_MODEL: str = "./models/behavioral_model.pkl"
     PREDICTIVE_MODEL: str = "./models/predictive_model.pkl"
     RISK_SCORING_MODEL: str = "./models/risk_scoring_model.pkl"
+    MODEL_REFRESH_INTERVAL: int = 300  # секунд, эскирган моделларни текшириш
+    MODEL_MAX_AGE: int = 24 * 60 * 60  # секунд, бундан эски модел қайта ўқитилади
+    MODEL_TRAINING_CONCURRENCY: int = 2  # бир вақтда фонда ўқитиладиган моделлар
+    FORECAST_MAX_AGE: int = 36 * 60 * 60  # секунд, олдиндан ҳисобланган прогноз муддати
+    FORECAST_CACHE_TTL: int = 300  # секунд, прогноз жавоблари кэши
+    RISK_CACHE_TTL: int = 300  # секунд, риск баҳолари кэши
+    RISK_RESCORE_DELAY: int = 30  # секунд, ўзгаришларни битта batch'га йиғиш
+    RISK_RESCORE_BATCH_SIZE: int = 1000  # битта фон баҳолашдаги локациялар
     
     # Камера
     ONVIF_USERNAME: str 
@@ -54,14 +68,40 @@ class Settings(BaseSettings):
     MYGOV_API_KEY: str 
     KKT_API_URL: str = "https://api.kkt.uz"
     KKT_API_KEY: str 
+    INTEGRATION_SYNC_CONCURRENCY: int = 100  # параллел синхронлаш сўровлари
+    INTEGRATION_RATE_LIMIT: float = 50.0  # сўров/сек, ҳар бир хост учун
+    INTEGRATION_RATE_BURST: int = 100  # token bucket сиғими
+    INTEGRATION_MAX_RETRIES: int = 3
+    INTEGRATION_RETRY_BACKOFF: float = 0.5  # секунд, биринчи қайта уриниш кечикиши
+    KKT_PAGE_SIZE: int = 1000  # битта саҳифадаги чеклар
+    KKT_INITIAL_SYNC_DAYS: int = 7  # курсорсиз биринчи синхронлаш ойнаси
+    INTEGRATION_KEEPALIVE_EXPIRY: float = 60.0  # секунд, бўш уланиш сақланадиган вақт
+    INTEGRATION_HTTP2: bool = False  # h2 пакети керак
+    INTEGRATION_TIMEOUT: float = 30.0  # секунд
+    INTEGRATION_CONNECT_TIMEOUT: float = 5.0  # секунд
+    INTEGRATION_CACHE_TTL: int = 60  # секунд, идемпотент GET жавоблари кэши
+    CIRCUIT_FAILURE_RATE: float = 0.5  # шу улушдан кўп хатоликда circuit очилади
+    CIRCUIT_MIN_REQUESTS: int = 20  # ойнадаги минимал сўровлар
+    CIRCUIT_WINDOW: float = 60.0  # секунд, хатоликлар ойнаси
+    CIRCUIT_RESET_TIMEOUT: float = 30.0  # секунд, синов сўровигача
+    KKT_WEBHOOK_TOKEN: str = ""  # ККТ push учун X-KKT-Token (бўш бўлса push ўчирилган)
+    KKT_INGEST_MAX_BYTES: int = 100 * 1024 * 1024  # битта push'нинг очилган ҳажми
     
     # Хавфсизлик
     ENCRYPTION_KEY: str = "your-32-byte-encryption-key-here"
     ALLOWED_ORIGINS: List[str]
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RATE: float = 20.0  # API сўровлари, секундига (фойдаланувчи ёки IP бўйича)
+    RATE_LIMIT_BURST: int = 100
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # X-Forwarded-For'и ишончли прокси IP/CIDR'лари ("*" - сохта IP билан лимитни айланиб ўтиш мумкин)
     
     # Логирование
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "./logs/app.log"
+    LOG_JSON: bool = True  # JSON форматдаги лог (False - оддий матн)
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # муваффақиятли сўровлардан логланадиган улуш
+    ACCESS_LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {"/health": 0.01}  # йўл префикси бўйича улуш
+    ACCESS_LOG_SLOW_SECONDS: float = 1.0  # бундан секин сўровлар доим логланади
     
     # Видео таҳлил
     VIDEO_FPS: int = 30
@@ -0,0 +1,63 @@
+"""
+Сервислар контейнери
+Ҳар бир сервис биринчи мурожаатда бир марта яратилади ва бутун worker бўйлаб бўлишилади
+Контейнер main.py lifespan'да яратилади (app.state.services)
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Лениво яратиладиган сервислар (singleton'лар) контейнери"""
+    
+    def __init__(self):
+        self._factories: Dict[str, Callable[["ServiceContainer"], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        # Factory ичида бошқа сервислар ҳам сўралади - қайта киришли қулф
+        self._lock = threading.RLock()
+        self.timings: Dict[str, float] = {}
+    
+    def register(self, name: str, factory: Callable[["ServiceContainer"], Any]):
+        """Сервис factory'сини рўйхатдан ўтказиш: factory(container) -> сервис"""
+        self._factories[name] = factory
+    
+    def get(self, name: str) -> Any:
+        """Сервисни олиш (биринчи мурожаатда яратилади)"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = self._factories[name](self)
+                # Боғлиқ сервисларни яратиш вақти ҳам шу ерга киради
+                self.timings[name] = time.perf_counter() - started
+                self._instances[name] = instance
+                logger.info(f"Сервис яратилди: {name} ({self.timings[name]:.3f}s)")
+        return instance
+    
+    def instance(self, name: str) -> Optional[Any]:
+        """Яратилган бўлса сервис, акс ҳолда None (тўхтатишда янги нусха яратмаслик учун)"""
+        return self._instances.get(name)
+    
+    def report(self) -> Dict[str, Any]:
+        """Яратилган сервислар ва уларни яратиш вақтлари"""
+        return {
+            "created": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+            "pending": sorted(set(self._factories) - set(self._instances))
+        }
+
+
+def get_service(name: str) -> Callable[[Request], Any]:
+    """FastAPI dependency: Depends(get_service("video_analytics"))"""
+    def dependency(request: Request) -> Any:
+        return request.app.state.services.get(name)
+    return dependency
@@ -0,0 +1,73 @@
+"""
+Маълумот версиялари
+Ҳар бир локация учун жадвал бўйича ўзгариш ҳисоблагичи
+Кэш калитлари шу версияни ўз ичига олади - маълумот ўзгарса, кэш ҳам янгиланади
+"""
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# session.info калити: commit кутаётган (жадвал, location_id) жуфтлари
+_PENDING_KEY = "data_versions_pending"
+
+
+class DataVersions:
+    """Локация маълумотлари версиялари (процесс ичида)"""
+    
+    def __init__(self):
+        self._versions: Dict[Tuple[str, int], int] = defaultdict(int)
+        self._subscribers: List[Callable[[str, int], None]] = []
+    
+    def get(self, location_id: int, *tables: str) -> Tuple[int, ...]:
+        """Берилган жадваллар бўйича локация версияси"""
+        return tuple(self._versions[(table, location_id)] for table in tables)
+    
+    def bump(self, table: str, location_id: int):
+        """Версияни ошириш ва обуначиларни хабардор қилиш"""
+        self._versions[(table, location_id)] += 1
+        for callback in self._subscribers:
+            try:
+                callback(table, location_id)
+            except Exception as e:
+                logger.error(f"Маълумот версияси обуначисида хатолик: {e}", exc_info=True)
+    
+    def subscribe(self, callback: Callable[[str, int], None]):
+        """Ўзгаришларга обуна бўлиш: callback(table, location_id)"""
+        self._subscribers.append(callback)
+
+
+# Глобал версиялар
+data_versions = DataVersions()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    """Flush қилинган location_id ли объектларни йиғиш"""
+    pending: Set[Tuple[str, int]] = session.info.setdefault(_PENDING_KEY, set())
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        location_id = getattr(obj, "location_id", None)
+        table = getattr(obj, "__tablename__", None)
+        if location_id is None or table is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        pending.add((table, location_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    """Commit бўлгандан кейин версияларни ошириш"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    for table, location_id in pending or ():
+        data_versions.bump(table, location_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -2,7 +2,9 @@
 База маълумотлари конфигурацияси
 PostgreSQL база билан ишлаш
 """
+from typing import Any, Callable, Dict, List, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -30,3 +32,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def upsert_statement(
+    dialect_name: str,
+    table,
+    index_elements: List[str],
+    update: Callable[[Any], Dict[str, Any]]
+) -> Optional[Any]:
+    """
+    INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE сўрови
+    update(new) - янги қатор устунларидан янгиланадиган қийматлар
+    Қўллаб-қувватланмайдиган база учун None
+    """
+    if dialect_name in ("postgresql", "sqlite"):
+        module = postgresql if dialect_name == "postgresql" else sqlite
+        stmt = module.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_=update(stmt.excluded)
+        )
+    
+    if dialect_name in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(update(stmt.inserted))
+    
+    return None
@@ -0,0 +1,65 @@
+"""
+HTTP кэшлаш (ETag / Cache-Control / 304)
+ETag базадаги маълумот версиясидан (db_version) ҳисобланади - асосий сўровни бажармасдан 304 қайтариш мумкин
+Версия базадан олингани учун бошқа процесслар (CLI, batch, бошқа worker'лар) ёзган ўзгаришлар ҳам ҳисобга олинади
+"""
+import hashlib
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+# Жавоб форматининг версияси: ETag барча worker'ларда ва қайта ишга тушганда бир хил бўлади
+# Жавоб тузилиши (схемаси) ўзгарганда қўлда оширилади - шунда эски ETag'лар мос келмайди
+ETAG_FORMAT_VERSION = "1"
+
+
+def db_version(db: Session, column: Any, *criteria: Any) -> Tuple[int, Any]:
+    """
+    Базадаги маълумот версияси: шартга мос қаторлар сони ва column'нинг энг каттаси
+    column - updated_at (ўзгаришлар) ёки id (фақат қўшиладиган жадваллар)
+    """
+    count, latest = db.query(func.count(), func.max(column)).filter(*criteria).one()
+    return count, latest
+
+
+def make_etag(*parts: Any) -> str:
+    """Кучсиз (weak) ETag: жавобни белгиловчи параметрлар ва версиялардан"""
+    digest = hashlib.blake2b(repr((ETAG_FORMAT_VERSION,) + parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match сарлавҳаси ETag'га мос келадими (кучсиз солиштириш)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    
+    target = _opaque(etag)
+    return any(_opaque(tag) == target for tag in header.split(","))
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str
+) -> Optional[Response]:
+    """
+    ETag ва Cache-Control сарлавҳаларини қўйиш
+    Клиентдаги нусха эскирмаган бўлса 304 жавоб, акс ҳолда None (эндпоинт давом этади)
+    """
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
@@ -0,0 +1,78 @@
+"""
+Импорт вақти текшируви
+API импорти (app.main) оғир ML кутубхоналарини юкламаслиги ва вақт бюджетидан ошмаслигини текшириш
+(python -X importtime натижаси бўйича, алоҳида жараёнда)
+    
+    python -m app.core.import_check --budget 2.0
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# API импортида бўлмаслиги керак бўлган кутубхоналар (фақат тегишли подсистема ишлатилганда)
+HEAVY_MODULES = ("cv2", "onnxruntime", "face_recognition", "dlib", "sklearn", "pandas", "onvif", "zeep")
+
+DEFAULT_BUDGET = 2.0  # секунд
+
+
+def measure_import(module: str = "app.main") -> Tuple[float, Dict[str, float]]:
+    """
+    Модулни тоза жараёнда импорт қилиш
+    Натижа: умумий вақт (секунд) ва ҳар бир юкланган модулнинг cumulative вақти
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} импорт қилинмади:\n{result.stderr[-2000:]}")
+    
+    root = module.split(".")[0]
+    total = 0.0
+    modules: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # сарлавҳа қатори
+        seconds = int(cumulative) / 1e6
+        modules[name.strip()] = seconds
+        # Юқори даражадаги (ичма-ич бўлмаган) модуль импортлари
+        if not name[1:].startswith(" ") and (name.strip() == root or name.strip().startswith(root + ".")):
+            total += seconds
+    
+    return total, modules
+
+
+def check(module: str, budget: float) -> List[str]:
+    """Бюджет ва оғир кутубхоналар бўйича хатолар рўйхати (бўш - ўтди)"""
+    total, modules = measure_import(module)
+    errors = []
+    
+    heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+    if heavy:
+        errors.append(f"{module} оғир кутубхоналарни юклайди: {', '.join(heavy)}")
+    if total > budget:
+        errors.append(f"{module} импорт вақти {total:.3f}s > бюджет {budget:.3f}s")
+    
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:15]
+    print(f"{module}: {total:.3f}s (бюджет {budget:.3f}s)")
+    for name, seconds in slowest:
+        print(f"  {seconds:8.3f}s  {name}")
+    
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API импорт вақти текшируви")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="секунд")
+    args = parser.parse_args()
+    
+    errors = check(args.module, args.budget)
+    for error in errors:
+        print(error, file=sys.stderr)
+    sys.exit(1 if errors else 0)
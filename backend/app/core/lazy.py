@@ -0,0 +1,42 @@
+"""
+Кечиктирилган (lazy) импорт
+Оғир кутубхоналар (cv2, onnxruntime, face_recognition, pandas, ...) биринчи атрибутга мурожаатда юкланади
+API/CLI жараёнлари фақат керакли қисмлар учун импорт вақти ва хотира сарфлайди
+"""
+import importlib
+import threading
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """Модул ўрнидаги прокси: cv2 = lazy_import("cv2"); cv2.resize(...) - шу пайт импорт қилинади"""
+    
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+    
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return module
+    
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+    
+    def __dir__(self):
+        return dir(self._load())
+    
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Модулни биринчи ишлатилганда импорт қилувчи прокси"""
+    return LazyModule(name)
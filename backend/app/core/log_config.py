@@ -0,0 +1,85 @@
+"""
+Логирование созламалари
+Сўров йўлида фақат навбатга қўйиш (QueueHandler), файл/консолга ёзиш фон thread'ида (QueueListener)
+"""
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+# Access лог ёзуви (LoggingMiddleware)
+ACCESS_LOGGER = "app.access"
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord'нинг стандарт атрибутлари - қолганлари extra сифатида JSON'га қўшилади
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Бир қаторли JSON лог (extra майдонлари билан)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _EnqueueHandler(QueueHandler):
+    """
+    Ёзувни форматламасдан навбатга қўйиш
+    Стандарт prepare() хабарни чақирган thread'да форматлайди - бу иш ҳам фон thread'ига ўтади
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> QueueListener:
+    """Root логгерни навбат орқали ёзишга созлаш (бир марта)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+    
+    formatter = JsonFormatter() if settings.LOG_JSON else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.FileHandler(settings.LOG_FILE), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, settings.LOG_LEVEL))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_EnqueueHandler(log_queue))
+    
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Жараён тугаганда навбатдаги ёзувларни ёзиб тугатиш
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Навбатни бўшатиб, фон ёзувчини тўхтатиш"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) пагинация
+Саҳифа чуқурлигидан қатъи назар сўров вақти бир хил: OFFSET ўрнига охирги калитдан кейингилари олинади
+Кейинги саҳифа курсори X-Next-Cursor сарлавҳасида қайтарилади (жавоб шакли ўзгармайди)
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import Column, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Калит қийматларидан шаффоф бўлмаган курсор"""
+    data = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> List[Any]:
+    """Курсорни калит қийматларига ўгириш (нотўғри бўлса 400)"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(data, list) or len(data) != len(columns):
+            raise ValueError("калит узунлиги мос эмас")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, data)
+        ]
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Курсор нотўғри"
+        )
+
+
+def projection(model: Type, schema: Type[BaseModel]) -> List[Column]:
+    """Схемадаги майдонларга мос устунлар (ORM объект яратилмайди)"""
+    table = model.__table__
+    return [table.c[name] for name in schema.model_fields if name in table.c]
+
+
+def keyset_page(
+    query,
+    key: Sequence[Column],
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+    response: Response = None
+) -> List[Dict[str, Any]]:
+    """
+    Саҳифани олиш: key бўйича тартиб, курсордан кейинги limit та қатор
+    Яна қатор бўлса кейинги курсор response сарлавҳасига ёзилади
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    if cursor:
+        values = decode_cursor(cursor, key)
+        if descending:
+            query = query.filter(tuple_(*key) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*key) > tuple_(*values))
+    
+    order = [column.desc() if descending else column.asc() for column in key]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    
+    page = [row._asdict() for row in rows[:limit]]
+    if len(rows) > limit and response is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([page[-1][column.name] for column in key])
+    
+    return page
@@ -0,0 +1,150 @@
+"""
+Тезликни чеклаш модули
+Token bucket (хост ва калит бўйича), Redis'даги умумий лимитер ва jitter'ли қайта уриниш кечикиши
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.redis import redis_breaker, redis_call
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket: секундига rate та токен, энг кўпи capacity та
+    Кутаётганлар навбат бўйича (FIFO) хизмат кўрсатилади
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, tokens: float = 1):
+        """Токен олиш (етарли бўлмаса кутиш)"""
+        if self.rate <= 0:
+            return
+        
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+    
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Токенни кутмасдан олиш: 0 - олинди, акс ҳолда кутиш керак бўлган секунд"""
+        if self.rate <= 0:
+            return 0.0
+        
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+
+class HostRateLimiter:
+    """Ҳар бир хост учун алоҳида token bucket"""
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+    
+    async def acquire(self, host: str):
+        await self.bucket(host).acquire()
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 30.0) -> float:
+    """Қайта уриниш кечикиши: экспоненциал, тўлиқ jitter билан"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Redis'даги token bucket: текшириш ва ёзиш битта атомар EVALSHA'да
+# Вақт Redis сервер соатидан олинади (worker'лар соатлари фарқидан ҳимоя)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RateLimiter:
+    """
+    Калит бўйича token bucket
+    Redis берилган бўлса барча worker'лар учун умумий, акс ҳолда (ёки Redis хатосида) процесс ичида
+    """
+    
+    def __init__(
+        self,
+        redis: Optional[Any] = None,
+        prefix: str = "ratelimit",
+        maxsize: int = 100000,
+        breaker: CircuitBreaker = redis_breaker
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.maxsize = maxsize
+        self.breaker = breaker
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT) if redis is not None else None
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+    
+    async def hit(self, key: str, rate: float, burst: float) -> float:
+        """Битта сўровни ҳисоблаш: 0 - рухсат, акс ҳолда Retry-After (секунд)"""
+        if self._script is not None:
+            try:
+                return float(await redis_call(
+                    lambda: self._script(keys=[f"{self.prefix}:{key}"], args=[rate, burst]),
+                    self.breaker
+                ))
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                logger.warning(f"Redis rate limit ишламади, процесс ичидаги лимит ишлатилади: {e}")
+        
+        return self._local_bucket(key, rate, burst).try_acquire()
+    
+    def _local_bucket(self, key: str, rate: float, burst: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            # Энг эски калитлар LRU бўйича чиқарилади
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
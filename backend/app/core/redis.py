@@ -0,0 +1,70 @@
+"""
+Redis клиенти (ихтиёрий)
+REDIS_URL бўш ёки redis пакети ўрнатилмаган бўлса - None, процесс ичидаги кэшлар ишлатилади
+Redis ишламаса circuit очилади ва REDIS_RETRY_INTERVAL давомида мурожаат қилинмайди
+"""
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.core.circuit_breaker import CLOSED, CircuitBreaker
+from app.core.config import settings
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Redis ҳар бир сўровда ишлатилади - кам сонли хатоликдан кейиноқ очилади
+REDIS_CIRCUIT_MIN_REQUESTS = 5
+
+_client: Optional[Any] = None
+
+redis_breaker = CircuitBreaker(
+    "Redis",
+    failure_rate=settings.CIRCUIT_FAILURE_RATE,
+    min_requests=REDIS_CIRCUIT_MIN_REQUESTS,
+    window=settings.CIRCUIT_WINDOW,
+    reset_timeout=settings.REDIS_RETRY_INTERVAL
+)
+
+
+def get_redis() -> Optional[Any]:
+    """Умумий Redis клиенти (биринчи чақирувда яратилади)"""
+    global _client
+    if _client is None and settings.REDIS_URL and redis_asyncio is not None:
+        _client = redis_asyncio.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+    return _client
+
+
+async def redis_call(operation: Callable[[], Awaitable[T]], breaker: CircuitBreaker = redis_breaker) -> T:
+    """
+    Redis буйруғини circuit орқали бажариш
+    Circuit очиқ бўлса CircuitOpenError (буйруқ юборилмайди), хатоликлар circuit'да ҳисобланади
+    """
+    breaker.before_call()
+    try:
+        result = await operation()
+    except Exception:
+        breaker.record_failure()
+        if breaker.state != CLOSED:
+            logger.warning(f"Redis мавжуд эмас, {breaker.reset_timeout:.0f}s процесс ичидаги кэш ишлатилади")
+        raise
+    breaker.record_success()
+    return result
+
+
+async def close_redis():
+    """Redis уланишларини ёпиш"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
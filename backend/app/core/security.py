@@ -2,6 +2,8 @@
 Хавфсизлик модуллари
 JWT, парол шифрлаш, фойдаланувчи аутентификация
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -12,6 +14,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.user_cache import user_cache, user_from_projection, user_projection
 from app.models.user import User
 from app.schemas.user import TokenData
 
@@ -21,6 +24,13 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 схема
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# bcrypt 100-300ms CPU олади - event loop'ни бандламаслик учун чекланган thread пулида
+# (bcrypt кенгайтмаси ҳисоблаш пайтида GIL'ни бўшатади)
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Паролни текшириш"""
@@ -32,6 +42,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Паролни текшириш (event loop'дан ташқарида)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Паролни хешлаш (event loop'дан ташқарида)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """JWT токен яратиш"""
     to_encode = data.copy()
@@ -40,7 +62,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # iat - фойдаланувчи кэши калити (токен бўйича)
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -62,12 +85,20 @@ async def get_current_user(
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
+        issued_at = payload.get("iat")
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
+    # Кэш: токен имзоси текширилган, базага фақат кэшда йўқ бўлса мурожаат
+    cached = await user_cache.get(token_data.username, issued_at)
+    if cached is not None:
+        user = user_from_projection(cached)
+    else:
+        user = db.query(User).filter(User.username == token_data.username).first()
+        if user is None:
+            raise credentials_exception
+        if user.is_active:
+            await user_cache.set(token_data.username, issued_at, user_projection(user))
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Фойдаланувчи фаол эмас")
@@ -0,0 +1,191 @@
+"""
+Фойдаланувчи кэши
+Токен текширилгандан кейин фаол фойдаланувчи проекцияси (username, iat) калити бўйича кэшланади
+REDIS_URL берилган бўлса процесслар орасида ҳам бўлишилади
+
+Ўзгаришда Redis'даги ёзув ўчирилади, лекин бошқа процесслардаги нусхалар хабардор қилинмайди:
+улар local_ttl (USER_CACHE_LOCAL_TTL) давомида эски ҳолатни кўриши мумкин - шу сабабли у қисқа
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, TTLCache
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import settings
+from app.core.redis import get_redis, redis_call
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Кэшланадиган устунлар (парол хеши кэшга тушмайди)
+USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "full_name",
+    "role",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "last_login"
+)
+
+# Ўзгарганда кэш тозаланадиган устунлар
+INVALIDATING_FIELDS = ("is_active", "role", "is_superuser", "username")
+
+# session.info калити: commit кутаётган фойдаланувчи номлари
+_PENDING_KEY = "user_cache_pending"
+
+
+def user_projection(user: User) -> Dict[str, Any]:
+    """Фойдаланувчи проекцияси (JSON'га ўгириладиган)"""
+    data = {field: getattr(user, field) for field in USER_FIELDS}
+    data["role"] = data["role"].value if isinstance(data["role"], UserRole) else data["role"]
+    for field in ("created_at", "last_login"):
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+    return data
+
+
+def user_from_projection(data: Dict[str, Any]) -> User:
+    """Проекциядан сессиясиз (transient) User объекти"""
+    values = dict(data)
+    values["role"] = UserRole(values["role"])
+    for field in ("created_at", "last_login"):
+        if values[field] is not None:
+            values[field] = datetime.fromisoformat(values[field])
+    return User(**values)
+
+
+class UserCache:
+    """Процесс ичидаги TTL кэш + ихтиёрий Redis"""
+    
+    def __init__(self, ttl: int, local_ttl: int):
+        self.ttl = ttl
+        self.local = TTLCache(min(ttl, local_ttl))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Future] = set()
+    
+    @staticmethod
+    def _redis_key(username: str) -> str:
+        return f"user:{username}"
+    
+    async def get(self, username: str, iat: Optional[int]) -> Optional[Dict[str, Any]]:
+        self._loop = asyncio.get_running_loop()
+        key: Hashable = (username, iat)
+        
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        
+        redis = get_redis()
+        if redis is None:
+            return None
+        
+        try:
+            raw = await redis_call(lambda: redis.hget(self._redis_key(username), str(iat)))
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.warning(f"Redis фойдаланувчи кэшини ўқиб бўлмади: {e}")
+            return None
+        
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+    
+    async def set(self, username: str, iat: Optional[int], projection: Dict[str, Any]):
+        self._loop = asyncio.get_running_loop()
+        self.local.set((username, iat), projection)
+        
+        redis = get_redis()
+        if redis is None:
+            return
+        
+        async def write():
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self._redis_key(username), str(iat), json.dumps(projection))
+                pipe.expire(self._redis_key(username), self.ttl)
+                await pipe.execute()
+        
+        try:
+            await redis_call(write)
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            logger.warning(f"Redis фойдаланувчи кэшига ёзиб бўлмади: {e}")
+    
+    def invalidate(self, username: str):
+        """Фойдаланувчининг барча токенлари бўйича кэшни тозалаш (ихтиёрий thread'дан)"""
+        self.local.invalidate(lambda key: key[0] == username)
+        
+        redis = get_redis()
+        loop = self._loop
+        if redis is None or loop is None or loop.is_closed():
+            return
+        
+        # Sync эндпоинтлар commit'и thread'да бўлади - Redis фақат илова loop'ида
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        coroutine = self._delete(redis, username)
+        if running is loop:
+            future = loop.create_task(coroutine)
+        else:
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        self._tasks.add(future)
+        future.add_done_callback(self._tasks.discard)
+    
+    async def _delete(self, redis: Any, username: str):
+        try:
+            await redis_call(lambda: redis.delete(self._redis_key(username)))
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            logger.warning(f"Redis фойдаланувчи кэшини тозалаб бўлмади: {e}")
+
+
+# Глобал фойдаланувчи кэши
+user_cache = UserCache(settings.USER_CACHE_TTL, settings.USER_CACHE_LOCAL_TTL)
+
+
+def _mark_pending(target: User):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.username)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in INVALIDATING_FIELDS):
+        _mark_pending(target)
+        # Номи ўзгарган бўлса эски ном ҳам тозаланади
+        for username in state.attrs.username.history.deleted:
+            Session.object_session(target).info[_PENDING_KEY].add(username)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User):
+    _mark_pending(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for username in session.info.pop(_PENDING_KEY, None) or ():
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -9,26 +9,24 @@ from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import logging
+import time
 from datetime import datetime
 import os
 
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.log_config import setup_logging
+from app.core.redis import close_redis
 from app.core.security import get_current_user
 from app.api.v1 import api_router
 from app.middleware.logging_middleware import LoggingMiddleware
 from app.middleware.security_middleware import SecurityMiddleware
+from app.services.container import build_container
 
-# Логированиени сўнлаш
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(settings.LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Логированиени сўнлаш (навбат орқали, ёзиш фон thread'ида)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -37,15 +35,41 @@ async def lifespan(app: FastAPI):
     """Илова ишга тушганда ва тўхтаганда ишлайди"""
     # Ишга тушганда
     logger.info("Digital Service Platform ишга тушмоқда...")
+    started = time.perf_counter()
+    
+    # Сервислар контейнери (ҳар бир сервис биринчи мурожаатда бир марта яратилади)
+    app.state.services = build_container()
     
     # Базани яратиш
     Base.metadata.create_all(bind=engine)
     logger.info("База яратилди")
     
+    # Сақланган прогноз моделларини юклаш ва фон янгилашни бошлаш
+    model_registry = app.state.services.get("predictive_models")
+    loaded = await asyncio.to_thread(model_registry.load)
+    logger.info(f"Прогноз моделлари юкланди: {loaded} та")
+    model_registry.start(settings.MODEL_REFRESH_INTERVAL)
+    
+    # Маълумот ўзгаришлари бўйича фон риск баҳолаш
+    rescoring_worker = app.state.services.get("risk_rescoring")
+    rescoring_worker.start()
+    
+    logger.info(
+        f"Илова тайёр: {time.perf_counter() - started:.3f}s, "
+        f"сервислар: {app.state.services.report()}"
+    )
+    
     yield
     
     # Тўхтаганда
     logger.info("Digital Service Platform тўхтамоқда...")
+    await rescoring_worker.stop()
+    # Ташқи API клиентлари (keepalive пуллари) - фақат сервис яратилган бўлса
+    integration_service = app.state.services.instance("integration")
+    if integration_service is not None:
+        await integration_service.close()
+    await model_registry.stop()
+    await close_redis()
 
 
 app = FastAPI(
@@ -57,6 +81,9 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Хавфсизлик мидлвар (CORS ичида - 429 жавобларида ҳам CORS хедерлари бўлади)
+app.add_middleware(SecurityMiddleware)
+
 # CORS мидлвар
 app.add_middleware(
     CORSMiddleware,
@@ -75,9 +102,6 @@ app.add_middleware(
 # Логирование мидлвар
 app.add_middleware(LoggingMiddleware)
 
-# Хавфсизлик мидлвар
-app.add_middleware(SecurityMiddleware)
-
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -159,5 +183,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        # Прокси ортида клиент IP'си X-Forwarded-For'дан (rate limit ва логлар учун)
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
         log_level=settings.LOG_LEVEL.lower()
     )
@@ -1,39 +1,82 @@
 """
 Логирование мидлвари
-Барча сўровларни логирлайди
+Барча сўровларни структуравий (JSON) access лог сифатида ёзади
 """
+import random
 import time
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Dict, List, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-logger = logging.getLogger(__name__)
+from app.core.config import settings
+from app.core.log_config import ACCESS_LOGGER
 
+logger = logging.getLogger(ACCESS_LOGGER)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Логирование мидлвари"""
+
+class LoggingMiddleware:
+    """
+    Логирование мидлвари (соф ASGI)
+    Жавоб оқими ўзгаришсиз ўтади - StreamingResponse ҳам буферланмайди
+    Кўп чақириладиган йўллар sampling билан логланади, хатолик ва секин сўровлар - доим
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: Optional[float] = None,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+        slow_seconds: Optional[float] = None
+    ):
+        self.app = app
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        rates = settings.ACCESS_LOG_ROUTE_SAMPLE_RATES if route_sample_rates is None else route_sample_rates
+        # Энг узун префикс биринчи текширилади
+        self.route_sample_rates: List[Tuple[str, float]] = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self.slow_seconds = settings.ACCESS_LOG_SLOW_SECONDS if slow_seconds is None else slow_seconds
+    
+    def _rate(self, path: str) -> float:
+        for prefix, rate in self.route_sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.sample_rate
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Сўровни логирлаш"""
-        start_time = time.time()
-        
-        # Сўров маълумотлари
-        method = request.method
-        url = str(request.url)
-        client_ip = request.client.host if request.client else "unknown"
-        
-        # Жавоб
-        response = await call_next(request)
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Вақт
-        process_time = time.time() - start_time
+        start_time = time.perf_counter()
+        status_code = 500
         
-        # Логирование
-        logger.info(
-            f"{method} {url} - "
-            f"Status: {response.status_code} - "
-            f"Time: {process_time:.3f}s - "
-            f"IP: {client_ip}"
-        )
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
-        return response
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Вақт (жавоб охиригача)
+            process_time = time.perf_counter() - start_time
+            path = scope["path"]
+            
+            if (
+                status_code >= 400
+                or process_time >= self.slow_seconds
+                or random.random() < self._rate(path)
+            ) and logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                method = scope["method"]
+                duration_ms = round(process_time * 1000, 2)
+                # Фақат навбатга қўйилади - форматлаш фон thread'ида
+                logger.info("%s %s %s %.2fms", method, path, status_code, duration_ms, extra={
+                    "method": method,
+                    "path": path,
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status_code,
+                    "duration_ms": duration_ms,
+                    "client_ip": client[0] if client else "unknown"
+                })
@@ -1,30 +1,154 @@
 """
 Хавфсизлик мидлвари
-Хавфсизлик текширувлари
+Хавфсизлик текширувлари ва сўровлар тезлигини чеклаш
 """
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
 import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from jose import JWTError, jwt
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+from app.core.redis import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Текширилган токен -> sub (фақат ҳақиқий токенлар сақланади, сохталари ҳар сафар рад этилади)
+_token_subjects = TTLCache(ttl=60, maxsize=10000)
+
+# Ҳар бир жавобга қўшиладиган хавфсизлик хедерлари
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block"
+}
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """
+    Йўл бўйича лимит: секундига rate та сўров, энг кўпи burst та кетма-кет
+    per: "user" - текширилган Bearer токендаги фойдаланувчи (токенсиз ёки нотўғри токен - IP), "ip" - доим IP
+    """
+    name: str
+    pattern: "re.Pattern"
+    rate: float
+    burst: float
+    methods: Optional[Tuple[str, ...]] = None
+    per: str = "user"
+    
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and self.pattern.match(path) is not None
+
+
+# Биринчи мос келган сиёсат ишлатилади
+ROUTE_POLICIES: List[RateLimitPolicy] = [
+    # Парол танлашдан ҳимоя (bcrypt CPU'си ҳам қимматли)
+    RateLimitPolicy("login", re.compile(r"^/api/v1/auth/(login|register)$"), rate=10 / 60, burst=10, methods=("POST",), per="ip"),
+    # Видео таҳлил - энг оғир эндпоинт
+    RateLimitPolicy("camera_analyze", re.compile(r"^/api/v1/cameras/[^/]+/analyze$"), rate=6 / 60, burst=3, methods=("POST",)),
+    # Қолган API
+    RateLimitPolicy("api", re.compile(r"^/api/"), rate=settings.RATE_LIMIT_RATE, burst=settings.RATE_LIMIT_BURST)
+]
+
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Хавфсизлик мидлвари"""
+class SecurityMiddleware:
+    """Хавфсизлик мидлвари (соф ASGI)"""
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Optional[List[RateLimitPolicy]] = None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.policies = ROUTE_POLICIES if policies is None else policies
+        self._limiter = limiter
+    
+    @property
+    def limiter(self) -> RateLimiter:
+        # Redis клиенти илова loop'ида биринчи сўровда яратилади
+        if self._limiter is None:
+            self._limiter = RateLimiter(get_redis())
+        return self._limiter
     
-    async def dispatch(self, request: Request, call_next):
+    @staticmethod
+    def _token_subject(token: str) -> Optional[str]:
+        """Токен имзосини текшириш: ҳақиқий бўлса sub, акс ҳолда None"""
+        subject = _token_subjects.get(token)
+        if subject is not MISSING:
+            return subject
+        
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        
+        subject = payload.get("sub")
+        if subject:
+            _token_subjects.set(token, subject)
+        return subject
+    
+    @classmethod
+    def _identity(cls, scope: Scope, per: str) -> str:
+        if per == "user":
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        # Сохта токенлар ҳар сафар янги бакет олмаслиги учун - IP бакетига тушади
+                        subject = cls._token_subject(token)
+                        if subject:
+                            return f"user:{subject}"
+                    break
+        
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+    
+    async def _check_rate_limit(self, scope: Scope) -> float:
+        """0 - рухсат, акс ҳолда Retry-After (секунд)"""
+        method = scope["method"]
+        path = scope["path"]
+        for policy in self.policies:
+            if policy.matches(method, path):
+                key = f"{policy.name}:{self._identity(scope, policy.per)}"
+                return await self.limiter.hit(key, policy.rate, policy.burst)
+        return 0.0
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Хавфсизлик текширувлари"""
-        # Rate limiting (содда версия)
-        # Production'да Redis ishlatish керак
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # XSS ва SQL injection текширувлари
-        # (бу ерда содда версия)
+        async def send_wrapper(message: Message):
+            # Хавфсизлик хедерларини қўшиш (жавоб бошида)
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
         
-        response = await call_next(request)
+        # Rate limiting (Redis ёки процесс ичида, битта атомар мурожаат)
+        if self.enabled:
+            retry_after = await self._check_rate_limit(scope)
+            if retry_after > 0:
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Сўровлар сони чегарадан ошди"},
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+                await response(scope, receive, send_wrapper)
+                return
         
-        # Хавфсизлик хедерларини қўшиш
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        # XSS ва SQL injection текширувлари
+        # (бу ерда содда версия)
         
-        return response
+        await self.app(scope, receive, send_wrapper)
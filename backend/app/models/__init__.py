@@ -3,8 +3,8 @@ from app.models.user import User
 from app.models.location import Location, Camera
 from app.models.employee import Employee, EmployeeFace
 from app.models.customer import CustomerFlow, CustomerVisit
-from app.models.analytics import Analytics, RiskScore, Heatmap
-from app.models.integration import TaxIntegration, KKTIntegration
+from app.models.analytics import Analytics, RiskScore, Heatmap, Forecast, LocationDailyStats
+from app.models.integration import TaxIntegration, KKTIntegration, KKTReceipt
 
 __all__ = [
     "User",
@@ -17,6 +17,9 @@ __all__ = [
     "Analytics",
     "RiskScore",
     "Heatmap",
+    "Forecast",
+    "LocationDailyStats",
     "TaxIntegration",
-    "KKTIntegration"
+    "KKTIntegration",
+    "KKTReceipt"
 ]
@@ -1,7 +1,7 @@
 """
 Аналитика моделлари
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -24,6 +24,11 @@ class Analytics(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset пагинация: (location_id, date, id)
+    __table_args__ = (
+        Index("ix_analytics_location_date_id", "location_id", "date", "id"),
+    )
+    
     # Алокалар
     location = relationship("Location", back_populates="analytics")
 
@@ -43,6 +48,11 @@ class RiskScore(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Бир локация ва кун учун битта баҳо (date - кун боши)
+    __table_args__ = (
+        UniqueConstraint("location_id", "date", name="uq_risk_scores_location_date"),
+    )
+    
     # Алокалар
     location = relationship("Location", back_populates="risk_scores")
 
@@ -58,3 +68,45 @@ class Heatmap(Base):
     heatmap_data = Column(JSON, nullable=False)  # Grid маълумотлари
     max_intensity = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Forecast(Base):
+    """Олдиндан ҳисобланган прогноз (тунги batch иш)"""
+    __tablename__ = "forecasts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    date = Column(DateTime, nullable=False)  # Прогноз куни
+    predicted_customers = Column(Integer, default=0)
+    model_version = Column(Integer, nullable=True)
+    generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_forecasts_location_date", "location_id", "date"),
+    )
+    
+    # Алокалар
+    location = relationship("Location", back_populates="forecasts")
+
+
+class LocationDailyStats(Base):
+    """
+    Локациянинг кунлик агрегатлари
+    WorkLog ва ККТ синхронизациясида инкрементал янгиланади (daily_stats_service)
+    """
+    __tablename__ = "location_daily_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    date = Column(DateTime, nullable=False)  # Кун боши
+    worked_hours = Column(Float, default=0.0, nullable=False)
+    kkt_receipts = Column(Integer, default=0, nullable=False)
+    kkt_amount = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("location_id", "date", name="uq_location_daily_stats_location_date"),
+    )
+    
+    # Алокалар
+    location = relationship("Location", back_populates="daily_stats")
@@ -1,7 +1,7 @@
 """
 Ходим моделлари
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -25,6 +25,11 @@ class Employee(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset пагинация: (location_id, id)
+    __table_args__ = (
+        Index("ix_employees_location_id_id", "location_id", "id"),
+    )
+    
     # Алокалар
     location = relationship("Location", back_populates="employees")
     faces = relationship("EmployeeFace", back_populates="employee", cascade="all, delete-orphan")
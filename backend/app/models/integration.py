@@ -1,7 +1,7 @@
 """
 Интеграция моделлари
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -33,9 +33,28 @@ class KKTIntegration(Base):
     kkt_serial = Column(String(100), nullable=False)
     kkt_number = Column(String(100), nullable=True)
     last_sync = Column(DateTime, nullable=True)
-    total_receipts = Column(Integer, default=0)
+    total_receipts = Column(Integer, default=0)  # Синхронлашда йиғилган чеклар
     total_amount = Column(Float, default=0.0)
+    last_receipt_id = Column(String(100), nullable=True)  # Инкрементал синхронлаш курсори
+    last_receipt_at = Column(DateTime, nullable=True)
     sync_status = Column(String(50), default="pending")
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class KKTReceipt(Base):
+    """ККТ чеки (push орқали қабул қилинган, такрорланишни аниқлаш учун)"""
+    __tablename__ = "kkt_receipts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kkt_serial = Column(String(100), nullable=False)
+    receipt_id = Column(String(100), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    amount = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("kkt_serial", "receipt_id", name="uq_kkt_receipts_serial_receipt"),
+    )
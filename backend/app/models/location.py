@@ -44,6 +44,8 @@ class Location(Base):
     customer_flows = relationship("CustomerFlow", back_populates="location", cascade="all, delete-orphan")
     analytics = relationship("Analytics", back_populates="location", cascade="all, delete-orphan")
     risk_scores = relationship("RiskScore", back_populates="location", cascade="all, delete-orphan")
+    forecasts = relationship("Forecast", back_populates="location", cascade="all, delete-orphan")
+    daily_stats = relationship("LocationDailyStats", back_populates="location", cascade="all, delete-orphan")
 
 
 class Camera(Base):
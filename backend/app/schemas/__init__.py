@@ -4,11 +4,13 @@ from app.schemas.location import Location, LocationCreate, LocationUpdate
 from app.schemas.employee import Employee, EmployeeCreate, EmployeeUpdate, EmployeeFaceCreate
 from app.schemas.customer import CustomerFlow, CustomerVisit
 from app.schemas.analytics import Analytics, RiskScore, Heatmap
+from app.schemas.integration import KKTReceiptIn
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "Token", "TokenData",
     "Location", "LocationCreate", "LocationUpdate",
     "Employee", "EmployeeCreate", "EmployeeUpdate", "EmployeeFaceCreate",
     "CustomerFlow", "CustomerVisit",
-    "Analytics", "RiskScore", "Heatmap"
+    "Analytics", "RiskScore", "Heatmap",
+    "KKTReceiptIn"
 ]
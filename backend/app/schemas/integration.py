@@ -0,0 +1,13 @@
+"""
+Интеграция схемалари
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class KKTReceiptIn(BaseModel):
+    """ККТ чеки (push орқали)"""
+    id: str = Field(..., min_length=1, max_length=100)
+    kkt_serial: str = Field(..., min_length=1, max_length=100)
+    timestamp: datetime
+    amount: float = Field(0.0, ge=0)
@@ -4,29 +4,39 @@
 """
 from typing import List, Dict, Any, Optional
 import numpy as np
-import cv2
 from datetime import datetime
 import logging
 
+from app.core.lazy import lazy_import
 from app.services.face_recognition_service import FaceRecognitionService
 from app.services.person_detection_service import PersonDetectionService
 from app.services.behavioral_analytics_service import BehavioralAnalyticsService
 from app.services.predictive_analytics_service import PredictiveAnalyticsService
 from app.services.risk_scoring_service import RiskScoringService
 
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+cv2 = lazy_import("cv2")
+
 logger = logging.getLogger(__name__)
 
 
 class AIService:
     """Асосий AI сервиси"""
     
-    def __init__(self):
-        """Инициализация"""
-        self.face_recognition = FaceRecognitionService()
-        self.person_detection = PersonDetectionService()
-        self.behavioral_analytics = BehavioralAnalyticsService()
-        self.predictive_analytics = PredictiveAnalyticsService()
-        self.risk_scoring = RiskScoringService()
+    def __init__(
+        self,
+        face_recognition: Optional[FaceRecognitionService] = None,
+        person_detection: Optional[PersonDetectionService] = None,
+        behavioral_analytics: Optional[BehavioralAnalyticsService] = None,
+        predictive_analytics: Optional[PredictiveAnalyticsService] = None,
+        risk_scoring: Optional[RiskScoringService] = None
+    ):
+        """Инициализация (берилмаган сервислар янги яратилади)"""
+        self.face_recognition = face_recognition or FaceRecognitionService()
+        self.person_detection = person_detection or PersonDetectionService()
+        self.behavioral_analytics = behavioral_analytics or BehavioralAnalyticsService()
+        self.predictive_analytics = predictive_analytics or PredictiveAnalyticsService()
+        self.risk_scoring = risk_scoring or RiskScoringService()
         logger.info("AI сервис инициализация қилинди")
     
     async def process_frame(
@@ -4,13 +4,15 @@ ONVIF камералар билан ишлаш
 """
 from typing import Dict, Any, Optional, List
 import logging
-from onvif import ONVIFCamera
-import cv2
 
 from app.core.config import settings
+from app.core.lazy import lazy_import
 from app.models.location import Camera
 from app.core.database import SessionLocal
 
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+cv2 = lazy_import("cv2")
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,7 +37,8 @@ class CameraService:
             username = username or settings.ONVIF_USERNAME
             password = password or settings.ONVIF_PASSWORD
             
-            # ONVIF камера
+            # ONVIF камера (onvif/zeep фақат уланишда юкланади)
+            from onvif import ONVIFCamera
             camera = ONVIFCamera(
                 ip_address,
                 port,
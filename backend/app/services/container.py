@@ -0,0 +1,105 @@
+"""
+Илова сервисларини контейнерда рўйхатдан ўтказиш
+Сервис модуллари factory ичида импорт қилинади - оғир кутубхоналар (cv2, onnxruntime, ...)
+фақат шу сервис биринчи марта керак бўлганда юкланади
+"""
+from app.core.container import ServiceContainer
+
+
+def _face_recognition(container: ServiceContainer):
+    from app.services.face_recognition_service import FaceRecognitionService
+    return FaceRecognitionService()
+
+
+def _person_detection(container: ServiceContainer):
+    from app.services.person_detection_service import PersonDetectionService
+    return PersonDetectionService()
+
+
+def _behavioral_analytics(container: ServiceContainer):
+    from app.services.behavioral_analytics_service import BehavioralAnalyticsService
+    return BehavioralAnalyticsService()
+
+
+def _predictive_models(container: ServiceContainer):
+    # Прогноз сервиси, видеоаналитика ва lifespan'даги фон янгилаш учун битта реестр
+    from app.services.predictive_analytics_service import build_predictive_model_registry
+    return build_predictive_model_registry()
+
+
+def _forecast_cache(container: ServiceContainer):
+    from app.services.predictive_analytics_service import build_forecast_cache
+    return build_forecast_cache()
+
+
+def _predictive_analytics(container: ServiceContainer):
+    from app.services.predictive_analytics_service import PredictiveAnalyticsService
+    return PredictiveAnalyticsService(
+        registry=container.get("predictive_models"),
+        cache=container.get("forecast_cache")
+    )
+
+
+def _risk_scoring(container: ServiceContainer):
+    from app.services.risk_scoring_service import RiskScoringService
+    return RiskScoringService()
+
+
+def _risk_rescoring(container: ServiceContainer):
+    # Эндпоинтлар билан битта баҳолаш сервиси (lifespan'да ишга туширилади)
+    from app.core.config import settings
+    from app.services.risk_scoring_service import RiskRescoringWorker
+    return RiskRescoringWorker(
+        container.get("risk_scoring"),
+        settings.RISK_RESCORE_DELAY,
+        settings.RISK_RESCORE_BATCH_SIZE
+    )
+
+
+def _ai(container: ServiceContainer):
+    from app.services.ai_service import AIService
+    return AIService(
+        face_recognition=container.get("face_recognition"),
+        person_detection=container.get("person_detection"),
+        behavioral_analytics=container.get("behavioral_analytics"),
+        predictive_analytics=container.get("predictive_analytics"),
+        risk_scoring=container.get("risk_scoring")
+    )
+
+
+def _video_analytics(container: ServiceContainer):
+    from app.services.video_analytics_service import VideoAnalyticsService
+    return VideoAnalyticsService(
+        ai_service=container.get("ai"),
+        person_detection=container.get("person_detection"),
+        model_registry=container.get("predictive_models")
+    )
+
+
+def _camera(container: ServiceContainer):
+    from app.services.camera_service import CameraService
+    return CameraService()
+
+
+def _integration(container: ServiceContainer):
+    # HTTP пуллари биринчи мурожаатда очилади, lifespan тўхтаганда ёпилади
+    from app.services.integration_service import IntegrationService
+    return IntegrationService()
+
+
+def build_container() -> ServiceContainer:
+    """Барча сервислар рўйхатдан ўтган контейнер"""
+    container = ServiceContainer()
+    container.register("face_recognition", _face_recognition)
+    container.register("person_detection", _person_detection)
+    container.register("behavioral_analytics", _behavioral_analytics)
+    container.register("predictive_models", _predictive_models)
+    container.register("forecast_cache", _forecast_cache)
+    container.register("predictive_analytics", _predictive_analytics)
+    container.register("risk_scoring", _risk_scoring)
+    container.register("risk_rescoring", _risk_rescoring)
+    container.register("ai", _ai)
+    container.register("video_analytics", _video_analytics)
+    container.register("camera", _camera)
+    container.register("integration", _integration)
+    return container
@@ -0,0 +1,245 @@
+"""
+Кунлик агрегатлар сервиси
+Локация бўйича кунлик иш соатлари ва ККТ чеклари (location_daily_stats)
+
+WorkLog ўзгаришлари mapper event'лари орқали инкрементал қўшилади,
+ККТ маълумотлари синхронизацияда ёзилади.
+Риск баҳолаш хом жадвалларни эмас, шу кичик жадвални ўқийди.
+
+Мавжуд WorkLog'лардан қайта қуриш:
+    python -m app.services.daily_stats_service --rebuild
+"""
+import argparse
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, upsert_statement
+from app.models.analytics import LocationDailyStats
+from app.models.employee import WorkLog
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = ("worked_hours", "kkt_receipts", "kkt_amount")
+
+# Бир ходимнинг битта журнал ёзувидаги максимал иш вақти (нотўғри check_out'лардан ҳимоя)
+MAX_SHIFT_HOURS = 24
+
+
+def day_start(value: datetime) -> datetime:
+    return datetime.combine(value.date(), datetime.min.time())
+
+
+def split_work_hours(
+    check_in: Optional[datetime],
+    check_out: Optional[datetime]
+) -> Dict[datetime, float]:
+    """Иш вақтини календар кунларига бўлиш (ярим тундан ўтган смена учун)"""
+    if check_in is None or check_out is None or check_out <= check_in:
+        return {}
+    
+    check_out = min(check_out, check_in + timedelta(hours=MAX_SHIFT_HOURS))
+    hours: Dict[datetime, float] = {}
+    current = check_in
+    while current < check_out:
+        next_day = day_start(current) + timedelta(days=1)
+        end = min(next_day, check_out)
+        hours[day_start(current)] = (end - current).total_seconds() / 3600
+        current = end
+    
+    return hours
+
+
+def _dialect_name(conn) -> str:
+    bind = conn if isinstance(conn, Connection) else conn.get_bind()
+    return bind.dialect.name
+
+
+def _write_stats(conn, rows: List[Dict[str, Any]], columns: List[str], increment: bool):
+    """Кунлик қаторларга қўшиш (increment) ёки қийматларни алмаштириш"""
+    if not rows:
+        return
+    
+    table = LocationDailyStats.__table__
+    now = datetime.utcnow()
+    
+    values = []
+    for row in rows:
+        value = {column: 0 for column in STAT_COLUMNS}
+        value.update(row)
+        value.update({"date": day_start(row["date"]), "updated_at": now})
+        values.append(value)
+    
+    def assignments(new) -> Dict[str, Any]:
+        result = {"updated_at": new.updated_at}
+        for column in columns:
+            result[column] = table.c[column] + new[column] if increment else new[column]
+        return result
+    
+    stmt = upsert_statement(_dialect_name(conn), table, ["location_id", "date"], assignments)
+    if stmt is not None:
+        conn.execute(stmt, values)
+        return
+    
+    # Бошқа базалар учун: аввал UPDATE, қатор бўлмаса INSERT
+    for value in values:
+        changes = {
+            column: table.c[column] + value[column] if increment else value[column]
+            for column in columns
+        }
+        result = conn.execute(
+            update(table).where(
+                table.c.location_id == value["location_id"],
+                table.c.date == value["date"]
+            ).values(updated_at=now, **changes)
+        )
+        if result.rowcount == 0:
+            conn.execute(table.insert(), [value])
+
+
+def increment_daily_stats(conn, location_id: int, day: datetime, **deltas):
+    """Кунлик кўрсаткичларга қўшиш (Session ёки Connection)"""
+    deltas = {column: value for column, value in deltas.items() if value}
+    if deltas:
+        _write_stats(conn, [{"location_id": location_id, "date": day, **deltas}], list(deltas), increment=True)
+
+
+def set_daily_stats(conn, location_id: int, day: datetime, **values):
+    """Кунлик кўрсаткичларни алмаштириш (Session ёки Connection)"""
+    if values:
+        _write_stats(conn, [{"location_id": location_id, "date": day, **values}], list(values), increment=False)
+
+
+def increment_daily_stats_many(conn, rows: List[Dict[str, Any]], columns: List[str]):
+    """Кўп кунлик қаторларга битта сўров билан қўшиш"""
+    _write_stats(conn, rows, columns, increment=True)
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """UTC (timezone'сиз) вақт - базада вақтлар UTC да сақланади"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ISO вақтни UTC (timezone'сиз) га ўтказиш"""
+    return to_utc_naive(datetime.fromisoformat(value))
+
+
+@dataclass
+class ReceiptTotals:
+    """ККТ чекларини кунлар бўйича йиғиш"""
+    count: int = 0
+    amount: float = 0.0
+    last_id: Optional[str] = None
+    last_at: Optional[datetime] = None
+    days: Dict[datetime, List[float]] = field(default_factory=dict)
+    
+    def add(self, receipt_id: str, timestamp: datetime, amount: float):
+        day = self.days.setdefault(day_start(timestamp), [0, 0.0])
+        day[0] += 1
+        day[1] += amount
+        self.count += 1
+        self.amount += amount
+        self.last_id = receipt_id
+        if self.last_at is None or timestamp > self.last_at:
+            self.last_at = timestamp
+    
+    def daily_rows(self, location_id: int) -> List[Dict[str, Any]]:
+        """increment_daily_stats_many учун қаторлар"""
+        return [
+            {"location_id": location_id, "date": day, "kkt_receipts": int(count), "kkt_amount": amount}
+            for day, (count, amount) in self.days.items()
+        ]
+
+
+def _apply_work_hours(conn, location_id: Optional[int], hours: Dict[datetime, float], sign: int):
+    if location_id is None:
+        return
+    for day, value in hours.items():
+        increment_daily_stats(conn, location_id, day, worked_hours=sign * value)
+
+
+def _previous_value(state, attribute: str) -> Any:
+    """Flush'дан олдинги атрибут қиймати"""
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attribute)
+
+
+@event.listens_for(WorkLog, "after_insert")
+def _work_log_inserted(mapper, connection, target: WorkLog):
+    _apply_work_hours(
+        connection,
+        target.location_id,
+        split_work_hours(target.check_in, target.check_out),
+        1
+    )
+
+
+@event.listens_for(WorkLog, "after_update")
+def _work_log_updated(mapper, connection, target: WorkLog):
+    state = inspect(target)
+    old: Tuple = tuple(_previous_value(state, name) for name in ("location_id", "check_in", "check_out"))
+    new: Tuple = (target.location_id, target.check_in, target.check_out)
+    if old == new:
+        return
+    
+    _apply_work_hours(connection, old[0], split_work_hours(old[1], old[2]), -1)
+    _apply_work_hours(connection, new[0], split_work_hours(new[1], new[2]), 1)
+
+
+@event.listens_for(WorkLog, "after_delete")
+def _work_log_deleted(mapper, connection, target: WorkLog):
+    _apply_work_hours(
+        connection,
+        target.location_id,
+        split_work_hours(target.check_in, target.check_out),
+        -1
+    )
+
+
+def rebuild_work_hours(db: Session) -> int:
+    """Барча WorkLog'лардан иш соатларини қайта ҳисоблаш"""
+    totals: Dict[Tuple[int, datetime], float] = defaultdict(float)
+    logs = db.query(
+        WorkLog.location_id,
+        WorkLog.check_in,
+        WorkLog.check_out
+    ).filter(WorkLog.check_out.isnot(None)).yield_per(10000)
+    
+    for location_id, check_in, check_out in logs:
+        for day, hours in split_work_hours(check_in, check_out).items():
+            totals[(location_id, day)] += hours
+    
+    db.execute(update(LocationDailyStats).values(worked_hours=0.0))
+    for (location_id, day), hours in totals.items():
+        set_daily_stats(db, location_id, day, worked_hours=hours)
+    db.commit()
+    
+    return len(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локация кунлик агрегатлари")
+    parser.add_argument("--rebuild", action="store_true", help="WorkLog'дан иш соатларини қайта қуриш")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if args.rebuild:
+        db = SessionLocal()
+        try:
+            print({"location_days": rebuild_work_hours(db)})
+        finally:
+            db.close()
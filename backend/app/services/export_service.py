@@ -0,0 +1,130 @@
+"""
+Маълумотларни экспорт қилиш сервиси
+Analytics, RiskScore ва CustomerVisit тарихини NDJSON ёки CSV (gzip бўлиши мумкин) оқими сифатида бериш
+Қаторлар server-side cursor (yield_per) билан ўқилади - хотира экспорт ҳажмига боғлиқ эмас
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, select
+
+from app.core.database import SessionLocal
+from app.models.analytics import Analytics, RiskScore
+from app.models.customer import CustomerVisit
+
+# Датасет -> (модел, сана устуни)
+EXPORT_DATASETS: Dict[str, Tuple[Any, Column]] = {
+    "analytics": (Analytics, Analytics.date),
+    "risk_scores": (RiskScore, RiskScore.date),
+    "customer_visits": (CustomerVisit, CustomerVisit.entered_at)
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Базадан бир марта олинадиган қаторлар сони
+EXPORT_BATCH_SIZE = 5000
+
+# Клиентга юбориладиган бўлак ҳажми
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _iter_rows(
+    dataset: str,
+    location_ids: Optional[List[int]],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Tuple[List[str], Iterator[tuple]]:
+    model, date_column = EXPORT_DATASETS[dataset]
+    columns = list(model.__table__.columns)
+    
+    stmt = select(*columns).order_by(model.id)
+    if location_ids:
+        stmt = stmt.where(model.location_id.in_(location_ids))
+    if start_date:
+        stmt = stmt.where(date_column >= start_date)
+    if end_date:
+        stmt = stmt.where(date_column <= end_date)
+    
+    def rows() -> Iterator[tuple]:
+        db = SessionLocal()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            db.close()
+    
+    return [column.name for column in columns], rows()
+
+
+def _iter_lines(fmt: str, names: List[str], rows: Iterator[tuple]) -> Iterator[str]:
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default) + "\n"
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_export(
+    dataset: str,
+    fmt: str = "ndjson",
+    location_ids: Optional[List[int]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    compress: bool = False
+) -> Iterator[bytes]:
+    """
+    Экспорт оқими (StreamingResponse учун, thread пулида ўқилади)
+    Қаторлар EXPORT_CHUNK_BYTES бўлакларга йиғилади, compress=True бўлса gzip
+    """
+    names, rows = _iter_rows(dataset, location_ids, start_date, end_date)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    
+    chunk: List[bytes] = []
+    size = 0
+    for line in _iter_lines(fmt, names, rows):
+        data = line.encode("utf-8")
+        chunk.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            payload = b"".join(chunk)
+            chunk, size = [], 0
+            payload = compressor.compress(payload) if compressor else payload
+            if payload:
+                yield payload
+    
+    payload = b"".join(chunk)
+    if compressor:
+        payload = compressor.compress(payload) + compressor.flush()
+    if payload:
+        yield payload
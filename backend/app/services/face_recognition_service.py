@@ -2,9 +2,7 @@
 Фейс-идентификация сервиси
 Face Recognition модули
 """
-import face_recognition
 import numpy as np
-import cv2
 import pickle
 import base64
 from typing import List, Dict, Any, Optional
@@ -14,9 +12,14 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.encryption import encryption_service
+from app.core.lazy import lazy_import
 from app.models.employee import Employee, EmployeeFace
 from app.core.database import SessionLocal
 
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+face_recognition = lazy_import("face_recognition")
+cv2 = lazy_import("cv2")
+
 logger = logging.getLogger(__name__)
 
 
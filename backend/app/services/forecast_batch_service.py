@@ -0,0 +1,222 @@
+"""
+Тунги прогноз сервиси
+Барча фаол локациялар учун прогнозларни batch режимида ҳисоблаш
+
+Ишга тушириш:
+    python -m app.services.forecast_batch_service --days 30 --workers 8
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert
+
+from app.core.database import SessionLocal
+from app.models.analytics import Forecast
+from app.models.customer import CustomerFlow
+from app.models.location import Location
+from app.services.model_registry import ModelEntry, ModelRegistry
+from app.services.predictive_analytics_service import (
+    MIN_HISTORY_DAYS,
+    TRAINING_WINDOW_DAYS,
+    build_forecast_features,
+    build_predictive_model_registry,
+    fit_flow_model
+)
+
+logger = logging.getLogger(__name__)
+
+# Бир DELETE/INSERT сўровидаги локациялар сони
+WRITE_CHUNK_SIZE = 500
+
+
+def _fit_and_forecast(
+    location_id: int,
+    dates: np.ndarray,
+    counts: np.ndarray,
+    horizon_start: datetime,
+    days: int
+) -> Tuple[int, Any, np.ndarray]:
+    """Процесс пулида бажариладиган иш: моделни ўқитиш ва прогноз"""
+    model = fit_flow_model(pd.DatetimeIndex(dates), counts)
+    _, X = build_forecast_features(horizon_start, days, counts)
+    return location_id, model, np.maximum(model.predict(X), 0).astype(int)
+
+
+class ForecastBatchService:
+    """Барча локациялар учун прогноз batch иши"""
+    
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        max_workers: Optional[int] = None
+    ):
+        """Инициализация"""
+        self.registry = registry or build_predictive_model_registry()
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    def _load_histories(self, db, end_date: datetime) -> Dict[int, Dict[str, Any]]:
+        """Барча фаол локациялар оқимини битта сўров билан юклаш"""
+        rows = db.query(
+            CustomerFlow.location_id,
+            CustomerFlow.date,
+            CustomerFlow.total_entered,
+            CustomerFlow.updated_at
+        ).join(
+            Location, Location.id == CustomerFlow.location_id
+        ).filter(
+            Location.is_active == True,
+            CustomerFlow.date >= end_date - timedelta(days=TRAINING_WINDOW_DAYS),
+            CustomerFlow.date <= end_date
+        ).order_by(CustomerFlow.location_id, CustomerFlow.date).all()
+        
+        histories = {}
+        for location_id, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            if len(group) < MIN_HISTORY_DAYS:
+                continue
+            
+            updated = [row[3] for row in group if row[3]]
+            histories[location_id] = {
+                "dates": np.array([row[1] for row in group], dtype="datetime64[ns]"),
+                "counts": np.array([row[2] or 0 for row in group], dtype=float),
+                # predictive_analytics_service.flow_signature билан бир хил
+                "signature": (len(group), max(updated).isoformat() if updated else None)
+            }
+        
+        return histories
+    
+    def _write_forecasts(
+        self,
+        db,
+        results: Dict[int, np.ndarray],
+        horizon_start: datetime,
+        generated_at: datetime
+    ) -> int:
+        """Прогнозларни bulk DELETE + INSERT билан ёзиш"""
+        location_ids = list(results)
+        total = 0
+        
+        for i in range(0, len(location_ids), WRITE_CHUNK_SIZE):
+            chunk = location_ids[i:i + WRITE_CHUNK_SIZE]
+            
+            db.execute(delete(Forecast).where(Forecast.location_id.in_(chunk)))
+            
+            rows = []
+            for location_id in chunk:
+                entry = self.registry.get(location_id)
+                version = entry.version if entry else None
+                for offset, value in enumerate(results[location_id]):
+                    rows.append({
+                        "location_id": location_id,
+                        "date": horizon_start + timedelta(days=offset),
+                        "predicted_customers": int(value),
+                        "model_version": version,
+                        "generated_at": generated_at
+                    })
+            
+            if rows:
+                db.execute(insert(Forecast), rows)
+            db.commit()
+            total += len(rows)
+        
+        return total
+    
+    def run(self, days: int = 30) -> Dict[str, Any]:
+        """Барча локациялар учун прогноз ҳисоблаш ва сақлаш"""
+        started = time.perf_counter()
+        generated_at = datetime.utcnow()
+        horizon_start = datetime.combine(generated_at.date(), datetime.min.time())
+        
+        self.registry.load()
+        
+        db = SessionLocal()
+        try:
+            histories = self._load_histories(db, generated_at)
+            results: Dict[int, np.ndarray] = {}
+            
+            # Янги моделлар учун прогноз жорий процессда ҳисобланади
+            to_train: List[int] = []
+            for location_id, history in histories.items():
+                if self.registry.is_current(location_id, history["signature"]):
+                    _, X = build_forecast_features(horizon_start, days, history["counts"])
+                    model = self.registry.get(location_id).model
+                    results[location_id] = np.maximum(model.predict(X), 0).astype(int)
+                else:
+                    to_train.append(location_id)
+            
+            # Эскирган моделлар процесс пулида параллел ўқитилади
+            if to_train:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = [
+                        pool.submit(
+                            _fit_and_forecast,
+                            location_id,
+                            histories[location_id]["dates"],
+                            histories[location_id]["counts"],
+                            horizon_start,
+                            days
+                        )
+                        for location_id in to_train
+                    ]
+                    
+                    for future in futures:
+                        try:
+                            location_id, model, predicted = future.result()
+                        except Exception as e:
+                            logger.error(f"Локация прогнозида хатолик: {e}", exc_info=True)
+                            continue
+                        
+                        history = histories[location_id]
+                        dates = history["dates"]
+                        self.registry.put(ModelEntry(
+                            location_id=location_id,
+                            model=model,
+                            window_start=pd.Timestamp(dates[0]).to_pydatetime(),
+                            window_end=pd.Timestamp(dates[-1]).to_pydatetime(),
+                            row_count=len(dates),
+                            data_signature=history["signature"]
+                        ))
+                        results[location_id] = predicted
+            
+            forecast_rows = self._write_forecasts(db, results, horizon_start, generated_at)
+        
+        finally:
+            db.close()
+        
+        elapsed = time.perf_counter() - started
+        report = {
+            "locations": len(results),
+            "trained": len(to_train),
+            "forecast_rows": forecast_rows,
+            "days": days,
+            "elapsed_seconds": round(elapsed, 3),
+            "locations_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+            "generated_at": generated_at.isoformat()
+        }
+        logger.info(
+            f"Тунги прогноз тугади: {report['locations']} локация, "
+            f"{report['trained']} та модел ўқитилди, "
+            f"{report['locations_per_second']} локация/сек"
+        )
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Барча локациялар учун тунги прогноз")
+    parser.add_argument("--days", type=int, default=30, help="Прогноз горизонти (кун)")
+    parser.add_argument("--workers", type=int, default=None, help="Процесслар сони")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    print(ForecastBatchService(max_workers=args.workers).run(args.days))
@@ -1,41 +1,301 @@
 """
 Интеграция сервиси
 Ташқи API билан ишлаш (Солиқ, ККТ, MyGov)
+
+Барча интеграцияларни синхронлаш:
+    python -m app.services.integration_service --kind tax
 """
+import argparse
+import asyncio
+import importlib.util
+import json
+import time
 import httpx
-from typing import Dict, Any, Optional, List
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import logging
+from sqlalchemy import and_, func, update
 
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
+from app.core.data_versions import data_versions
 from app.core.database import SessionLocal
+from app.core.rate_limit import HostRateLimiter, backoff_delay
 from app.models.integration import TaxIntegration, KKTIntegration
 from app.models.analytics import Analytics
+from app.services.daily_stats_service import ReceiptTotals, increment_daily_stats_many, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Қайта уриниладиган HTTP жавоблари
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Битта bulk UPDATE'даги интеграциялар сони
+SYNC_WRITE_CHUNK_SIZE = 500
+
+# Ҳар бир ташқи API учун уланишлар пули
+# Солиқ ва ККТ'га синхронлаш тўлқинлари келади - бутун пул keepalive'да сақланади
+UPSTREAM_POOLS = {
+    "tax": {"max_connections": 100, "max_keepalive_connections": 100},
+    "mygov": {"max_connections": 20, "max_keepalive_connections": 10},
+    "kkt": {"max_connections": 100, "max_keepalive_connections": 100}
+}
+
+
+class ConnectionStats:
+    """Уланишлардан қайта фойдаланиш статистикаси (httpx trace extension орқали)"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+    
+    async def trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0
+        }
+
 
 class IntegrationService:
     """Интеграция сервиси"""
     
-    def __init__(self):
-        """Инициализация"""
-        self.tax_client = httpx.AsyncClient(
-            base_url=settings.TAX_API_URL,
-            headers={"Authorization": f"Bearer {settings.TAX_API_KEY}"},
-            timeout=30.0
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Инициализация
+        transport - тест учун (масалан, httpx.MockTransport)
+        """
+        self.transport = transport
+        self.http2 = settings.INTEGRATION_HTTP2
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 учун h2 пакети ўрнатилмаган, HTTP/1.1 ишлатилади")
+            self.http2 = False
+        
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats = {name: ConnectionStats() for name in UPSTREAM_POOLS}
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_rate=settings.CIRCUIT_FAILURE_RATE,
+                min_requests=settings.CIRCUIT_MIN_REQUESTS,
+                window=settings.CIRCUIT_WINDOW,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT
+            )
+            for name in UPSTREAM_POOLS
+        }
+        # Идемпотент GET жавоблари учун қисқа кэш (бир хил параллел сўровлар ҳам бирлашади)
+        self.response_cache = TTLCache(settings.INTEGRATION_CACHE_TTL)
+        self.rate_limiter = HostRateLimiter(
+            settings.INTEGRATION_RATE_LIMIT,
+            settings.INTEGRATION_RATE_BURST
         )
-        self.mygov_client = httpx.AsyncClient(
-            base_url=settings.MYGOV_API_URL,
-            headers={"Authorization": f"Bearer {settings.MYGOV_API_KEY}"},
-            timeout=30.0
+        self.open()
+        logger.info("Integration сервис инициализация қилинди")
+    
+    def _upstreams(self) -> Dict[str, Tuple[str, str]]:
+        return {
+            "tax": (settings.TAX_API_URL, settings.TAX_API_KEY),
+            "mygov": (settings.MYGOV_API_URL, settings.MYGOV_API_KEY),
+            "kkt": (settings.KKT_API_URL, settings.KKT_API_KEY)
+        }
+    
+    def _build_client(self, name: str, base_url: str, api_key: str) -> httpx.AsyncClient:
+        pool = UPSTREAM_POOLS[name]
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(
+                settings.INTEGRATION_TIMEOUT,
+                connect=settings.INTEGRATION_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=pool["max_connections"],
+                max_keepalive_connections=pool["max_keepalive_connections"],
+                keepalive_expiry=settings.INTEGRATION_KEEPALIVE_EXPIRY
+            ),
+            http2=self.http2,
+            transport=self.transport
         )
-        self.kkt_client = httpx.AsyncClient(
-            base_url=settings.KKT_API_URL,
-            headers={"Authorization": f"Bearer {settings.KKT_API_KEY}"},
-            timeout=30.0
+    
+    def open(self):
+        """HTTP клиентларини яратиш (ёпилганлари қайта яратилади)"""
+        for name, (base_url, api_key) in self._upstreams().items():
+            client = self.clients.get(name)
+            if client is None or client.is_closed:
+                self.clients[name] = self._build_client(name, base_url, api_key)
+    
+    async def close(self):
+        """HTTP клиентларини ёпиш (keepalive уланишлари ҳам ёпилади)"""
+        clients, self.clients = list(self.clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients))
+    
+    @property
+    def tax_client(self) -> httpx.AsyncClient:
+        return self.clients["tax"]
+    
+    @property
+    def mygov_client(self) -> httpx.AsyncClient:
+        return self.clients["mygov"]
+    
+    @property
+    def kkt_client(self) -> httpx.AsyncClient:
+        return self.clients["kkt"]
+    
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Ташқи API'лар бўйича уланишлардан қайта фойдаланиш ва circuit ҳолати"""
+        return {
+            name: {**stats.snapshot(), "circuit": self.breakers[name].snapshot()}
+            for name, stats in self.stats.items()
+        }
+    
+    async def _request(
+        self,
+        upstream: str,
+        path: str,
+        params: Dict[str, Any],
+        label: str,
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Ташқи API га GET сўров (200 жавоб қайтарилади)
+        Хост бўйича тезлик чеклови, 429/5xx ва тармоқ хатоларида jitter'ли қайта уриниш
+        Upstream хатоликлари кўп бўлса circuit breaker дарҳол CircuitOpenError беради
+        stream=True бўлса жавоб танаси ўқилмайди - чақирувчи aclose() қилиши керак
+        """
+        client = self.clients[upstream]
+        stats = self.stats[upstream]
+        breaker = self.breakers[upstream]
+        host = client.base_url.host
+        attempts = settings.INTEGRATION_MAX_RETRIES + 1
+        
+        for attempt in range(attempts):
+            breaker.before_call()
+            await self.rate_limiter.acquire(host)
+            try:
+                request = client.build_request(
+                    "GET",
+                    path,
+                    params=params,
+                    headers=headers,
+                    extensions={"trace": stats.trace}
+                )
+                stats.requests += 1
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                error: Exception = e
+            else:
+                # 4xx - upstream соғлом, хато сўровда
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                
+                if response.status_code == 200:
+                    return response
+                
+                await response.aclose()
+                error = ValueError(f"{label} API хатолиги: {response.status_code}")
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+            
+            if attempt + 1 < attempts:
+                await asyncio.sleep(backoff_delay(attempt, settings.INTEGRATION_RETRY_BACKOFF))
+        
+        raise error
+    
+    async def _get_json(
+        self,
+        upstream: str,
+        path: str,
+        params: Dict[str, Any],
+        label: str
+    ) -> Dict[str, Any]:
+        """
+        Идемпотент GET (INTEGRATION_CACHE_TTL давомида кэшланади)
+        Калит (upstream, path, params) - турли параметрли сўровлар бир-бирининг жавобини олмайди
+        """
+        async def fetch() -> Dict[str, Any]:
+            response = await self._request(upstream, path, params, label)
+            return response.json()
+        
+        key = (upstream, path, tuple(sorted((name, str(value)) for name, value in params.items())))
+        return await self.response_cache.get_or_compute(key, fetch)
+    
+    async def _fetch_tax(self, tax_id: str) -> Dict[str, Any]:
+        """Солиқ API: охирги 30 кунлик тушум"""
+        # Ойна охири кэш муддатига яхлитланади - бир хил сўровлар бир хил калитга тушади
+        ttl = max(settings.INTEGRATION_CACHE_TTL, 1)
+        now = datetime.utcfromtimestamp(int(time.time()) // ttl * ttl)
+        return await self._get_json(
+            "tax",
+            f"/api/tax/revenue/{tax_id}",
+            {
+                "start_date": (now - timedelta(days=30)).isoformat(),
+                "end_date": now.isoformat()
+            },
+            "Солиқ"
         )
-        logger.info("Integration сервис инициализация қилинди")
+    
+    async def _fetch_kkt_receipts(
+        self,
+        kkt_serial: str,
+        after_id: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> ReceiptTotals:
+        """
+        ККТ API: курсордан кейинги янги чеклар
+        Саҳифалар NDJSON (ҳар қаторда битта чек) сифатида оқимда ўқилади
+        ва кунлар бўйича йиғилади - хотирага бутун жавоб юкланмайди
+        """
+        page_size = settings.KKT_PAGE_SIZE
+        params: Dict[str, Any] = {"limit": page_size}
+        if after_id is not None:
+            params["after_id"] = after_id
+        else:
+            start = since or datetime.utcnow() - timedelta(days=settings.KKT_INITIAL_SYNC_DAYS)
+            params["start_date"] = start.isoformat()
+        
+        totals = ReceiptTotals()
+        while True:
+            response = await self._request(
+                "kkt",
+                f"/api/kkt/receipts/{kkt_serial}",
+                params,
+                "ККТ",
+                stream=True,
+                headers={"Accept": "application/x-ndjson"}
+            )
+            received = 0
+            try:
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    receipt = json.loads(line)
+                    totals.add(
+                        str(receipt["id"]),
+                        parse_timestamp(receipt["timestamp"]),
+                        float(receipt.get("amount", 0.0))
+                    )
+                    received += 1
+            finally:
+                await response.aclose()
+            
+            if received < page_size:
+                return totals
+            params = {"limit": page_size, "after_id": totals.last_id}
     
     async def sync_tax_data(
         self,
@@ -46,55 +306,51 @@ class IntegrationService:
         Солиқ маълумотларини синхронлаш
         """
         try:
-            db = SessionLocal()
-            
             # Солиқ API дан маълумот олиш
-            response = await self.tax_client.get(
-                f"/api/tax/revenue/{tax_id}",
-                params={
-                    "start_date": (datetime.utcnow() - timedelta(days=30)).isoformat(),
-                    "end_date": datetime.utcnow().isoformat()
-                }
-            )
-            
-            if response.status_code != 200:
-                raise ValueError(f"Солиқ API хатолиги: {response.status_code}")
-            
-            data = response.json()
-            
-            # Базага сақлаш
-            integration = db.query(TaxIntegration).filter(
-                TaxIntegration.location_id == location_id
-            ).first()
-            
-            if not integration:
-                integration = TaxIntegration(
-                    location_id=location_id,
-                    tax_id=tax_id
-                )
-                db.add(integration)
-            
-            integration.reported_revenue = data.get("reported_revenue", 0.0)
-            integration.tax_paid = data.get("tax_paid", 0.0)
-            integration.last_sync = datetime.utcnow()
-            integration.sync_status = "success"
-            
-            db.commit()
+            # Сессия жавоб келгандан кейин очилади - секин upstream база пулини банд қилмайди
+            data = await self._fetch_tax(tax_id)
             
-            # Аналитикани янгилаш
-            await self._update_analytics(location_id, integration.reported_revenue, db)
-            
-            db.close()
+            db = SessionLocal()
+            try:
+                # Базага сақлаш
+                integration = db.query(TaxIntegration).filter(
+                    TaxIntegration.location_id == location_id
+                ).first()
+                
+                if not integration:
+                    integration = TaxIntegration(
+                        location_id=location_id,
+                        tax_id=tax_id
+                    )
+                    db.add(integration)
+                
+                integration.reported_revenue = data.get("reported_revenue", 0.0)
+                integration.tax_paid = data.get("tax_paid", 0.0)
+                integration.last_sync = datetime.utcnow()
+                integration.sync_status = "success"
+                integration.error_message = None
+                
+                result = {
+                    "success": True,
+                    "location_id": location_id,
+                    "reported_revenue": integration.reported_revenue,
+                    "tax_paid": integration.tax_paid,
+                    "last_sync": integration.last_sync.isoformat()
+                }
+                
+                db.commit()
+                
+                # Аналитикани янгилаш
+                await self._update_analytics(location_id, result["reported_revenue"], db)
+            finally:
+                db.close()
             
-            return {
-                "success": True,
-                "location_id": location_id,
-                "reported_revenue": integration.reported_revenue,
-                "tax_paid": integration.tax_paid,
-                "last_sync": integration.last_sync.isoformat()
-            }
+            return result
         
         except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"Солиқ маълумотларини синхронлашда хатолик: {e}")
+                return {"success": False, "error": str(e)}
             logger.error(f"Солиқ маълумотларини синхронлашда хатолик: {e}", exc_info=True)
             
             # Хатоликни сақлаш
@@ -125,51 +381,51 @@ class IntegrationService:
         ККТ маълумотларини синхронлаш
         """
         try:
-            db = SessionLocal()
-            
-            # ККТ API дан маълумот олиш
-            response = await self.kkt_client.get(
-                f"/api/kkt/receipts/{kkt_serial}",
-                params={
-                    "start_date": (datetime.utcnow() - timedelta(days=7)).isoformat(),
-                    "end_date": datetime.utcnow().isoformat()
-                }
-            )
-            
-            if response.status_code != 200:
-                raise ValueError(f"ККТ API хатолиги: {response.status_code}")
-            
-            data = response.json()
-            
-            # Базага сақлаш
-            integration = db.query(KKTIntegration).filter(
-                KKTIntegration.location_id == location_id
-            ).first()
-            
-            if not integration:
-                integration = KKTIntegration(
-                    location_id=location_id,
-                    kkt_serial=kkt_serial
-                )
-                db.add(integration)
+            cursor = self._load_kkt_cursor(location_id)
             
-            integration.total_receipts = data.get("total_receipts", 0)
-            integration.total_amount = data.get("total_amount", 0.0)
-            integration.last_sync = datetime.utcnow()
-            integration.sync_status = "success"
-            
-            db.commit()
-            db.close()
+            # ККТ API дан фақат янги чекларни олиш (база сессиясисиз)
+            totals = await self._fetch_kkt_receipts(kkt_serial, *cursor)
             
-            return {
-                "success": True,
-                "location_id": location_id,
-                "total_receipts": integration.total_receipts,
-                "total_amount": integration.total_amount,
-                "last_sync": integration.last_sync.isoformat()
-            }
+            db = SessionLocal()
+            try:
+                integration_id = db.query(KKTIntegration.id).filter(
+                    KKTIntegration.location_id == location_id
+                ).scalar()
+                
+                if integration_id is None:
+                    integration = KKTIntegration(
+                        location_id=location_id,
+                        kkt_serial=kkt_serial
+                    )
+                    db.add(integration)
+                    db.flush()
+                    integration_id = integration.id
+                
+                # Базага сақлаш: курсор солиштириб сурилади, жамғарма ва кунлик агрегатлар шу транзакцияда
+                moved = self._move_kkt_cursor(db, integration_id, location_id, cursor, totals, datetime.utcnow())
+                db.commit()
+                if moved:
+                    data_versions.bump(KKTIntegration.__tablename__, location_id)
+                else:
+                    # Бошқа синхронлаш курсорни суриб улгурди - чеклар икки марта қўшилмайди
+                    logger.info(f"ККТ курсори ўзгарди, натижа ташланди: location_id={location_id}")
+                
+                integration = db.get(KKTIntegration, integration_id)
+                return {
+                    "success": True,
+                    "location_id": location_id,
+                    "new_receipts": totals.count if moved else 0,
+                    "total_receipts": integration.total_receipts,
+                    "total_amount": integration.total_amount,
+                    "last_sync": integration.last_sync.isoformat() if integration.last_sync else None
+                }
+            finally:
+                db.close()
         
         except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"ККТ маълумотларини синхронлашда хатолик: {e}")
+                return {"success": False, "error": str(e)}
             logger.error(f"ККТ маълумотларини синхронлашда хатолик: {e}", exc_info=True)
             
             db = SessionLocal()
@@ -190,6 +446,58 @@ class IntegrationService:
                 "error": str(e)
             }
     
+    def _move_kkt_cursor(
+        self,
+        db,
+        integration_id: int,
+        location_id: int,
+        cursor: Tuple[Optional[str], Optional[datetime]],
+        totals: ReceiptTotals,
+        now: datetime
+    ) -> bool:
+        """
+        Курсорни солиштириб суриш (compare-and-set) ва чекларни жамғармаларга қўшиш
+        UPDATE фақат курсор ўқилгандан бери ўзгармаган бўлса мос келади - параллел синхронлашлардан
+        биттаси ютади; кунлик агрегатлар фақат шу ҳолда оширилади
+        """
+        cursor_id, cursor_at = cursor
+        table = KKTIntegration.__table__
+        result = db.execute(
+            update(table).where(
+                table.c.id == integration_id,
+                table.c.last_receipt_id.is_not_distinct_from(cursor_id),
+                table.c.last_receipt_at.is_not_distinct_from(cursor_at)
+            ).values(
+                total_receipts=func.coalesce(table.c.total_receipts, 0) + totals.count,
+                total_amount=func.coalesce(table.c.total_amount, 0.0) + totals.amount,
+                last_receipt_id=totals.last_id if totals.last_id is not None else cursor_id,
+                last_receipt_at=max(filter(None, [cursor_at, totals.last_at]), default=None),
+                last_sync=now,
+                sync_status="success",
+                error_message=None,
+                updated_at=now
+            )
+        )
+        if result.rowcount != 1:
+            return False
+        
+        increment_daily_stats_many(db, totals.daily_rows(location_id), ["kkt_receipts", "kkt_amount"])
+        return True
+    
+    def _load_kkt_cursor(self, location_id: int) -> Tuple[Optional[str], Optional[datetime]]:
+        """ККТ курсори (қисқа сессияда ўқилади)"""
+        db = SessionLocal()
+        try:
+            row = db.query(
+                KKTIntegration.last_receipt_id,
+                KKTIntegration.last_receipt_at
+            ).filter(
+                KKTIntegration.location_id == location_id
+            ).first()
+            return tuple(row) if row else (None, None)
+        finally:
+            db.close()
+    
     async def _update_analytics(
         self,
         location_id: int,
@@ -216,3 +524,245 @@ class IntegrationService:
         
         except Exception as e:
             logger.error(f"Аналитикани янгилашда хатолик: {e}")
+    
+    async def sync_fleet(
+        self,
+        kind: str,
+        location_ids: Optional[List[int]] = None,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Барча интеграцияларни параллел синхронлаш
+        kind: "tax" ёки "kkt"; натижалар bulk UPDATE билан ёзилади
+        """
+        if kind not in ("tax", "kkt"):
+            raise ValueError(f"Нотўғри интеграция тури: {kind}")
+        
+        started = time.perf_counter()
+        if kind == "tax":
+            model, fetch, write = TaxIntegration, self._fetch_tax, self._write_tax_results
+            columns = [TaxIntegration.tax_id]
+        else:
+            model, fetch = KKTIntegration, self._fetch_kkt_receipts
+            columns = [
+                KKTIntegration.kkt_serial,
+                KKTIntegration.last_receipt_id,
+                KKTIntegration.last_receipt_at
+            ]
+        
+        targets = await asyncio.to_thread(self._load_targets, model, columns, location_ids)
+        if kind == "kkt":
+            # Юклаш пайтидаги курсорлар - ёзишда бошқа синхронлаш уларни сурмаганлиги текширилади
+            cursors = {target[0]: (target[3], target[4]) for target in targets}
+            write = partial(self._write_kkt_results, cursors=cursors)
+        semaphore = asyncio.Semaphore(concurrency or settings.INTEGRATION_SYNC_CONCURRENCY)
+        
+        async def sync_one(target: Tuple) -> Tuple[int, int, Any, Optional[str]]:
+            integration_id, location_id, *args = target
+            async with semaphore:
+                try:
+                    return integration_id, location_id, await fetch(*args), None
+                except Exception as e:
+                    return integration_id, location_id, None, str(e) or type(e).__name__
+        
+        succeeded = failed = 0
+        
+        async def flush(results: List[Tuple[int, int, Any, Optional[str]]]):
+            nonlocal succeeded, failed
+            tables = await asyncio.to_thread(write, results)
+            # Bulk UPDATE ORM ҳодисаларини чақирмайди - версияларни қўлда ошириш
+            for table, location_id in tables:
+                data_versions.bump(table, location_id)
+            ok = sum(1 for result in results if result[3] is None)
+            succeeded += ok
+            failed += len(results) - ok
+        
+        buffer = []
+        for future in asyncio.as_completed([sync_one(target) for target in targets]):
+            buffer.append(await future)
+            if len(buffer) >= SYNC_WRITE_CHUNK_SIZE:
+                await flush(buffer)
+                buffer = []
+        if buffer:
+            await flush(buffer)
+        
+        elapsed = time.perf_counter() - started
+        report = {
+            "kind": kind,
+            "integrations": len(targets),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "syncs_per_second": round(len(targets) / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        logger.info(
+            f"Интеграция синхронизацияси ({kind}) тугади: {succeeded} муваффақиятли, "
+            f"{failed} хатолик, {report['syncs_per_second']} та/сек"
+        )
+        return report
+    
+    def _load_targets(
+        self,
+        model,
+        columns: List[Any],
+        location_ids: Optional[List[int]]
+    ) -> List[Tuple]:
+        """(id, location_id, *columns) қаторлари"""
+        db = SessionLocal()
+        try:
+            query = db.query(model.id, model.location_id, *columns)
+            if location_ids is not None:
+                query = query.filter(model.location_id.in_(location_ids))
+            return [tuple(row) for row in query.all()]
+        finally:
+            db.close()
+    
+    def _write_errors(
+        self,
+        db,
+        model,
+        results: List[Tuple[int, int, Any, Optional[str]]],
+        now: datetime
+    ):
+        """Хатолик билан тугаган интеграцияларни bulk UPDATE"""
+        errors = [
+            {
+                "id": integration_id,
+                "sync_status": "error",
+                "error_message": error,
+                "updated_at": now
+            }
+            for integration_id, _, _, error in results if error is not None
+        ]
+        if errors:
+            db.execute(update(model), errors)
+    
+    def _write_tax_results(self, results) -> List[Tuple[str, int]]:
+        """Солиқ натижаларини ёзиш ва сўнгги аналитикани янгилаш"""
+        now = datetime.utcnow()
+        revenues = {
+            location_id: float(data.get("reported_revenue", 0.0))
+            for _, location_id, data, error in results if error is None
+        }
+        
+        rows = [
+            {
+                "id": integration_id,
+                "reported_revenue": data.get("reported_revenue", 0.0),
+                "tax_paid": data.get("tax_paid", 0.0),
+                "last_sync": now,
+                "sync_status": "success",
+                "error_message": None,
+                "updated_at": now
+            }
+            for integration_id, _, data, error in results if error is None
+        ]
+        
+        db = SessionLocal()
+        try:
+            if rows:
+                db.execute(update(TaxIntegration), rows)
+            self._write_errors(db, TaxIntegration, results, now)
+            updated = self._update_analytics_bulk(db, revenues)
+            db.commit()
+        finally:
+            db.close()
+        
+        return (
+            [(TaxIntegration.__tablename__, location_id) for location_id in revenues]
+            + [(Analytics.__tablename__, location_id) for location_id in updated]
+        )
+    
+    def _write_kkt_results(
+        self,
+        results,
+        cursors: Dict[int, Tuple[Optional[str], Optional[datetime]]]
+    ) -> List[Tuple[str, int]]:
+        """
+        ККТ натижаларини ёзиш
+        Ҳар бир қатор курсорни солиштириб суради; кунлик агрегатлар фақат курсори сурилган қаторлар учун оширилади
+        Якка синхронлашдагидек: курсор юклангандан бери ўзгарган бўлса натижа ташланади
+        """
+        now = datetime.utcnow()
+        
+        db = SessionLocal()
+        try:
+            fetched = [result for result in results if result[3] is None]
+            moved = [
+                location_id
+                for integration_id, location_id, totals, _ in fetched
+                if self._move_kkt_cursor(db, integration_id, location_id, cursors[integration_id], totals, now)
+            ]
+            if len(moved) < len(fetched):
+                # Бошқа синхронлаш курсорни суриб улгурди - чеклар икки марта қўшилмайди
+                logger.info(f"ККТ курсори ўзгарди, {len(fetched) - len(moved)} та натижа ташланди")
+            self._write_errors(db, KKTIntegration, results, now)
+            db.commit()
+        finally:
+            db.close()
+        
+        return [(KKTIntegration.__tablename__, location_id) for location_id in moved]
+    
+    def _update_analytics_bulk(self, db, revenues: Dict[int, float]) -> List[int]:
+        """Локацияларнинг сўнгги аналитикасини битта сўров ва bulk UPDATE билан янгилаш"""
+        if not revenues:
+            return []
+        
+        latest = db.query(
+            Analytics.location_id,
+            func.max(Analytics.date).label("max_date")
+        ).filter(
+            Analytics.location_id.in_(list(revenues))
+        ).group_by(Analytics.location_id).subquery()
+        
+        rows = []
+        updated = []
+        for analytics_id, location_id, estimated, percentage in db.query(
+            Analytics.id,
+            Analytics.location_id,
+            Analytics.estimated_revenue,
+            Analytics.discrepancy_percentage
+        ).join(
+            latest,
+            and_(
+                Analytics.location_id == latest.c.location_id,
+                Analytics.date == latest.c.max_date
+            )
+        ).all():
+            reported = revenues[location_id]
+            discrepancy = (estimated or 0.0) - reported
+            rows.append({
+                "id": analytics_id,
+                "reported_revenue": reported,
+                "discrepancy": discrepancy,
+                "discrepancy_percentage": (
+                    discrepancy / reported * 100 if reported > 0 else percentage
+                )
+            })
+            updated.append(location_id)
+        
+        if rows:
+            db.execute(update(Analytics), rows)
+        return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Солиқ/ККТ интеграцияларини синхронлаш")
+    parser.add_argument("--kind", choices=["tax", "kkt", "all"], default="all", help="Интеграция тури")
+    parser.add_argument("--concurrency", type=int, default=None, help="Параллел сўровлар сони")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    async def main():
+        service = IntegrationService()
+        try:
+            kinds = ["tax", "kkt"] if args.kind == "all" else [args.kind]
+            return [await service.sync_fleet(kind, concurrency=args.concurrency) for kind in kinds]
+        finally:
+            await service.close()
+    
+    print(asyncio.run(main()))
@@ -0,0 +1,341 @@
+"""
+ККТ чекларини push орқали қабул қилиш сервиси
+NDJSON ёки JSON массив (gzip бўлиши мумкин) оқимда ўқилади,
+чеклар (kkt_serial, receipt_id) бўйича такрорланмайди ва кунлик агрегатларга қўшилади
+"""
+import asyncio
+import codecs
+import json
+import logging
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import DateTime, bindparam, func, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.data_versions import data_versions
+from app.core.database import SessionLocal
+from app.models.integration import KKTIntegration, KKTReceipt
+from app.schemas.integration import KKTReceiptIn
+from app.services.daily_stats_service import ReceiptTotals, increment_daily_stats_many, to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+# Битта ёзиш қадамидаги чеклар сони (битта SELECT + bulk INSERT)
+INGEST_CHUNK_SIZE = 1000
+
+# gzip'ни очишда бир марталик чиқиш ҳажми
+GUNZIP_STEP = 64 * 1024
+
+# Жавобда қайтариладиган валидация хатолари сони
+MAX_REPORTED_ERRORS = 10
+
+_decoder = json.JSONDecoder()
+
+
+class IngestError(ValueError):
+    """Нотўғри формат ёки ҳажм"""
+    pass
+
+
+async def limit_size(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise IngestError(f"Сўров ҳажми {max_bytes} байтдан ошди")
+        yield chunk
+
+
+async def gunzip(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """gzip оқимини очиш (очилган ҳажм чекланган - gzip bomb'дан ҳимоя)"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    total = 0
+    
+    async for chunk in chunks:
+        data = chunk
+        while data:
+            try:
+                output = decompressor.decompress(data, GUNZIP_STEP)
+            except zlib.error as e:
+                raise IngestError(f"Нотўғри gzip: {e}")
+            total += len(output)
+            if total > max_bytes:
+                raise IngestError(f"Очилган ҳажм {max_bytes} байтдан ошди")
+            if output:
+                yield output
+            data = decompressor.unconsumed_tail
+    
+    output = decompressor.flush()
+    if output:
+        yield output
+    if not decompressor.eof:
+        raise IngestError("gzip оқими тугалланмаган")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """NDJSON: ҳар қаторда битта JSON"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+    
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise IngestError(f"Нотўғри JSON қатор: {e}")
+
+
+def _parse_array(text: str, state: str, final: bool) -> Tuple[List[Any], str, str]:
+    """
+    JSON массивнинг тўлиқ келган элементларини ажратиш
+    state: start -> first/item -> sep -> end
+    """
+    items = []
+    pos = 0
+    length = len(text)
+    
+    while True:
+        while pos < length and text[pos] in " \t\r\n":
+            pos += 1
+        if pos >= length:
+            break
+        
+        char = text[pos]
+        if state == "start":
+            if char != "[":
+                raise IngestError("JSON массив кутилган")
+            pos += 1
+            state = "first"
+        elif state in ("first", "item"):
+            if char == "]" and state == "first":
+                pos += 1
+                state = "end"
+                continue
+            if char != "{":
+                raise IngestError("Массив элементи JSON объект бўлиши керак")
+            try:
+                item, pos = _decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if final:
+                    raise IngestError(f"Нотўғри JSON: {e}")
+                # Объект ҳали тўлиқ келмаган
+                break
+            items.append(item)
+            state = "sep"
+        elif state == "sep":
+            if char == ",":
+                state = "item"
+            elif char == "]":
+                state = "end"
+            else:
+                raise IngestError("Массивда ',' ёки ']' кутилган")
+            pos += 1
+        else:
+            raise IngestError("Массивдан кейин ортиқча маълумот")
+    
+    return items, text[pos:], state
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """JSON массив элементларини бутун массивни хотирага юкламасдан ўқиш"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    state = "start"
+    
+    try:
+        async for chunk in chunks:
+            text += decoder.decode(chunk)
+            items, text, state = _parse_array(text, state, final=False)
+            for item in items:
+                yield item
+        
+        text += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise IngestError(f"Нотўғри UTF-8: {e}")
+    
+    items, text, state = _parse_array(text, state, final=True)
+    for item in items:
+        yield item
+    if state != "end":
+        raise IngestError("JSON массив тугалланмаган")
+
+
+class KKTReceiptIngestor:
+    """ККТ чекларини қабул қилиш"""
+    
+    async def ingest(
+        self,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "",
+        content_encoding: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Чеклар оқимини қабул қилиш
+        Ҳар INGEST_CHUNK_SIZE чек алоҳида транзакцияда ёзилади - такрор юбориш хавфсиз
+        """
+        started = time.perf_counter()
+        max_bytes = settings.KKT_INGEST_MAX_BYTES
+        
+        if "gzip" in content_encoding.lower():
+            chunks = gunzip(chunks, max_bytes)
+        else:
+            chunks = limit_size(chunks, max_bytes)
+        
+        content_type = content_type.lower()
+        parser = iter_ndjson if "ndjson" in content_type or "jsonl" in content_type else iter_json_array
+        
+        report: Dict[str, Any] = {
+            "received": 0,
+            "stored": 0,
+            "duplicates": 0,
+            "unknown_devices": 0,
+            "invalid": 0,
+            "errors": []
+        }
+        batch: List[KKTReceiptIn] = []
+        
+        async for item in parser(chunks):
+            report["received"] += 1
+            try:
+                batch.append(KKTReceiptIn.model_validate(item))
+            except ValidationError as e:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({
+                        "index": report["received"] - 1,
+                        "error": e.errors(include_url=False, include_context=False)
+                    })
+                continue
+            
+            if len(batch) >= INGEST_CHUNK_SIZE:
+                await self._flush(batch, report)
+                batch = []
+        
+        if batch:
+            await self._flush(batch, report)
+        
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["receipts_per_second"] = round(report["received"] / elapsed, 2) if elapsed > 0 else 0.0
+        return report
+    
+    async def _flush(self, batch: List[KKTReceiptIn], report: Dict[str, Any]):
+        stored, duplicates, unknown, locations = await asyncio.to_thread(self._store, batch)
+        report["stored"] += stored
+        report["duplicates"] += duplicates
+        report["unknown_devices"] += unknown
+        
+        # Core INSERT/UPDATE ORM ҳодисаларини чақирмайди - версияларни қўлда ошириш
+        for location_id in locations:
+            data_versions.bump(KKTIntegration.__tablename__, location_id)
+    
+    def _store(self, batch: List[KKTReceiptIn]) -> Tuple[int, int, int, List[int]]:
+        """Янги чекларни ёзиш: битта SELECT (мавжудлари), bulk INSERT ва агрегатлар"""
+        unique: Dict[Tuple[str, str], KKTReceiptIn] = {}
+        for receipt in batch:
+            unique.setdefault((receipt.kkt_serial, receipt.id), receipt)
+        in_batch_duplicates = len(batch) - len(unique)
+        serials = list({serial for serial, _ in unique})
+        
+        db = SessionLocal()
+        try:
+            # Параллел юборилган бир хил чек UNIQUE'га урилса - қайта текшириб ёзиш
+            for attempt in range(2):
+                try:
+                    devices = dict(db.query(
+                        KKTIntegration.kkt_serial,
+                        KKTIntegration.location_id
+                    ).filter(KKTIntegration.kkt_serial.in_(serials)).all())
+                    
+                    # Иккала IN кесишмаси ортиқча жуфтлар бериши мумкин - фақат шу batch'дагилари
+                    existing = {
+                        tuple(row) for row in db.query(
+                            KKTReceipt.kkt_serial,
+                            KKTReceipt.receipt_id
+                        ).filter(
+                            KKTReceipt.kkt_serial.in_(serials),
+                            KKTReceipt.receipt_id.in_([receipt_id for _, receipt_id in unique])
+                        ).all()
+                    } & unique.keys()
+                    
+                    unknown = sum(1 for serial, _ in unique if serial not in devices)
+                    new = [
+                        receipt for key, receipt in unique.items()
+                        if receipt.kkt_serial in devices and key not in existing
+                    ]
+                    
+                    self._write(db, new, devices)
+                    db.commit()
+                    
+                    duplicates = in_batch_duplicates + len(existing)
+                    locations = list({devices[receipt.kkt_serial] for receipt in new})
+                    return len(new), duplicates, unknown, locations
+                
+                except IntegrityError:
+                    db.rollback()
+                    if attempt:
+                        raise
+        finally:
+            db.close()
+    
+    def _write(self, db, receipts: List[KKTReceiptIn], devices: Dict[str, int]):
+        if not receipts:
+            return
+        
+        now = datetime.utcnow()
+        rows = []
+        location_totals: Dict[int, ReceiptTotals] = defaultdict(ReceiptTotals)
+        device_totals: Dict[str, ReceiptTotals] = defaultdict(ReceiptTotals)
+        
+        for receipt in receipts:
+            timestamp = to_utc_naive(receipt.timestamp)
+            location_id = devices[receipt.kkt_serial]
+            rows.append({
+                "kkt_serial": receipt.kkt_serial,
+                "receipt_id": receipt.id,
+                "location_id": location_id,
+                "timestamp": timestamp,
+                "amount": receipt.amount,
+                "created_at": now
+            })
+            location_totals[location_id].add(receipt.id, timestamp, receipt.amount)
+            device_totals[receipt.kkt_serial].add(receipt.id, timestamp, receipt.amount)
+        
+        db.execute(insert(KKTReceipt), rows)
+        
+        increment_daily_stats_many(
+            db,
+            [row for location_id, totals in location_totals.items() for row in totals.daily_rows(location_id)],
+            ["kkt_receipts", "kkt_amount"]
+        )
+        
+        table = KKTIntegration.__table__
+        db.execute(
+            update(table).where(table.c.kkt_serial == bindparam("b_serial")).values(
+                total_receipts=func.coalesce(table.c.total_receipts, 0) + bindparam("b_receipts"),
+                total_amount=func.coalesce(table.c.total_amount, 0.0) + bindparam("b_amount"),
+                updated_at=bindparam("b_now", type_=DateTime)
+            ),
+            [
+                {"b_serial": serial, "b_receipts": totals.count, "b_amount": totals.amount, "b_now": now}
+                for serial, totals in device_totals.items()
+            ]
+        )
+
+
+# Глобал қабул қилувчи
+kkt_receipt_ingestor = KKTReceiptIngestor()
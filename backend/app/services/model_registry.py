@@ -0,0 +1,237 @@
+"""
+Моделлар реестри
+Ўқитилган моделларни дискда сақлаш, юклаш ва фонда қайта ўқитиш
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.core.lazy import lazy_import
+
+
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+joblib = lazy_import("joblib")
+
+logger = logging.getLogger(__name__)
+
+# Сақланган файл формати (хусусиятлар тўплами ўзгарса ошириш керак)
+REGISTRY_FORMAT_VERSION = 1
+
+
+@dataclass
+class ModelEntry:
+    """Реестрдаги модел ва унинг метамаълумотлари"""
+    location_id: int
+    model: Any
+    window_start: Optional[datetime]
+    window_end: Optional[datetime]
+    row_count: int
+    data_signature: Optional[tuple] = None
+    version: int = 0
+    trained_at: datetime = field(default_factory=datetime.utcnow)
+    format_version: int = REGISTRY_FORMAT_VERSION
+    
+    def metadata(self) -> Dict[str, Any]:
+        """API ва логлар учун метамаълумот"""
+        return {
+            "model_version": self.version,
+            "trained_at": self.trained_at.isoformat(),
+            "training_window": {
+                "start": self.window_start.isoformat() if self.window_start else None,
+                "end": self.window_end.isoformat() if self.window_end else None
+            },
+            "training_rows": self.row_count
+        }
+
+
+class ModelRegistry:
+    """
+    Моделлар реестри
+    Сўровлар фақат тайёр моделлардан хизмат олади, ўқитиш фонда бажарилади
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        directory: Path,
+        trainer: Callable[[int], Optional[ModelEntry]],
+        signatures: Callable[[], Dict[int, tuple]],
+        max_age_seconds: int,
+        max_concurrent_training: int = 2
+    ):
+        """
+        trainer - локация учун моделни ўқитади (синхрон, алоҳида потокда ишлайди)
+        signatures - барча локациялар учун жорий маълумот имзоси
+        max_concurrent_training - бир вақтда ўқитиладиган моделлар (қолганлари навбатда кутади)
+        """
+        self.name = name
+        self.directory = Path(directory)
+        self.max_age_seconds = max_age_seconds
+        self._trainer = trainer
+        self._signatures = signatures
+        self._entries: Dict[int, ModelEntry] = {}
+        self._stale: Set[int] = set()
+        self._training: Dict[int, asyncio.Task] = {}
+        self._training_slots = asyncio.Semaphore(max_concurrent_training)
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    def get(self, location_id: int) -> Optional[ModelEntry]:
+        """Тайёр моделни олиш (эскирган бўлса ҳам, янгиси тайёр бўлгунча)"""
+        return self._entries.get(location_id)
+    
+    def is_current(self, location_id: int, signature: tuple) -> bool:
+        """Модел берилган маълумот имзоси учун янгими"""
+        return not self._is_stale(self._entries.get(location_id), signature)
+    
+    def put(self, entry: ModelEntry):
+        """Ташқарида ўқитилган моделни реестрга қўшиш ва сақлаш (синхрон, batch учун)"""
+        self._next_version(entry)
+        self._save(entry)
+        self._register(entry)
+    
+    async def put_async(self, entry: ModelEntry):
+        """Моделни реестрга қўшиш (дискка ёзиш event loop'дан ташқарида)"""
+        self._next_version(entry)
+        await asyncio.to_thread(self._save, entry)
+        self._register(entry)
+    
+    def _next_version(self, entry: ModelEntry):
+        previous = self._entries.get(entry.location_id)
+        entry.version = previous.version + 1 if previous else 1
+    
+    def _register(self, entry: ModelEntry):
+        self._entries[entry.location_id] = entry
+        self._stale.discard(entry.location_id)
+    
+    def mark_stale(self, location_id: int):
+        """Янги маълумот келди - моделни фонда қайта ўқитиш"""
+        self._stale.add(location_id)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Event loop йўқ - навбатдаги refresh ўқитади
+            return
+        self.request_training(location_id)
+    
+    def request_training(self, location_id: int):
+        """Фон ўқитишни режалаштириш (бир локация учун битта вазифа)"""
+        task = self._training.get(location_id)
+        if task and not task.done():
+            return
+        self._training[location_id] = asyncio.create_task(self._train(location_id))
+    
+    async def _train(self, location_id: int):
+        """Моделни потокда ўқитиш ва реестрга қўшиш (бир вақтда max_concurrent_training та)"""
+        try:
+            async with self._training_slots:
+                entry = await asyncio.to_thread(self._trainer, location_id)
+                if entry is None:
+                    # Етарли маълумот йўқ - янги маълумот келгунча кутамиз
+                    self._stale.discard(location_id)
+                    return
+                
+                await self.put_async(entry)
+            logger.info(
+                f"{self.name} модели ўқитилди: локация {location_id}, "
+                f"версия {entry.version}, {entry.row_count} қатор"
+            )
+        
+        except Exception as e:
+            logger.error(f"{self.name} моделини ўқитишда хатолик: {e}", exc_info=True)
+        
+        finally:
+            self._training.pop(location_id, None)
+    
+    def _path(self, location_id: int) -> Path:
+        return self.directory / f"location_{location_id}.pkl"
+    
+    def _save(self, entry: ModelEntry):
+        """Моделни атомар равишда дискка ёзиш"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(entry.location_id)
+        tmp_path = path.with_suffix(".tmp")
+        joblib.dump(entry, tmp_path)
+        os.replace(tmp_path, path)
+    
+    def _read(self, path: Path) -> Optional[ModelEntry]:
+        """Дискдаги моделни ўқиш (йўқ, эски формат ёки бузилган файл - None)"""
+        if not path.exists():
+            return None
+        
+        try:
+            entry = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"{self.name} моделини юклаб бўлмади ({path}): {e}")
+            return None
+        
+        if getattr(entry, "format_version", None) != REGISTRY_FORMAT_VERSION:
+            logger.info(f"{self.name} модели эски форматда, қайта ўқитилади: {path}")
+            return None
+        
+        return entry
+    
+    def load(self) -> int:
+        """Ишга тушганда сақланган моделларни юклаш"""
+        if not self.directory.is_dir():
+            return 0
+        
+        for path in self.directory.glob("location_*.pkl"):
+            entry = self._read(path)
+            if entry is not None:
+                self._entries[entry.location_id] = entry
+        
+        return len(self._entries)
+    
+    def _is_stale(self, entry: Optional[ModelEntry], signature: tuple) -> bool:
+        if entry is None or entry.data_signature != signature:
+            return True
+        age = (datetime.utcnow() - entry.trained_at).total_seconds()
+        return age > self.max_age_seconds
+    
+    async def refresh(self):
+        """Маълумот имзоларини солиштириб эскирган моделларни қайта ўқитиш"""
+        signatures = await asyncio.to_thread(self._signatures)
+        
+        for location_id, signature in signatures.items():
+            if not self._is_stale(self._entries.get(location_id), signature):
+                continue
+            
+            # Бошқа процесс (масалан, тунги batch) сақлаган янги модел
+            disk_entry = await asyncio.to_thread(self._read, self._path(location_id))
+            if disk_entry is not None and not self._is_stale(disk_entry, signature):
+                self._entries[location_id] = disk_entry
+                self._stale.discard(location_id)
+                continue
+            
+            self._stale.add(location_id)
+        
+        for location_id in list(self._stale):
+            self.request_training(location_id)
+    
+    async def _refresh_loop(self, interval: int):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"{self.name} реестрини янгилашда хатолик: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+    
+    def start(self, interval: int):
+        """Фон янгилаш циклини ишга тушириш"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval))
+    
+    async def stop(self):
+        """Фон вазифаларини тўхтатиш"""
+        tasks = list(self._training.values())
+        if self._refresh_task is not None:
+            tasks.append(self._refresh_task)
+            self._refresh_task = None
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
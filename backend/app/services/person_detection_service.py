@@ -2,14 +2,18 @@
 Инсонларни аниқлаш сервиси
 Computer Vision - Person Detection
 """
-import cv2
 import numpy as np
-import onnxruntime as ort
 from typing import List, Dict, Any, Optional
 import logging
+import threading
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.lazy import lazy_import
+
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+cv2 = lazy_import("cv2")
+ort = lazy_import("onnxruntime")
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +28,17 @@ class PersonDetectionService:
         self.session = None
         self.input_name = None
         self.output_names = None
-        
-        # Моделни юклаш
-        self._load_model()
+        # Модел биринчи аниқлашда юкланади (ишга тушиш ва API worker'лар хотираси учун)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_model(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load_model()
+                self._loaded = True
     
     def _load_model(self):
         """ONNX моделни юклаш"""
@@ -50,6 +62,7 @@ class PersonDetectionService:
         """
         Кадрда инсонларни аниқлаш
         """
+        self._ensure_model()
         if self.session is None:
             # Fallback: OpenCV DNN
             return await self._detect_with_opencv(frame)
@@ -2,28 +2,254 @@
 Прогнозлаш сервиси
 Predictive Analytics модули
 """
-from typing import Dict, Any, List
+from __future__ import annotations
+
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
 import logging
+from pathlib import Path
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.data_versions import data_versions
 from app.core.database import SessionLocal
+from app.core.lazy import lazy_import
 from app.models.customer import CustomerFlow
-from app.models.analytics import Analytics
+from app.models.analytics import Analytics, Forecast
+from app.services.model_registry import ModelEntry, ModelRegistry
+
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
+# Ойналар (кунларда)
+TRAINING_WINDOW_DAYS = 90  # Охирги 3 ой
+MIN_HISTORY_DAYS = 7
+RECENT_WINDOW = 7
+MONTHLY_WINDOW = 30
+
+# Мавсумийлик омиллари (индекс = ой - 1)
+# Ўзбекистон учун: ёзда кўп, қишда кам
+SEASONALITY_FACTORS = np.array([
+    0.8,  # Январ
+    0.9,  # Феврал
+    1.0,  # Март
+    1.1,  # Апрел
+    1.2,  # Май
+    1.3,  # Июн
+    1.3,  # Июл
+    1.2,  # Август
+    1.1,  # Сентябр
+    1.0,  # Октябр
+    0.9,  # Ноябр
+    0.8   # Декабр
+])
+
+
+def build_feature_matrix(
+    dates: pd.DatetimeIndex,
+    recent_avg,
+    monthly_avg
+) -> np.ndarray:
+    """
+    Хусусиятлар матрицасини бир ўтишда қуриш
+    recent_avg ва monthly_avg скаляр ёки ҳар бир сана учун массив бўлиши мумкин
+    """
+    n = len(dates)
+    month = dates.month.to_numpy()
+    
+    return np.column_stack([
+        dates.dayofyear.to_numpy(),
+        dates.dayofweek.to_numpy(),
+        month,
+        np.broadcast_to(np.asarray(recent_avg, dtype=float), n),
+        np.broadcast_to(np.asarray(monthly_avg, dtype=float), n),
+        SEASONALITY_FACTORS[month - 1]
+    ]).astype(float)
+
+
+def flows_to_arrays(flows: List[CustomerFlow]) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """CustomerFlow рўйхатини саналар ва кунлик мижозлар массивига айлантириш"""
+    dates = pd.DatetimeIndex([f.date for f in flows])
+    counts = np.array([f.total_entered or 0 for f in flows], dtype=float)
+    return dates, counts
+
+
+def build_training_set(
+    dates: pd.DatetimeIndex,
+    counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ўқитиш тўпламини rolling ойналар билан O(n) да қуриш
+    i-қатор хусусиятлари фақат ундан олдинги кунлардан олинади (shift(1))
+    """
+    series = pd.Series(counts, dtype=float)
+    recent_avg = series.rolling(RECENT_WINDOW, min_periods=1).mean().shift(1).to_numpy()
+    monthly_avg = series.rolling(MONTHLY_WINDOW, min_periods=1).mean().shift(1).to_numpy()
+    
+    X = build_feature_matrix(
+        dates[RECENT_WINDOW:],
+        recent_avg[RECENT_WINDOW:],
+        monthly_avg[RECENT_WINDOW:]
+    )
+    y = np.asarray(counts[RECENT_WINDOW:], dtype=float)
+    return X, y
+
+
+def build_forecast_features(
+    start: datetime,
+    days: int,
+    counts: np.ndarray
+) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """Прогноз горизонти учун саналар ва хусусиятлар матрицаси"""
+    dates = pd.date_range(start, periods=max(days, 0), freq="D")
+    recent_avg = counts[-RECENT_WINDOW:].mean() if len(counts) else 0.0
+    monthly_avg = counts[-MONTHLY_WINDOW:].mean() if len(counts) else 0.0
+    return dates, build_feature_matrix(dates, recent_avg, monthly_avg)
+
+
+def fit_flow_model(dates: pd.DatetimeIndex, counts: np.ndarray):
+    """Моделни ўқитиш (тарих кам бўлса - ўртача модель)"""
+    X, y = build_training_set(dates, counts)
+    
+    if len(X) < 7:
+        # Содда модель (ўртача)
+        return MeanFlowModel(float(y.mean()) if len(y) else 0.0)
+    
+    # scikit-learn фақат ўқитишда керак - API импортини секинлаштирмаслик учун шу ерда
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    
+    # Linear Regression (скейлер predict вақтида ҳам қўлланади)
+    model = make_pipeline(StandardScaler(), LinearRegression())
+    model.fit(X, y)
+    return model
+
+
+class MeanFlowModel:
+    """Содда модель (ўртача) - тарих кам бўлганда"""
+    
+    def __init__(self, mean: float):
+        self.mean = mean
+    
+    def predict(self, X) -> np.ndarray:
+        return np.full(len(X), self.mean, dtype=float)
+
+
+def load_flow_history(
+    db: Session,
+    location_id: int,
+    end_date: datetime
+) -> List[CustomerFlow]:
+    """Ўқитиш ойнасидаги тарихий маълумотлар"""
+    return db.query(CustomerFlow).filter(
+        CustomerFlow.location_id == location_id,
+        CustomerFlow.date >= end_date - timedelta(days=TRAINING_WINDOW_DAYS),
+        CustomerFlow.date <= end_date
+    ).order_by(CustomerFlow.date).all()
+
+
+def flow_signature(flows: List[CustomerFlow]) -> tuple:
+    """Маълумот имзоси: қаторлар сони ва охирги ўзгариш вақти"""
+    updated = [f.updated_at for f in flows if f.updated_at]
+    return (len(flows), max(updated).isoformat() if updated else None)
+
+
+def train_location_model(location_id: int) -> Optional[ModelEntry]:
+    """Локация моделини ўқитиш (реестр фонда чақиради)"""
+    db = SessionLocal()
+    try:
+        flows = load_flow_history(db, location_id, datetime.utcnow())
+    finally:
+        db.close()
+    
+    if len(flows) < MIN_HISTORY_DAYS:
+        return None
+    
+    dates, counts = flows_to_arrays(flows)
+    return ModelEntry(
+        location_id=location_id,
+        model=fit_flow_model(dates, counts),
+        window_start=flows[0].date,
+        window_end=flows[-1].date,
+        row_count=len(flows),
+        data_signature=flow_signature(flows)
+    )
+
+
+def collect_flow_signatures() -> Dict[int, tuple]:
+    """Барча локациялар учун маълумот имзолари (битта GROUP BY сўров)"""
+    db = SessionLocal()
+    try:
+        end_date = datetime.utcnow()
+        rows = db.query(
+            CustomerFlow.location_id,
+            func.count(CustomerFlow.id),
+            func.max(CustomerFlow.updated_at)
+        ).filter(
+            CustomerFlow.date >= end_date - timedelta(days=TRAINING_WINDOW_DAYS),
+            CustomerFlow.date <= end_date
+        ).group_by(CustomerFlow.location_id).all()
+        
+        return {
+            location_id: (count, last_update.isoformat() if last_update else None)
+            for location_id, count, last_update in rows
+            if count >= MIN_HISTORY_DAYS
+        }
+    finally:
+        db.close()
+
+
+def build_predictive_model_registry() -> ModelRegistry:
+    """
+    Прогноз моделлари реестри
+    Илова ичида контейнер орқали битта нусха ("predictive_models") бўлишилади
+    """
+    return ModelRegistry(
+        name="predictive",
+        directory=Path(settings.AI_MODEL_PATH) / Path(settings.PREDICTIVE_MODEL).stem,
+        trainer=train_location_model,
+        signatures=collect_flow_signatures,
+        max_age_seconds=settings.MODEL_MAX_AGE,
+        max_concurrent_training=settings.MODEL_TRAINING_CONCURRENCY
+    )
+
+
+# Прогноз жавоби боғлиқ жадваллар
+FORECAST_TABLES = ("customer_flows", "analytics", "forecasts")
+
+
+def build_forecast_cache() -> TTLCache:
+    """
+    Прогноз жавоблари кэши: (location_id, days, data_version) -> жавоб
+    Локация маълумоти ўзгарганда унинг прогнозлари кэшдан ўчирилади
+    """
+    cache = TTLCache(ttl=settings.FORECAST_CACHE_TTL)
+    
+    def invalidate(table: str, location_id: int):
+        if table in FORECAST_TABLES:
+            cache.invalidate(lambda key: key[0] == location_id)
+    
+    data_versions.subscribe(invalidate)
+    return cache
+
 
 class PredictiveAnalyticsService:
     """Прогнозлаш сервиси"""
     
-    def __init__(self):
-        """Инициализация"""
-        self.models = {}  # location_id -> model
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        cache: Optional[TTLCache] = None
+    ):
+        """Инициализация (берилмаган реестр ва кэш янги яратилади)"""
+        self.registry = registry or build_predictive_model_registry()
+        self.cache = cache or build_forecast_cache()
         logger.info("Predictive Analytics сервис инициализация қилинди")
     
     async def get_predictions(
@@ -33,65 +259,74 @@ class PredictiveAnalyticsService:
     ) -> Dict[str, Any]:
         """
         Келгуси прогнозлар
+        Бир хил параллел сўровлар битта ҳисоблашни кутади, натижа TTL билан кэшланади
         """
+        key = (location_id, days, data_versions.get(location_id, *FORECAST_TABLES))
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._compute_predictions(location_id, days),
+            cache_if=lambda result: "error" not in result
+        )
+    
+    async def _compute_predictions(
+        self,
+        location_id: int,
+        days: int
+    ) -> Dict[str, Any]:
+        """Прогнозни ҳисоблаш (кэшсиз)"""
+        db = SessionLocal()
         try:
-            db = SessionLocal()
+            # Тунги batch ҳисоблаган прогноз бўлса, ундан фойдаланиш
+            stored = self._get_stored_forecast(location_id, days, db)
+            if stored:
+                predictions = [
+                    self._prediction_item(f.date, f.predicted_customers)
+                    for f in stored
+                ]
+                return {
+                    **await self._build_response(location_id, predictions, db),
+                    "source": "precomputed",
+                    "model_version": stored[0].model_version,
+                    "generated_at": stored[0].generated_at.isoformat()
+                }
             
             # Тарихий маълумотларни олиш
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=90)  # Охирги 3 ой
-            
-            historical_flows = db.query(CustomerFlow).filter(
-                CustomerFlow.location_id == location_id,
-                CustomerFlow.date >= start_date,
-                CustomerFlow.date <= end_date
-            ).order_by(CustomerFlow.date).all()
+            historical_flows = load_flow_history(db, location_id, datetime.utcnow())
             
-            if len(historical_flows) < 7:
+            if len(historical_flows) < MIN_HISTORY_DAYS:
                 return {
                     "error": "Етарли тарихий маълумот йўқ",
-                    "min_days_required": 7
+                    "min_days_required": MIN_HISTORY_DAYS
                 }
             
-            # Моделни яратиш ёки юклаш
-            model = await self._get_or_train_model(location_id, historical_flows)
-            
-            # Прогнозлар
-            predictions = []
-            current_date = datetime.utcnow()
-            
-            for i in range(days):
-                date = current_date + timedelta(days=i)
-                
-                # Хусусиятлар
-                features = self._extract_features(date, historical_flows)
-                
-                # Прогноз
-                prediction = model.predict([features])[0]
-                
-                predictions.append({
-                    "date": date.isoformat(),
-                    "predicted_customers": int(max(0, prediction)),
-                    "day_of_week": date.weekday(),
-                    "is_weekend": date.weekday() >= 5
-                })
+            # Фақат тайёр моделдан фойдаланиш, йўқ бўлса фонда ўқитиш
+            entry = self.registry.get(location_id)
+            if entry is None:
+                self.registry.request_training(location_id)
+                return {
+                    "error": "Модел тайёрланмоқда, кейинроқ қайта уриниб кўринг",
+                    "status": "training",
+                    "location_id": location_id
+                }
             
-            # Ойлик прогноз
-            monthly_prediction = sum(p["predicted_customers"] for p in predictions)
+            _, counts = flows_to_arrays(historical_flows)
             
-            # Солиқ тушуми прогнози
-            avg_check = await self._get_average_check(location_id, db)
-            predicted_revenue = monthly_prediction * avg_check
+            # Барча кунлар учун хусусиятлар матрицаси ва битта predict
+            dates, X = build_forecast_features(datetime.utcnow(), days, counts)
+            predicted = (
+                np.maximum(entry.model.predict(X), 0).astype(int)
+                if len(dates) else np.empty(0, dtype=int)
+            )
             
-            db.close()
+            predictions = [
+                self._prediction_item(date, value)
+                for date, value in zip(dates.to_pydatetime(), predicted)
+            ]
             
             return {
-                "location_id": location_id,
-                "predictions": predictions,
-                "monthly_customers": monthly_prediction,
-                "predicted_revenue": float(predicted_revenue),
-                "average_check": float(avg_check),
-                "confidence": 0.85  # Модел ишончлиги
+                **await self._build_response(location_id, predictions, db),
+                "source": "live",
+                **entry.metadata()
             }
         
         except Exception as e:
@@ -99,111 +334,62 @@ class PredictiveAnalyticsService:
             return {
                 "error": str(e)
             }
-    
-    def _extract_features(
-        self,
-        date: datetime,
-        historical_flows: List[CustomerFlow]
-    ) -> List[float]:
-        """Хусусиятларни чиқариш"""
-        # Кун номери (1-365)
-        day_of_year = date.timetuple().tm_yday
-        
-        # Ҳафта куни (0-6)
-        day_of_week = date.weekday()
-        
-        # Ой (1-12)
-        month = date.month
         
-        # Охирги 7 кундаги ўртача мижозлар
-        recent_avg = self._get_recent_average(historical_flows, 7)
-        
-        # Охирги 30 кундаги ўртача мижозлар
-        monthly_avg = self._get_recent_average(historical_flows, 30)
-        
-        # Мавсумийлик омили
-        seasonality = self._get_seasonality_factor(month)
-        
-        return [
-            day_of_year,
-            day_of_week,
-            month,
-            recent_avg,
-            monthly_avg,
-            seasonality
-        ]
-    
-    def _get_recent_average(
+        finally:
+            db.close()
+    
+    def _prediction_item(self, date: datetime, value: int) -> Dict[str, Any]:
+        """Битта кун прогнози"""
+        return {
+            "date": date.isoformat(),
+            "predicted_customers": int(value),
+            "day_of_week": date.weekday(),
+            "is_weekend": date.weekday() >= 5
+        }
+    
+    async def _build_response(
         self,
-        flows: List[CustomerFlow],
-        days: int
-    ) -> float:
-        """Охирги N кундаги ўртача"""
-        if not flows:
-            return 0.0
+        location_id: int,
+        predictions: List[Dict[str, Any]],
+        db: Session
+    ) -> Dict[str, Any]:
+        """Прогноз жавобини йиғиш"""
+        # Ойлик прогноз
+        monthly_prediction = sum(p["predicted_customers"] for p in predictions)
         
-        recent = flows[-days:] if len(flows) >= days else flows
-        if not recent:
-            return 0.0
+        # Солиқ тушуми прогнози
+        avg_check = await self._get_average_check(location_id, db)
+        predicted_revenue = monthly_prediction * avg_check
         
-        return np.mean([f.total_entered for f in recent])
-    
-    def _get_seasonality_factor(self, month: int) -> float:
-        """Мавсумийлик омили"""
-        # Ўзбекистон учун: ёзда кўп, қишда кам
-        factors = {
-            1: 0.8,   # Январ
-            2: 0.9,   # Феврал
-            3: 1.0,   # Март
-            4: 1.1,   # Апрел
-            5: 1.2,   # Май
-            6: 1.3,   # Июн
-            7: 1.3,   # Июл
-            8: 1.2,   # Август
-            9: 1.1,   # Сентябр
-            10: 1.0,  # Октябр
-            11: 0.9,  # Ноябр
-            12: 0.8   # Декабр
+        return {
+            "location_id": location_id,
+            "predictions": predictions,
+            "monthly_customers": monthly_prediction,
+            "predicted_revenue": float(predicted_revenue),
+            "average_check": float(avg_check),
+            "confidence": 0.85  # Модел ишончлиги
         }
-        return factors.get(month, 1.0)
     
-    async def _get_or_train_model(
+    def _get_stored_forecast(
         self,
         location_id: int,
-        historical_flows: List[CustomerFlow]
-    ):
-        """Моделни олиш ёки ўқитиш"""
-        if location_id in self.models:
-            return self.models[location_id]
-        
-        # Моделни ўқитиш
-        X = []
-        y = []
+        days: int,
+        db: Session
+    ) -> Optional[List[Forecast]]:
+        """Олдиндан ҳисобланган прогноз (етарли кун ва муддати ўтмаган бўлса)"""
+        if days <= 0:
+            return None
         
-        for i in range(7, len(historical_flows)):
-            date = historical_flows[i].date
-            features = self._extract_features(date, historical_flows[:i])
-            X.append(features)
-            y.append(historical_flows[i].total_entered)
+        now = datetime.utcnow()
+        today = datetime.combine(now.date(), datetime.min.time())
         
-        if len(X) < 7:
-            # Содда модель (ўртача)
-            class SimpleModel:
-                def predict(self, X):
-                    return [np.mean(y) if y else 0.0]
-            
-            model = SimpleModel()
-        else:
-            # Linear Regression
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
-            model = LinearRegression()
-            model.fit(X_scaled, y)
-            model.scaler = scaler
+        stored = db.query(Forecast).filter(
+            Forecast.location_id == location_id,
+            Forecast.date >= today,
+            Forecast.generated_at >= now - timedelta(seconds=settings.FORECAST_MAX_AGE)
+        ).order_by(Forecast.date).limit(days).all()
         
-        self.models[location_id] = model
-        return model
+        return stored if len(stored) == days else None
     
     async def _get_average_check(self, location_id: int, db: Session) -> float:
         """Ўртача чекни олиш"""
@@ -0,0 +1,154 @@
+"""
+Риск баҳолаш қоидалари
+Чегаралар ва баллар жадвали, бутун омиллар матрицаси учун векторли ҳисоблаш
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.lazy import lazy_import
+
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+
+# Стандарт қоидалар (RISK_SCORING_MODEL файли бўлмаганда)
+DEFAULT_RISK_RULES: Dict[str, Any] = {
+    "factors": [
+        # Норасмий ходимлар: ҳар бири 10 балл (макс 30 балл)
+        {"factor": "unregistered_employees_count", "weight": 10, "cap": 30},
+        # Тушум тафовути (макс 40 балл): >10% -> 10, >20% -> 20, >30% -> 30, >50% -> 40
+        {
+            "factor": "discrepancy_percentage",
+            "absolute": True,
+            "bins": [10, 20, 30, 50],
+            "points": [0, 10, 20, 30, 40],
+            "right": True
+        },
+        # Тушум нисбати (макс 20 балл): <0.5 -> 20, <0.7 -> 15, <0.9 -> 10
+        {
+            "factor": "revenue_ratio",
+            "bins": [0.5, 0.7, 0.9],
+            "points": [20, 15, 10, 0]
+        },
+        # Иш вақти тафовути (макс 10 балл): >30 -> 5, >50 -> 10
+        {
+            "factor": "work_time_discrepancy",
+            "bins": [30, 50],
+            "points": [0, 5, 10],
+            "right": True
+        }
+    ],
+    "max_score": 100,
+    # Риск даражаси: <30 low, <50 medium, <70 high, қолгани critical
+    "level_bins": [30, 50, 70],
+    "level_labels": ["low", "medium", "high", "critical"]
+}
+
+
+@dataclass
+class FactorRule:
+    """
+    Битта омил қоидаси
+    bins/points - чегаралар жадвали (np.digitize), weight/cap - чизиқли балл
+    """
+    factor: str
+    bins: Optional[List[float]] = None
+    points: Optional[List[float]] = None
+    right: bool = False  # True: қиймат чегарадан катта бўлса кейинги оралиқ
+    absolute: bool = False
+    weight: Optional[float] = None
+    cap: Optional[float] = None
+    
+    def __post_init__(self):
+        if self.bins is None:
+            if self.weight is None:
+                raise ValueError(f"{self.factor}: bins ёки weight керак")
+            return
+        
+        if self.points is None or len(self.points) != len(self.bins) + 1:
+            raise ValueError(f"{self.factor}: points сони bins сонидан битта кўп бўлиши керак")
+        if list(self.bins) != sorted(self.bins):
+            raise ValueError(f"{self.factor}: bins ўсиш тартибида бўлиши керак")
+    
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """Омил қийматлари устунидан баллар"""
+        values = np.abs(values) if self.absolute else values
+        
+        if self.bins is None:
+            points = values * self.weight
+            return np.minimum(points, self.cap) if self.cap is not None else points
+        
+        index = np.digitize(values, self.bins, right=self.right)
+        return np.asarray(self.points, dtype=float)[index]
+
+
+class RiskRules:
+    """Риск баҳолаш қоидалари жадвали"""
+    
+    def __init__(
+        self,
+        factors: List[FactorRule],
+        max_score: float,
+        level_bins: List[float],
+        level_labels: List[str]
+    ):
+        if len(level_labels) != len(level_bins) + 1:
+            raise ValueError("level_labels сони level_bins сонидан битта кўп бўлиши керак")
+        
+        self.factors = factors
+        self.max_score = max_score
+        self.level_bins = np.asarray(level_bins, dtype=float)
+        self.level_labels = np.asarray(level_labels)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RiskRules":
+        return cls(
+            factors=[FactorRule(**rule) for rule in data["factors"]],
+            max_score=data.get("max_score", 100),
+            level_bins=data["level_bins"],
+            level_labels=data["level_labels"]
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "RiskRules":
+        """
+        Қоидаларни файлдан юклаш (.json ёки joblib/pickle луғат)
+        Файл бўлмаса ёки бузилган бўлса - стандарт қоидалар
+        """
+        file_path = Path(path)
+        if not file_path.exists():
+            return cls.from_dict(DEFAULT_RISK_RULES)
+        
+        try:
+            if file_path.suffix == ".json":
+                data = json.loads(file_path.read_text(encoding="utf-8"))
+            else:
+                data = joblib.load(file_path)
+            
+            rules = data if isinstance(data, cls) else cls.from_dict(data)
+            logger.info(f"Риск қоидалари юкланди: {file_path}")
+            return rules
+        
+        except Exception as e:
+            logger.error(f"Риск қоидаларини юклаб бўлмади ({file_path}): {e}", exc_info=True)
+            return cls.from_dict(DEFAULT_RISK_RULES)
+    
+    def score(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Омиллар матрицасидан риск баҳоси ва даражаси (ҳар бир қатор учун)"""
+        total = np.zeros(len(frame), dtype=float)
+        for rule in self.factors:
+            total += rule.evaluate(frame[rule.factor].to_numpy(dtype=float))
+        
+        total = np.minimum(total, self.max_score)
+        levels = self.level_labels[np.digitize(total, self.level_bins)]
+        return total, levels
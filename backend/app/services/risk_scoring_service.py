@@ -1,26 +1,117 @@
 """
 Риск баҳолаш сервиси
 Risk Scoring AI модули
+
+Барча фаол локацияларни қайта баҳолаш:
+    python -m app.services.risk_scoring_service
 """
-from typing import Dict, Any, List
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import numpy as np
 import logging
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 
-from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.data_versions import data_versions
+from app.core.database import SessionLocal, upsert_statement
+from app.core.lazy import lazy_import
 from app.models.employee import Employee
-from app.models.analytics import Analytics, RiskScore
+from app.models.analytics import Analytics, LocationDailyStats, RiskScore
 from app.models.customer import CustomerFlow
+from app.models.location import Location
+from app.services.risk_rules import RiskRules
+
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
+# Тахминий тушум учун ўртача чек (сум)
+AVERAGE_CHECK = 50000
+
+# Бир ходимнинг кунлик иш соатлари (иш вақти тафовути учун)
+STANDARD_SHIFT_HOURS = 8
+
+# Бир batch қадамидаги локациялар сони (IN рўйхати ва INSERT ҳажми)
+BATCH_CHUNK_SIZE = 5000
+
+# Ўзгарганда локация риск баҳосини қайта ҳисоблашни талаб қиладиган жадваллар
+RESCORE_TABLES = {
+    "customer_flows",
+    "analytics",
+    "employees",
+    "work_logs",
+    "tax_integrations",
+    "kkt_integrations"
+}
+
+# Риск омиллари (матрица устунлари тартиби)
+FACTOR_COLUMNS = [
+    "unregistered_employees_count",
+    "revenue_discrepancy",
+    "discrepancy_percentage",
+    "revenue_ratio",
+    "work_time_discrepancy",
+    "kkt_operations_count"
+]
+INTEGER_FACTORS = {"unregistered_employees_count", "kkt_operations_count"}
+
+# Upsert пайтида янгиланадиган устунлар (created_at сақланиб қолади)
+RISK_UPDATE_COLUMNS = [
+    "risk_score",
+    "risk_level",
+    "factors",
+    "unregistered_employees",
+    "revenue_discrepancy",
+    "updated_at"
+]
+
+
+def day_start(date: datetime) -> datetime:
+    """Кун боши - риск баҳоси (location_id, кун) бўйича сақланади"""
+    return datetime.combine(date.date(), datetime.min.time())
+
+
+def upsert_risk_scores(db: Session, rows: List[Dict[str, Any]]):
+    """RiskScore қаторларини (location_id, date) калити бўйича upsert қилиш"""
+    if not rows:
+        return
+    
+    stmt = upsert_statement(
+        db.get_bind().dialect.name,
+        RiskScore,
+        ["location_id", "date"],
+        lambda new: {column: new[column] for column in RISK_UPDATE_COLUMNS}
+    )
+    
+    if stmt is None:
+        # Бошқа базалар учун оддий (секин) йўл
+        for row in rows:
+            record = db.query(RiskScore).filter(
+                RiskScore.location_id == row["location_id"],
+                RiskScore.date == row["date"]
+            ).first()
+            if record is None:
+                db.add(RiskScore(**row))
+            else:
+                for column in RISK_UPDATE_COLUMNS:
+                    setattr(record, column, row[column])
+        return
+    
+    db.execute(stmt, rows)
+
 
 class RiskScoringService:
     """Риск баҳолаш сервиси"""
     
     def __init__(self):
         """Инициализация"""
+        self.rules = RiskRules.load(settings.RISK_SCORING_MODEL)
         logger.info("Risk Scoring сервис инициализация қилинди")
     
     async def calculate_risk_score(
@@ -31,38 +122,28 @@ class RiskScoringService:
         """
         Риск баҳосини ҳисоблаш
         """
+        db = SessionLocal()
         try:
-            db = SessionLocal()
-            
             # Омилларни олиш
-            factors = await self._collect_factors(location_id, date, db)
-            
-            # Риск баҳосини ҳисоблаш
-            risk_score = self._calculate_score(factors)
+            frame = self._collect_factor_frame([location_id], date, db)
+            factors = self._factors_dict(frame.iloc[0])
             
-            # Риск даражаси
-            risk_level = self._get_risk_level(risk_score)
+            # Риск баҳоси ва даражаси (batch билан бир хил код)
+            scores, levels = self._score_frame(frame)
+            risk_score = float(scores[0])
+            risk_level = str(levels[0])
             
-            # Базага сақлаш
-            risk_record = RiskScore(
-                location_id=location_id,
-                date=date,
-                risk_score=risk_score,
-                risk_level=risk_level,
-                factors=factors,
-                unregistered_employees=factors.get("unregistered_employees_count", 0),
-                revenue_discrepancy=factors.get("revenue_discrepancy", 0.0)
-            )
-            
-            db.add(risk_record)
+            # Базага сақлаш (бир локация ва кун учун битта қатор)
+            upsert_risk_scores(db, [
+                self._risk_row(location_id, day_start(date), risk_score, risk_level, factors)
+            ])
             db.commit()
-            
-            db.close()
+            data_versions.bump(RiskScore.__tablename__, location_id)
             
             return {
                 "location_id": location_id,
                 "date": date.isoformat(),
-                "risk_score": float(risk_score),
+                "risk_score": risk_score,
                 "risk_level": risk_level,
                 "factors": factors,
                 "recommendations": self._get_recommendations(risk_score, factors)
@@ -73,114 +154,237 @@ class RiskScoringService:
             return {
                 "error": str(e)
             }
+        
+        finally:
+            db.close()
     
-    async def _collect_factors(
+    async def calculate_risk_scores_batch(
         self,
-        location_id: int,
         date: datetime,
-        db: Session
+        location_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
-        """Риск омилларини тўплаш"""
-        factors = {}
-        
-        # 1. Норасмий ходимлар
-        unregistered_employees = db.query(Employee).filter(
-            Employee.location_id == location_id,
-            Employee.is_registered == False,
-            Employee.is_active == True
-        ).count()
-        factors["unregistered_employees_count"] = unregistered_employees
-        
-        # 2. Тушум тафовути
-        analytics = db.query(Analytics).filter(
-            Analytics.location_id == location_id,
+        """
+        Кўп локацияни бирданига баҳолаш
+        Ҳар бир қадам: GROUP BY сўровлар, векторли ҳисоблаш ва bulk upsert
+        """
+        report, scored = await asyncio.to_thread(self._score_batch, date, location_ids)
+        
+        # Core upsert ORM ҳодисаларини чақирмайди - версияларни қўлда ошириш
+        for location_id in scored:
+            data_versions.bump(RiskScore.__tablename__, location_id)
+        
+        logger.info(
+            f"Batch риск баҳолаш тугади: {report['locations']} локация, "
+            f"{report['locations_per_second']} локация/сек"
+        )
+        return report
+    
+    def _score_batch(
+        self,
+        date: datetime,
+        location_ids: Optional[List[int]]
+    ) -> Tuple[Dict[str, Any], List[int]]:
+        """Batch баҳолаш (синхрон, алоҳида thread'да бажарилади)"""
+        started = time.perf_counter()
+        db = SessionLocal()
+        total = 0
+        scored: List[int] = []
+        level_counts: Dict[str, int] = {}
+        
+        try:
+            if location_ids is None:
+                location_ids = [
+                    location_id for (location_id,) in
+                    db.query(Location.id).filter(Location.is_active == True).all()
+                ]
+            
+            for i in range(0, len(location_ids), BATCH_CHUNK_SIZE):
+                chunk = location_ids[i:i + BATCH_CHUNK_SIZE]
+                
+                frame = self._collect_factor_frame(chunk, date, db)
+                scores, levels = self._score_frame(frame)
+                
+                rows = [
+                    self._risk_row(
+                        int(location_id),
+                        day_start(date),
+                        float(score),
+                        str(level),
+                        self._factors_dict(factor_row)
+                    )
+                    for (location_id, factor_row), score, level in zip(frame.iterrows(), scores, levels)
+                ]
+                
+                upsert_risk_scores(db, rows)
+                db.commit()
+                
+                scored.extend(chunk)
+                total += len(rows)
+                for level, count in zip(*np.unique(levels, return_counts=True)):
+                    level_counts[str(level)] = level_counts.get(str(level), 0) + int(count)
+        
+        finally:
+            db.close()
+        
+        elapsed = time.perf_counter() - started
+        report = {
+            "date": date.isoformat(),
+            "locations": total,
+            "risk_levels": level_counts,
+            "elapsed_seconds": round(elapsed, 3),
+            "locations_per_second": round(total / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        return report, scored
+    
+    def _collect_factor_frame(
+        self,
+        location_ids: List[int],
+        date: datetime,
+        db: Session
+    ) -> pd.DataFrame:
+        """Риск омилларини локациялар бўйича GROUP BY сўровлар билан тўплаш"""
+        frame = pd.DataFrame(index=pd.Index(location_ids, name="location_id"))
+        
+        # 1. Норасмий ва жами фаол ходимлар
+        employees = {
+            location_id: (unregistered, active)
+            for location_id, unregistered, active in db.query(
+                Employee.location_id,
+                func.sum(case((Employee.is_registered == False, 1), else_=0)),
+                func.count(Employee.id)
+            ).filter(
+                Employee.location_id.in_(location_ids),
+                Employee.is_active == True
+            ).group_by(Employee.location_id).all()
+        }
+        
+        # 2. Тушум тафовути (охирги 30 кундаги энг сўнгги аналитика)
+        latest = db.query(
+            Analytics.location_id,
+            func.max(Analytics.date).label("max_date")
+        ).filter(
+            Analytics.location_id.in_(location_ids),
             Analytics.date >= date - timedelta(days=30)
-        ).order_by(Analytics.date.desc()).first()
-        
-        if analytics:
-            factors["revenue_discrepancy"] = analytics.discrepancy
-            factors["discrepancy_percentage"] = analytics.discrepancy_percentage
-        else:
-            factors["revenue_discrepancy"] = 0.0
-            factors["discrepancy_percentage"] = 0.0
-        
-        # 3. Мижозлар ва солиқ солиштириш
-        customer_flow = db.query(CustomerFlow).filter(
-            CustomerFlow.location_id == location_id,
-            CustomerFlow.date >= date - timedelta(days=7)
-        ).all()
-        
-        avg_customers = np.mean([cf.total_entered for cf in customer_flow]) if customer_flow else 0
-        
-        # Тахминий тушум
-        estimated_revenue = avg_customers * 50000  # Ўртача чек
-        
-        # Хисоботдаги тушум
-        reported_revenue = analytics.reported_revenue if analytics else 0
-        
-        if reported_revenue > 0:
-            revenue_ratio = estimated_revenue / reported_revenue
-            factors["revenue_ratio"] = revenue_ratio
-        else:
-            factors["revenue_ratio"] = 0.0
-        
-        # 4. Иш вақти тафовути
-        # (бу ерда содда логика, аслда WorkLog дан олиш керак)
-        factors["work_time_discrepancy"] = 0.0
-        
-        # 5. Касса операциялари
-        # (ККТ интеграциясидан олиш керак)
-        factors["kkt_operations_count"] = 0
-        
-        return factors
-    
-    def _calculate_score(self, factors: Dict[str, Any]) -> float:
-        """Риск баҳосини ҳисоблаш"""
-        score = 0.0
-        
-        # Норасмий ходимлар (макс 30 балл)
-        unregistered = factors.get("unregistered_employees_count", 0)
-        score += min(30, unregistered * 10)
-        
-        # Тушум тафовути (макс 40 балл)
-        discrepancy_pct = abs(factors.get("discrepancy_percentage", 0))
-        if discrepancy_pct > 50:
-            score += 40
-        elif discrepancy_pct > 30:
-            score += 30
-        elif discrepancy_pct > 20:
-            score += 20
-        elif discrepancy_pct > 10:
-            score += 10
-        
-        # Тушум нисбати (макс 20 балл)
-        revenue_ratio = factors.get("revenue_ratio", 1.0)
-        if revenue_ratio < 0.5:
-            score += 20
-        elif revenue_ratio < 0.7:
-            score += 15
-        elif revenue_ratio < 0.9:
-            score += 10
-        
-        # Иш вақти тафовути (макс 10 балл)
-        work_time_disc = factors.get("work_time_discrepancy", 0)
-        if work_time_disc > 50:
-            score += 10
-        elif work_time_disc > 30:
-            score += 5
-        
-        return min(100, score)
-    
-    def _get_risk_level(self, score: float) -> str:
-        """Риск даражасини аниқлаш"""
-        if score >= 70:
-            return "critical"
-        elif score >= 50:
-            return "high"
-        elif score >= 30:
-            return "medium"
-        else:
-            return "low"
+        ).group_by(Analytics.location_id).subquery()
+        
+        analytics = {
+            location_id: (discrepancy, percentage, reported)
+            for location_id, discrepancy, percentage, reported in db.query(
+                Analytics.location_id,
+                Analytics.discrepancy,
+                Analytics.discrepancy_percentage,
+                Analytics.reported_revenue
+            ).join(
+                latest,
+                and_(
+                    Analytics.location_id == latest.c.location_id,
+                    Analytics.date == latest.c.max_date
+                )
+            ).all()
+        }
+        
+        # 3. Мижозлар оқими (охирги 7 кун)
+        flows = {
+            location_id: (average, days)
+            for location_id, average, days in db.query(
+                CustomerFlow.location_id,
+                func.avg(CustomerFlow.total_entered),
+                func.count(CustomerFlow.id)
+            ).filter(
+                CustomerFlow.location_id.in_(location_ids),
+                CustomerFlow.date >= date - timedelta(days=7)
+            ).group_by(CustomerFlow.location_id).all()
+        }
+        
+        # Кунлик агрегатлар (охирги 7 кун): иш соатлари ва ККТ чеклари
+        daily_stats = {
+            location_id: (hours, receipts)
+            for location_id, hours, receipts in db.query(
+                LocationDailyStats.location_id,
+                func.sum(LocationDailyStats.worked_hours),
+                func.sum(LocationDailyStats.kkt_receipts)
+            ).filter(
+                LocationDailyStats.location_id.in_(location_ids),
+                LocationDailyStats.date >= day_start(date) - timedelta(days=6),
+                LocationDailyStats.date <= date
+            ).group_by(LocationDailyStats.location_id).all()
+        }
+        
+        def column(values: Dict[int, Any], position: Optional[int] = None) -> np.ndarray:
+            return np.array([
+                float((values[i] if position is None else values[i][position]) or 0)
+                if i in values else 0.0
+                for i in location_ids
+            ])
+        
+        unregistered = {i: value[0] for i, value in employees.items()}
+        active_employees = {i: value[1] for i, value in employees.items()}
+        avg_customers = {i: value[0] for i, value in flows.items()}
+        flow_days = {i: value[1] for i, value in flows.items()}
+        
+        frame["unregistered_employees_count"] = column(unregistered)
+        frame["revenue_discrepancy"] = column(analytics, 0)
+        frame["discrepancy_percentage"] = column(analytics, 1)
+        
+        # Тахминий ва хисоботдаги тушум нисбати
+        estimated_revenue = column(avg_customers) * AVERAGE_CHECK
+        reported_revenue = column(analytics, 2)
+        frame["revenue_ratio"] = np.divide(
+            estimated_revenue,
+            reported_revenue,
+            out=np.zeros(len(location_ids)),
+            where=reported_revenue > 0
+        )
+        
+        # 4. Иш вақти тафовути: ходимлар сони * иш куни соатлари (оқим бўлган кунлар) га
+        # нисбатан WorkLog'да қайд этилмаган соатлар фоизи
+        # WorkLog ёзуви йўқ локацияларда иш вақти номаълум (0 соат эмас) - омил 0
+        expected_hours = column(active_employees) * STANDARD_SHIFT_HOURS * column(flow_days)
+        worked_hours = column(daily_stats, 0)
+        frame["work_time_discrepancy"] = np.divide(
+            np.maximum(expected_hours - worked_hours, 0) * 100,
+            expected_hours,
+            out=np.zeros(len(location_ids)),
+            where=(expected_hours > 0) & (worked_hours > 0)
+        )
+        
+        # 5. Касса операциялари (охирги 7 кундаги ККТ чеклари)
+        frame["kkt_operations_count"] = column(daily_stats, 1)
+        
+        return frame[FACTOR_COLUMNS]
+    
+    def _risk_row(
+        self,
+        location_id: int,
+        date: datetime,
+        risk_score: float,
+        risk_level: str,
+        factors: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """RiskScore жадвали учун қатор"""
+        now = datetime.utcnow()
+        return {
+            "location_id": location_id,
+            "date": date,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "factors": factors,
+            "unregistered_employees": factors["unregistered_employees_count"],
+            "revenue_discrepancy": factors["revenue_discrepancy"],
+            "created_at": now,
+            "updated_at": now
+        }
+    
+    def _factors_dict(self, row: pd.Series) -> Dict[str, Any]:
+        """Матрица қаторини JSON учун омиллар луғатига айлантириш"""
+        return {
+            name: int(row[name]) if name in INTEGER_FACTORS else float(row[name])
+            for name in FACTOR_COLUMNS
+        }
+    
+    def _score_frame(self, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Риск баҳоси ва даражасини бутун матрица учун қоидалар жадвалидан ҳисоблаш"""
+        return self.rules.score(frame)
     
     def _get_recommendations(
         self,
@@ -208,3 +412,97 @@ class RiskScoringService:
             )
         
         return recommendations
+
+
+class RiskRescoringWorker:
+    """
+    Маълумот ўзгаришлари бўйича фон қайта баҳолаш
+    Ўзгарган локациялар такрорсиз "dirty" тўпламга тушади ва batch билан баҳоланади
+    """
+    
+    def __init__(
+        self,
+        service: RiskScoringService,
+        delay: float,
+        batch_size: int
+    ):
+        """Инициализация"""
+        self.service = service
+        self.delay = delay
+        self.batch_size = batch_size
+        self._dirty: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = False
+    
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+    
+    def mark_dirty(self, location_id: int):
+        """
+        Локацияни қайта баҳолаш навбатига қўйиш
+        Sync эндпоинтлар commit'и thread'да бўлгани учун уйғотиш loop орқали
+        """
+        self._dirty.add(location_id)
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def _on_change(self, table: str, location_id: int):
+        if table in RESCORE_TABLES:
+            self.mark_dirty(location_id)
+    
+    async def run_once(self) -> Optional[Dict[str, Any]]:
+        """Навбатдаги битта batch'ни баҳолаш"""
+        if not self._dirty:
+            return None
+        
+        location_ids = [self._dirty.pop() for _ in range(min(self.batch_size, len(self._dirty)))]
+        try:
+            return await self.service.calculate_risk_scores_batch(datetime.utcnow(), location_ids)
+        except Exception:
+            # Кейинги уринишда қайта баҳоланади
+            self._dirty.update(location_ids)
+            raise
+    
+    async def _run_loop(self):
+        while True:
+            await self._wakeup.wait()
+            # Ўзгаришлар тўлқинини битта batch'га йиғиш
+            await asyncio.sleep(self.delay)
+            self._wakeup.clear()
+            
+            try:
+                while self._dirty:
+                    await self.run_once()
+            except Exception as e:
+                logger.error(f"Фон риск баҳолашда хатолик: {e}", exc_info=True)
+                self._wakeup.set()
+    
+    def start(self):
+        """Ўзгаришларга обуна бўлиш ва фон циклини ишга тушириш"""
+        if not self._subscribed:
+            data_versions.subscribe(self._on_change)
+            self._subscribed = True
+        
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run_loop())
+            if self._dirty:
+                self._wakeup.set()
+    
+    async def stop(self):
+        """Фон циклини тўхтатиш"""
+        task, self._task, self._loop = self._task, None, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    print(asyncio.run(RiskScoringService().calculate_risk_scores_batch(datetime.utcnow())))
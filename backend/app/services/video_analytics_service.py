@@ -2,7 +2,6 @@
 Видеоаналитика сервиси
 Видео оқимларини таҳлил қилиш
 """
-import cv2
 import numpy as np
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -10,21 +9,32 @@ import logging
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
+from app.core.lazy import lazy_import
 from app.models.customer import CustomerFlow, CustomerVisit
 from app.models.location import Location
 from app.services.ai_service import AIService
+from app.services.model_registry import ModelRegistry
 from app.services.person_detection_service import PersonDetectionService
 
+# Оғир кутубхоналар биринчи ишлатилганда юкланади
+cv2 = lazy_import("cv2")
+
 logger = logging.getLogger(__name__)
 
 
 class VideoAnalyticsService:
     """Видеоаналитика сервиси"""
     
-    def __init__(self):
-        """Инициализация"""
-        self.ai_service = AIService()
-        self.person_detection = PersonDetectionService()
+    def __init__(
+        self,
+        ai_service: Optional[AIService] = None,
+        person_detection: Optional[PersonDetectionService] = None,
+        model_registry: Optional[ModelRegistry] = None
+    ):
+        """Инициализация (берилмаган сервислар янги яратилади)"""
+        self.ai_service = ai_service or AIService()
+        self.person_detection = person_detection or self.ai_service.person_detection
+        self.model_registry = model_registry or self.ai_service.predictive_analytics.registry
         self.tracked_persons = {}  # track_id -> {enter_time, location_id, camera_id}
         logger.info("Video Analytics сервис инициализация қилинди")
     
@@ -103,6 +113,9 @@ class VideoAnalyticsService:
                 
                 db.commit()
                 
+                # Янги оқим маълумоти - прогноз моделини фонда янгилаш
+                self.model_registry.mark_stale(location_id)
+                
                 return {
                     "success": True,
                     "location_id": location_id,
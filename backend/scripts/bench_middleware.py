@@ -0,0 +1,136 @@
+"""
+Мидлвар бенчмарки: BaseHTTPMiddleware (аввалги) ва соф ASGI (жорий) мидлварлар
+Сўровлар тармоқсиз, httpx.ASGITransport орқали юборилади - фақат мидлвар стеки ўлчанади
+
+Backend каталогидан ишга тушириш (.env ёки муҳит ўзгарувчилари созланган бўлиши керак):
+    python scripts/bench_middleware.py --requests 3000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Лимит 429 қайтармаслиги учун (фақат мидлвар нархи ўлчанади)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.security_middleware import SecurityMiddleware
+
+logger = logging.getLogger("bench.legacy")
+
+# Таҳлил эндпоинти ўрнига: 200 қаторли JSON жавоб
+ROWS = [
+    {"location_id": i, "date": "2026-01-01", "real_customers": i * 3, "revenue": i * 1500.0, "risk_score": i % 100}
+    for i in range(200)
+]
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """Аввалги хавфсизлик мидлвари (BaseHTTPMiddleware)"""
+    
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        return response
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Аввалги логирование мидлвари (BaseHTTPMiddleware)"""
+    
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "unknown"
+        response = await call_next(request)
+        logger.info(
+            f"{request.method} {request.url} - "
+            f"Status: {response.status_code} - "
+            f"Time: {time.time() - start_time:.3f}s - "
+            f"IP: {client_ip}"
+        )
+        return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    """main.py'даги тартибда мидлварлар уланган илова"""
+    app = FastAPI()
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+    
+    @app.get("/analytics")
+    async def analytics():
+        return ROWS
+    
+    if legacy:
+        app.add_middleware(LegacySecurityMiddleware)
+        app.add_middleware(LegacyLoggingMiddleware)
+    else:
+        app.add_middleware(SecurityMiddleware)
+        # Аввалгидек ҳар бир сўров логланади
+        app.add_middleware(LoggingMiddleware, sample_rate=1.0, route_sample_rates={})
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> Dict[str, float]:
+    """requests та сўров, бир вақтда concurrency тадан"""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Иситиш
+        for _ in range(50):
+            await client.get(path)
+        
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+    }
+
+
+async def main(requests: int, concurrency: int):
+    print(f"{'стек':<10} {'йўл':<12} {'rps':>8} {'p50, ms':>9} {'p99, ms':>9}")
+    for path in ("/health", "/analytics"):
+        for name, legacy in (("аввалги", True), ("ASGI", False)):
+            result = await run(build_app(legacy), path, requests, concurrency)
+            print(
+                f"{name:<10} {path:<12} {result['rps']:>8.0f} "
+                f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Мидлвар стеки бенчмарки")
+    parser.add_argument("--requests", type=int, default=3000, help="Ҳар бир ўлчашдаги сўровлар сони")
+    parser.add_argument("--concurrency", type=int, default=50, help="Параллел сўровлар сони")
+    args = parser.parse_args()
+    
+    # Лог ёзиш иккала стекда ҳам бир хил (ва арзон) бўлиши учун
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    
+    asyncio.run(main(args.requests, args.concurrency))
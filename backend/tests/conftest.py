@@ -0,0 +1,65 @@
+"""
+Тестлар учун умумий созлаш
+Илова импорт қилинишидан олдин муҳит ўзгарувчилари вақтинча каталогга йўналтирилади
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="dsp-tests-")
+
+os.environ.update({
+    "DEBUG": "false",
+    "DATABASE_URL": f"sqlite:///{_TMP}/test.db",
+    "REDIS_URL": "",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ONVIF_USERNAME": "test",
+    "ONVIF_PASSWORD": "test",
+    "TAX_API_KEY": "test",
+    "MYGOV_API_KEY": "test",
+    "KKT_API_KEY": "test",
+    "ALLOWED_ORIGINS": '["http://testserver.uz"]',
+    "AI_MODEL_PATH": f"{_TMP}/models",
+    "LOG_FILE": f"{_TMP}/logs/app.log",
+    "UPLOAD_DIR": f"{_TMP}/uploads",
+    "VIDEO_STORAGE_DIR": f"{_TMP}/videos",
+    "FACE_STORAGE_DIR": f"{_TMP}/faces"
+})
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """Ҳар бир тест учун тоза база"""
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401 - барча жадваллар рўйхатга олинади
+    
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client(db):
+    """Аутентификациясиз тест клиенти (lifespan билан)"""
+    from fastapi.testclient import TestClient
+    
+    from app.core.security import get_current_user
+    from app.main import app
+    
+    app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,126 @@
+"""
+TTL кэш тестлари
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.cache import MISSING, TTLCache
+
+
+def test_expiry_and_lru_eviction():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    # "b" энг узоқ ишлатилмаган
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, MISSING, 3)
+    
+    cache.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is MISSING
+
+
+def test_concurrent_invalidate_from_threads():
+    cache = TTLCache(ttl=60, maxsize=500)
+    errors = []
+    stop = time.monotonic() + 0.5
+    
+    def writer(offset: int):
+        try:
+            i = 0
+            while time.monotonic() < stop:
+                cache.set((offset, i % 1000), i)
+                cache.get((offset, (i * 7) % 1000))
+                i += 1
+        except Exception as e:
+            errors.append(e)
+    
+    def invalidator():
+        try:
+            while time.monotonic() < stop:
+                cache.invalidate(lambda key: key[1] % 2 == 0)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(3)]
+    threads += [threading.Thread(target=invalidator) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(cache._data) <= cache.maxsize
+
+
+class Factory:
+    """Ҳисоблашлар сонини санайди ва рухсат берилгунча кутади"""
+    
+    def __init__(self, value="ok"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+    
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_compute():
+    cache = TTLCache(ttl=60)
+    factory = Factory()
+    
+    callers = [asyncio.create_task(cache.get_or_compute("key", factory)) for _ in range(10)]
+    await asyncio.sleep(0)
+    factory.release.set()
+    
+    assert await asyncio.gather(*callers) == ["ok"] * 10
+    assert factory.calls == 1
+    # Кейинги сўров кэшдан
+    assert await cache.get_or_compute("key", factory) == "ok"
+    assert factory.calls == 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_leader_does_not_fail_followers():
+    cache = TTLCache(ttl=60)
+    factory = Factory()
+    
+    leader = asyncio.create_task(cache.get_or_compute("key", factory))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(cache.get_or_compute("key", factory)) for _ in range(3)]
+    await asyncio.sleep(0)
+    
+    # Масалан, клиент уланишни узди
+    leader.cancel()
+    await asyncio.sleep(0)
+    factory.release.set()
+    
+    assert await asyncio.gather(*followers) == ["ok"] * 3
+    assert leader.cancelled()
+    assert factory.calls == 1
+    assert cache.get("key") == "ok"
+
+
+@pytest.mark.anyio
+async def test_failure_reaches_every_caller_and_is_not_cached():
+    cache = TTLCache(ttl=60)
+    factory = Factory(ValueError("upstream"))
+    
+    callers = [asyncio.create_task(cache.get_or_compute("key", factory)) for _ in range(3)]
+    await asyncio.sleep(0)
+    factory.release.set()
+    
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert factory.calls == 1
+    assert cache.get("key") is MISSING
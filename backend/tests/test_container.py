@@ -0,0 +1,29 @@
+"""
+Сервислар контейнери тестлари
+Фон ишлари ва кэшлар модуль даражасида эмас, контейнерда яратилади - эндпоинтлар ва lifespan битта нусхани ишлатади
+"""
+from app.services.container import build_container
+
+
+def test_lifespan_and_endpoints_share_instances(client):
+    services = client.app.state.services
+    
+    # lifespan ишга туширган фон ишлари контейнердаги нусхалар
+    registry = services.instance("predictive_models")
+    worker = services.instance("risk_rescoring")
+    assert registry is not None and worker is not None
+    
+    predictive = services.get("predictive_analytics")
+    assert predictive.registry is registry
+    assert predictive.cache is services.get("forecast_cache")
+    assert worker.service is services.get("risk_scoring")
+
+
+def test_services_can_be_overridden_before_first_use():
+    services = build_container()
+    fake_registry = object()
+    services.register("predictive_models", lambda container: fake_registry)
+    
+    assert services.get("predictive_analytics").registry is fake_registry
+    # Ҳар бир контейнер ўз нусхаларига эга
+    assert build_container().get("forecast_cache") is not services.get("forecast_cache")
@@ -0,0 +1,112 @@
+"""
+Экспорт оқими тестлари: CSV ва NDJSON, gzip, сана/локация филтрлари
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.security import get_current_active_admin
+from app.models.analytics import Analytics
+from app.models.customer import CustomerFlow, CustomerVisit
+from app.models.location import Location
+from app.services import export_service
+from app.services.export_service import iter_export
+
+START = datetime(2026, 1, 1)
+DAYS = 10
+VISITS_PER_DAY = 3
+
+
+@pytest.fixture
+def seeded(db):
+    locations = [
+        Location(name=f"Кафе {i}", address="Тошкент", location_type="CAFE")
+        for i in range(2)
+    ]
+    db.add_all(locations)
+    db.flush()
+    
+    for location in locations:
+        flow = CustomerFlow(location_id=location.id, date=START, total_entered=DAYS * VISITS_PER_DAY)
+        db.add(flow)
+        db.flush()
+        for day in range(DAYS):
+            date = START + timedelta(days=day)
+            db.add(Analytics(location_id=location.id, date=date, real_customers=day, reported_revenue=day * 1000.0))
+            db.add_all([
+                CustomerVisit(
+                    flow_id=flow.id,
+                    location_id=location.id,
+                    entered_at=date + timedelta(hours=9 + visit),
+                    track_id=f"т-{day}-{visit}"
+                )
+                for visit in range(VISITS_PER_DAY)
+            ])
+    db.commit()
+    return [location.id for location in locations]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Бир нечта бўлак бўлиши учун
+    monkeypatch.setattr(export_service, "EXPORT_CHUNK_BYTES", 256)
+
+
+def test_csv_export_streams_gzip_with_filters(seeded, small_chunks):
+    first, _ = seeded
+    chunks = list(iter_export(
+        "analytics",
+        "csv",
+        location_ids=[first],
+        start_date=START + timedelta(days=2),
+        end_date=START + timedelta(days=6),
+        compress=True
+    ))
+    
+    assert len(chunks) > 1
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(chunks)).decode("utf-8"))))
+    
+    assert len(rows) == 5
+    assert {row["location_id"] for row in rows} == {str(first)}
+    assert [row["date"][:10] for row in rows] == [f"2026-01-0{day}" for day in range(3, 8)]
+    assert [float(row["reported_revenue"]) for row in rows] == [day * 1000.0 for day in range(2, 7)]
+
+
+def test_ndjson_export_streams_rows_per_line(seeded, small_chunks):
+    _, second = seeded
+    chunks = list(iter_export("customer_visits", "ndjson", location_ids=[second]))
+    
+    assert len(chunks) > 1
+    rows = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+    
+    assert len(rows) == DAYS * VISITS_PER_DAY
+    assert {row["location_id"] for row in rows} == {second}
+    assert rows[0]["track_id"] == "т-0-0"
+    assert rows[0]["entered_at"] == "2026-01-01T09:00:00"
+    
+    # gzip фақат кодлашни ўзгартиради
+    compressed = b"".join(iter_export("customer_visits", "ndjson", location_ids=[second], compress=True))
+    assert gzip.decompress(compressed) == b"".join(chunks)
+
+
+def test_export_endpoint(client, seeded):
+    client.app.dependency_overrides[get_current_active_admin] = lambda: None
+    
+    response = client.get(
+        "/api/v1/analytics/export/analytics",
+        params={"format": "ndjson", "gzip": "true", "end_date": (START + timedelta(days=4)).isoformat()}
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="analytics.ndjson.gz"' in response.headers["content-disposition"]
+    lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+    # Иккала локация, 5 кундан
+    assert len(lines) == 2 * 5
+    
+    assert client.get("/api/v1/analytics/export/unknown").status_code == 404
+    assert client.get("/api/v1/analytics/export/analytics", params={"format": "xml"}).status_code == 400
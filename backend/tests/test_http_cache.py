@@ -0,0 +1,84 @@
+"""
+ETag / 304 тестлари
+Версия базадан олинади - бошқа процесс ёзган ўзгариш ҳам ETag'ни ўзгартиради
+"""
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.core.http_cache import make_etag
+from app.models.analytics import Analytics, RiskScore
+from app.models.location import Location
+
+
+@pytest.fixture
+def location(db):
+    location = Location(name="Кафе", address="Тошкент", location_type="CAFE")
+    db.add(location)
+    db.commit()
+    return location
+
+
+def write_from_other_process(table, values, *criteria):
+    """ORM ва data_versions'сиз ёзиш (CLI ёки бошқа worker каби)"""
+    with engine.begin() as connection:
+        connection.execute(update(table).where(*criteria).values(**values))
+
+
+def test_analytics_etag_changes_on_external_write(client, db, location):
+    db.add(Analytics(location_id=location.id, date=datetime(2026, 1, 1), real_customers=10))
+    db.commit()
+    
+    url = f"/api/v1/analytics/locations/{location.id}"
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    
+    write_from_other_process(
+        Analytics.__table__,
+        {"real_customers": 20, "updated_at": datetime.utcnow() + timedelta(seconds=1)},
+        Analytics.location_id == location.id
+    )
+    
+    second = client.get(url, headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json()[0]["real_customers"] == 20
+    assert second.headers["etag"] != etag
+
+
+def test_risk_etag_is_built_after_scoring(client, location):
+    url = f"/api/v1/analytics/locations/{location.id}/risk"
+    first = client.get(url)
+    assert first.status_code == 200
+    
+    # Биринчи жавобдаги ETag ҳисобланган баҳога тегишли
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+
+def test_risk_etag_changes_on_external_rescore(client, location):
+    url = f"/api/v1/analytics/locations/{location.id}/risk"
+    etag = client.get(url).headers["etag"]
+    
+    write_from_other_process(
+        RiskScore.__table__,
+        {"risk_score": 99.0, "updated_at": datetime.utcnow() + timedelta(seconds=1)},
+        RiskScore.location_id == location.id
+    )
+    
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["risk_score"] == 99.0
+
+
+def test_etag_is_stable_across_processes():
+    # Бошқа worker (алоҳида процесс) бир хил версия учун бир хил ETag беради
+    other = subprocess.run(
+        [sys.executable, "-c", "from app.core.http_cache import make_etag; print(make_etag('risk', 1, (3, None)))"],
+        capture_output=True, text=True, check=True
+    )
+    assert other.stdout.strip() == make_etag("risk", 1, (3, None))
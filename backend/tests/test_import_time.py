@@ -0,0 +1,40 @@
+"""
+API импорт тести: app.main оғир ML кутубхоналарини юкламайди ва вақт бюджетига сиғади
+Импорт тоза жараёнда текширилади (жорий жараёнда модуллар аллақачон юкланган бўлиши мумкин)
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core.import_check import DEFAULT_BUDGET, HEAVY_MODULES
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def import_in_subprocess():
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_is_light():
+    report = import_in_subprocess()
+    
+    loaded = set(report["modules"]) & set(HEAVY_MODULES)
+    assert not loaded, f"app.main оғир кутубхоналарни юклайди: {sorted(loaded)}"
+    assert report["elapsed"] < DEFAULT_BUDGET, f"импорт вақти {report['elapsed']:.3f}s > {DEFAULT_BUDGET}s"
@@ -0,0 +1,272 @@
+"""
+Интеграцияларни оммавий синхронлаш тестлари
+Ташқи API httpx.MockTransport билан алмаштирилади (503 ва timeout'лар қўлда берилади)
+"""
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.analytics import LocationDailyStats
+from app.models.integration import KKTIntegration, TaxIntegration
+from app.models.location import Location
+from app.services.integration_service import IntegrationService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "INTEGRATION_RETRY_BACKOFF", 0.0)
+
+
+@pytest.fixture
+def locations(db):
+    locations = [Location(name=f"Кафе {i}", address="Тошкент", location_type="CAFE") for i in range(3)]
+    db.add_all(locations)
+    db.commit()
+    return locations
+
+
+class Upstream:
+    """Йўл бўйича жавоблар навбати: охиргиси кейинги сўровларда такрорланади"""
+    
+    def __init__(self, routes):
+        self.routes = {path: list(responses) for path, responses in routes.items()}
+        self.calls = Counter()
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls[path] += 1
+        responses = self.routes[path]
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    def service(self) -> IntegrationService:
+        return IntegrationService(transport=httpx.MockTransport(self))
+
+
+def ndjson(receipts) -> httpx.Response:
+    body = "\n".join(json.dumps(receipt) for receipt in receipts)
+    return httpx.Response(200, text=body, headers={"Content-Type": "application/x-ndjson"})
+
+
+async def test_tax_fleet_retries_and_records_errors(db, locations):
+    db.add_all([
+        TaxIntegration(location_id=locations[0].id, tax_id="T1"),
+        TaxIntegration(location_id=locations[1].id, tax_id="T2"),
+        TaxIntegration(location_id=locations[2].id, tax_id="T3")
+    ])
+    db.commit()
+    
+    upstream = Upstream({
+        "/api/tax/revenue/T1": [httpx.Response(200, json={"reported_revenue": 1000.0, "tax_paid": 120.0})],
+        # Икки марта 503, кейин муваффақиятли
+        "/api/tax/revenue/T2": [
+            httpx.Response(503),
+            httpx.Response(503),
+            httpx.Response(200, json={"reported_revenue": 500.0, "tax_paid": 60.0})
+        ],
+        # Доим timeout
+        "/api/tax/revenue/T3": [httpx.ConnectTimeout("timed out")]
+    })
+    service = upstream.service()
+    try:
+        report = await service.sync_fleet("tax")
+    finally:
+        await service.close()
+    
+    assert report["integrations"] == 3
+    assert (report["succeeded"], report["failed"]) == (2, 1)
+    assert upstream.calls["/api/tax/revenue/T2"] == 3
+    assert upstream.calls["/api/tax/revenue/T3"] == settings.INTEGRATION_MAX_RETRIES + 1
+    
+    db.expire_all()
+    rows = {row.tax_id: row for row in db.query(TaxIntegration)}
+    assert (rows["T1"].sync_status, rows["T1"].reported_revenue) == ("success", 1000.0)
+    assert (rows["T2"].sync_status, rows["T2"].tax_paid) == ("success", 60.0)
+    assert rows["T3"].sync_status == "error"
+    assert rows["T3"].error_message == "timed out"
+
+
+async def test_client_errors_are_not_retried(db, locations):
+    db.add(TaxIntegration(location_id=locations[0].id, tax_id="T404"))
+    db.commit()
+    
+    upstream = Upstream({"/api/tax/revenue/T404": [httpx.Response(404)]})
+    service = upstream.service()
+    try:
+        report = await service.sync_fleet("tax")
+    finally:
+        await service.close()
+    
+    assert report["failed"] == 1
+    assert upstream.calls["/api/tax/revenue/T404"] == 1
+
+
+async def test_kkt_fleet_accumulates_and_moves_cursor(db, locations):
+    db.add_all([
+        KKTIntegration(location_id=locations[0].id, kkt_serial="K1"),
+        KKTIntegration(location_id=locations[1].id, kkt_serial="K2")
+    ])
+    db.commit()
+    
+    upstream = Upstream({
+        "/api/kkt/receipts/K1": [
+            httpx.Response(503),
+            ndjson([
+                {"id": "r1", "timestamp": "2026-01-01T10:00:00", "amount": 10.0},
+                {"id": "r2", "timestamp": "2026-01-02T09:00:00", "amount": 15.0}
+            ])
+        ],
+        "/api/kkt/receipts/K2": [httpx.ReadTimeout("timed out")]
+    })
+    service = upstream.service()
+    try:
+        report = await service.sync_fleet("kkt")
+    finally:
+        await service.close()
+    
+    assert (report["succeeded"], report["failed"]) == (1, 1)
+    
+    db.expire_all()
+    rows = {row.kkt_serial: row for row in db.query(KKTIntegration)}
+    assert (rows["K1"].total_receipts, rows["K1"].total_amount) == (2, 25.0)
+    assert (rows["K1"].last_receipt_id, rows["K1"].last_receipt_at) == ("r2", datetime(2026, 1, 2, 9))
+    assert rows["K2"].sync_status == "error"
+    assert rows["K2"].last_receipt_id is None
+    
+    daily = db.query(LocationDailyStats).filter(LocationDailyStats.location_id == locations[0].id).all()
+    assert sorted((row.date.day, row.kkt_receipts) for row in daily) == [(1, 1), (2, 1)]
+
+
+async def test_concurrent_kkt_syncs_count_receipts_once(db, locations):
+    db.add(KKTIntegration(location_id=locations[0].id, kkt_serial="K1", total_receipts=0))
+    db.commit()
+    
+    arrived = []
+    both = asyncio.Event()
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # Иккала синхронлаш ҳам бир хил (эски) курсорни ўқиб бўлгандан кейин жавоб қайтади
+        arrived.append(request)
+        if len(arrived) == 2:
+            both.set()
+        await asyncio.wait_for(both.wait(), timeout=5)
+        return ndjson([
+            {"id": "r1", "timestamp": "2026-01-01T10:00:00", "amount": 10.0},
+            {"id": "r2", "timestamp": "2026-01-01T11:00:00", "amount": 5.0}
+        ])
+    
+    service = IntegrationService(transport=httpx.MockTransport(handler))
+    try:
+        first, second = await asyncio.gather(
+            service.sync_kkt_data(locations[0].id, "K1"),
+            service.sync_kkt_data(locations[0].id, "K1")
+        )
+    finally:
+        await service.close()
+    
+    assert first["success"] and second["success"]
+    assert sorted([first["new_receipts"], second["new_receipts"]]) == [0, 2]
+    
+    db.expire_all()
+    row = db.query(KKTIntegration).one()
+    assert (row.total_receipts, row.total_amount, row.last_receipt_id) == (2, 15.0, "r2")
+    daily = db.query(LocationDailyStats).one()
+    assert (daily.kkt_receipts, daily.kkt_amount) == (2, 15.0)
+
+
+async def test_response_cache_key_includes_params():
+    upstream = Upstream({"/api/mygov/info": [httpx.Response(200, json={"ok": True})]})
+    service = upstream.service()
+    try:
+        await service._get_json("mygov", "/api/mygov/info", {"a": 1, "b": 2}, "MyGov")
+        await service._get_json("mygov", "/api/mygov/info", {"b": 2, "a": 1}, "MyGov")
+        await service._get_json("mygov", "/api/mygov/info", {"a": 2, "b": 2}, "MyGov")
+    finally:
+        await service.close()
+    
+    # Параметрлар тартиби муҳим эмас, қиймати фарқли сўров кэшдан олинмайди
+    assert upstream.calls["/api/mygov/info"] == 2
+
+
+async def test_kkt_cursor_never_moves_backwards(db, locations):
+    db.add(KKTIntegration(
+        location_id=locations[0].id,
+        kkt_serial="K1",
+        total_receipts=5,
+        last_receipt_id="r5",
+        last_receipt_at=datetime(2026, 1, 5, 12)
+    ))
+    db.commit()
+    
+    # Кечикиб келган чек курсор вақтидан эскироқ
+    upstream = Upstream({
+        "/api/kkt/receipts/K1": [ndjson([{"id": "r6", "timestamp": "2026-01-04T08:00:00", "amount": 7.0}])]
+    })
+    service = upstream.service()
+    try:
+        await service.sync_fleet("kkt")
+    finally:
+        await service.close()
+    
+    db.expire_all()
+    row = db.query(KKTIntegration).one()
+    assert (row.total_receipts, row.last_receipt_id) == (6, "r6")
+    assert row.last_receipt_at == datetime(2026, 1, 5, 12)
+
+
+async def test_kkt_result_dropped_when_cursor_moved_concurrently(db, locations):
+    db.add(KKTIntegration(location_id=locations[0].id, kkt_serial="K1", total_receipts=0))
+    db.commit()
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        # Жавоб келгунча якка синхронлаш шу чекларни ёзиб, курсорни суриб улгурди
+        with engine.begin() as connection:
+            connection.execute(update(KKTIntegration.__table__).values(
+                total_receipts=1,
+                last_receipt_id="r1",
+                last_receipt_at=datetime(2026, 1, 1, 10)
+            ))
+        return ndjson([{"id": "r1", "timestamp": "2026-01-01T10:00:00", "amount": 10.0}])
+    
+    service = IntegrationService(transport=httpx.MockTransport(handler))
+    try:
+        report = await service.sync_fleet("kkt")
+    finally:
+        await service.close()
+    
+    assert report["failed"] == 0
+    
+    db.expire_all()
+    row = db.query(KKTIntegration).one()
+    # Чеклар иккинчи марта қўшилмади
+    assert (row.total_receipts, row.last_receipt_id) == (1, "r1")
+    assert db.query(LocationDailyStats).count() == 0
+
+
+def test_sync_endpoint_resolves_service_from_container(client):
+    class FakeIntegration:
+        async def sync_kkt_data(self, location_id, kkt_serial):
+            return {"success": True, "location_id": location_id, "kkt_serial": kkt_serial}
+        
+        async def close(self):
+            pass
+    
+    # Сервис биринчи мурожаатда яратилади - тест уни олдиндан алмаштира олади
+    services = client.app.state.services
+    assert services.instance("integration") is None
+    services.register("integration", lambda container: FakeIntegration())
+    
+    response = client.post("/api/v1/integrations/kkt/sync/7", params={"kkt_serial": "K7"})
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "location_id": 7, "kkt_serial": "K7"}
@@ -0,0 +1,161 @@
+"""
+Соф ASGI мидлварлар тестлари: хавфсизлик хедерлари, rate limit ва оқимли жавоблар
+"""
+import asyncio
+import logging
+import re
+import secrets
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.rate_limit import RateLimiter
+from app.core.security import create_access_token
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.security_middleware import SECURITY_HEADERS, RateLimitPolicy, SecurityMiddleware
+
+pytestmark = pytest.mark.anyio
+
+CHUNKS = [b"first\n", b"second\n", b"third\n"]
+
+
+def build_app(stream_gate: asyncio.Event = None, policies=None):
+    async def ok(request):
+        return JSONResponse({"ok": True})
+    
+    async def stream(request):
+        async def body():
+            yield CHUNKS[0]
+            # Биринчи бўлак клиентга етиб бормагунча давом этилмайди
+            if stream_gate is not None:
+                await stream_gate.wait()
+            for chunk in CHUNKS[1:]:
+                yield chunk
+        return StreamingResponse(body(), media_type="text/plain")
+    
+    async def fail(request):
+        raise RuntimeError("кутилган хатолик")
+    
+    app = Starlette(routes=[Route("/ok", ok), Route("/stream", stream), Route("/fail", fail)])
+    app = SecurityMiddleware(app, policies=policies or [], limiter=RateLimiter())
+    return LoggingMiddleware(app, sample_rate=1.0, route_sample_rates={}, slow_seconds=60)
+
+
+def scope_for(path: str):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("10.0.0.1", 1234),
+        "server": ("testserver", 80)
+    }
+
+
+def receiver():
+    """Бўш сўров танаси, кейин клиент уланиб туради (disconnect йўқ)"""
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+    
+    return receive
+
+
+async def test_security_headers_on_regular_response():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://testserver") as client:
+        response = await client.get("/ok")
+    
+    assert response.status_code == 200
+    for name, value in SECURITY_HEADERS.items():
+        assert response.headers[name] == value
+
+
+async def test_streaming_passes_through_chunk_by_chunk():
+    gate = asyncio.Event()
+    app = build_app(stream_gate=gate)
+    messages = []
+    
+    async def send(message):
+        messages.append(message)
+        # Биринчи бўлак олинди - генератор давом этиши мумкин
+        if message["type"] == "http.response.body" and message.get("body") == CHUNKS[0]:
+            gate.set()
+    
+    # Мидлвар жавобни буферласа биринчи бўлак келмайди ва генератор тўхтаб қолади
+    await asyncio.wait_for(app(scope_for("/stream"), receiver(), send), timeout=5)
+    
+    start = messages[0]
+    assert start["type"] == "http.response.start"
+    headers = dict((name.decode(), value.decode()) for name, value in start["headers"])
+    for name, value in SECURITY_HEADERS.items():
+        assert headers[name.lower()] == value
+    
+    bodies = [message["body"] for message in messages[1:] if message.get("body")]
+    assert bodies == CHUNKS
+
+
+async def test_rate_limited_response_has_retry_after_and_headers():
+    policies = [RateLimitPolicy("test", re.compile(r"^/ok$"), rate=0.5, burst=2, per="ip")]
+    transport = httpx.ASGITransport(app=build_app(policies=policies), client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        statuses = [(await client.get("/ok")).status_code for _ in range(2)]
+        limited = await client.get("/ok")
+        # Бошқа йўл лимитга тушмайди
+        other = await client.get("/stream")
+    
+    assert statuses == [200, 200]
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert limited.headers["X-Frame-Options"] == "DENY"
+    assert other.status_code == 200
+
+
+async def test_errors_are_logged_with_status(caplog):
+    app = build_app()
+    caplog.set_level(logging.INFO, logger="app.access")
+    
+    with pytest.raises(RuntimeError):
+        await app(scope_for("/fail"), receiver(), lambda message: asyncio.sleep(0))
+    
+    record = caplog.records[-1]
+    assert (record.path, record.status, record.client_ip) == ("/fail", 500, "10.0.0.1")
+
+
+def test_rate_limited_login_keeps_cors_headers(client):
+    origin = {"Origin": "http://testserver.uz"}
+    for _ in range(10):
+        client.post("/api/v1/auth/login", data={"username": "x", "password": "y"}, headers=origin)
+    
+    response = client.post("/api/v1/auth/login", data={"username": "x", "password": "y"}, headers=origin)
+    
+    assert response.status_code == 429
+    assert response.headers["access-control-allow-origin"] == "http://testserver.uz"
+
+
+async def test_random_tokens_share_the_ip_bucket():
+    policies = [RateLimitPolicy("test", re.compile(r"^/ok$"), rate=0.5, burst=2)]
+    transport = httpx.ASGITransport(app=build_app(policies=policies), client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        # Ҳар сўровда янги сохта токен - лимитни айланиб ўтолмайди
+        statuses = [
+            (await client.get("/ok", headers={"Authorization": f"Bearer {secrets.token_hex(16)}"})).status_code
+            for _ in range(3)
+        ]
+        # Ҳақиқий токен фойдаланувчининг ўз бакетига тушади
+        token = create_access_token({"sub": "ali"})
+        valid = (await client.get("/ok", headers={"Authorization": f"Bearer {token}"})).status_code
+    
+    assert statuses == [200, 200, 429]
+    assert valid == 200
@@ -0,0 +1,78 @@
+"""
+Моделлар реестри тестлари: чекланган фон ўқитиш ва дискдан юклаш
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.model_registry import ModelEntry, ModelRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+class Trainer:
+    """Бир вақтда ишлаётган ўқитишлар сонини ҳисоблайди"""
+    
+    def __init__(self, signatures):
+        self.signatures = signatures
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, location_id: int) -> ModelEntry:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return ModelEntry(
+            location_id=location_id,
+            model={"location_id": location_id},
+            window_start=None,
+            window_end=None,
+            row_count=10,
+            data_signature=self.signatures[location_id]
+        )
+
+
+def make_registry(tmp_path, trainer, signatures, concurrency=2):
+    return ModelRegistry(
+        name="test",
+        directory=tmp_path,
+        trainer=trainer,
+        signatures=lambda: signatures,
+        max_age_seconds=3600,
+        max_concurrent_training=concurrency
+    )
+
+
+async def test_training_is_bounded(tmp_path):
+    signatures = {location_id: (location_id, "v1") for location_id in range(1, 7)}
+    trainer = Trainer(signatures)
+    registry = make_registry(tmp_path, trainer, signatures)
+    
+    await registry.refresh()
+    await asyncio.gather(*list(registry._training.values()))
+    
+    assert trainer.peak == 2
+    assert all(registry.is_current(location_id, signature) for location_id, signature in signatures.items())
+    assert len(list(tmp_path.glob("location_*.pkl"))) == 6
+
+
+async def test_refresh_adopts_model_saved_by_other_process(tmp_path):
+    signatures = {1: (1, "v2")}
+    trainer = Trainer(signatures)
+    
+    # Бошқа процесс (batch) янги моделни сақлаган
+    make_registry(tmp_path, trainer, signatures).put(trainer(1))
+    
+    registry = make_registry(tmp_path, trainer, signatures)
+    await registry.refresh()
+    
+    assert registry.is_current(1, (1, "v2"))
+    assert registry.get(1).version == 1
+    # Қайта ўқитиш режалаштирилмайди
+    assert not registry._training
@@ -0,0 +1,111 @@
+"""
+Keyset пагинация тестлари
+Курсор X-Next-Cursor сарлавҳасида, нотўғри курсор - 400
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_page
+from app.models.employee import Employee
+from app.models.location import Location
+
+
+@pytest.fixture
+def locations(db):
+    locations = [
+        Location(name=f"Локация {i}", address=address, location_type="CAFE")
+        for i, address in enumerate(["Тошкент", "Самарқанд", "Тошкент", "Самарқанд", "Тошкент"])
+    ]
+    db.add_all(locations)
+    db.commit()
+    return locations
+
+
+def pages(client, url, **params):
+    """Барча саҳифаларни курсор бўйича юриб чиқиш"""
+    result = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        result.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return result
+
+
+def test_locations_cursor_round_trip(client, locations):
+    result = pages(client, "/api/v1/locations/", limit=2)
+    
+    assert [len(page) for page in result] == [2, 2, 1]
+    assert [row["id"] for page in result for row in page] == sorted(location.id for location in locations)
+
+
+def test_employees_last_full_page_has_no_next_cursor(client, db, locations):
+    location_id = locations[0].id
+    db.add_all([Employee(location_id=location_id, full_name=f"Ходим {i}") for i in range(4)])
+    db.add(Employee(location_id=locations[1].id, full_name="Бошқа локация"))
+    db.commit()
+    
+    result = pages(client, "/api/v1/employees/", location_id=location_id, limit=2)
+    
+    # Охирги саҳифа тўлиқ бўлса ҳам курсор берилмайди - бўш саҳифа сўралмайди
+    assert [len(page) for page in result] == [2, 2]
+    assert {row["location_id"] for page in result for row in page} == {location_id}
+
+
+def test_cursor_past_the_end_returns_empty_page(client, locations):
+    cursor = encode_cursor([max(location.id for location in locations)])
+    response = client.get("/api/v1/locations/", params={"cursor": cursor})
+    
+    assert response.status_code == 200
+    assert response.json() == []
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1, 2]), "e30"])
+def test_malformed_cursor_is_rejected(client, locations, cursor):
+    response = client.get("/api/v1/locations/", params={"cursor": cursor})
+    
+    assert response.status_code == 400
+
+
+def walk(db, key, descending=False, limit=2):
+    """keyset_page билан барча саҳифалар (id'лар рўйхати)"""
+    ids, cursor = [], None
+    while True:
+        response = Response()
+        page = keyset_page(db.query(Location.id, *key[:-1]), key, cursor, limit, descending, response)
+        ids.extend(row["id"] for row in page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+
+def test_ties_on_sort_key_are_not_skipped_or_repeated(db, locations):
+    # address бўйича тенг қийматлар - id уларни ажратади
+    key = [Location.address, Location.id]
+    expected = [location.id for location in sorted(locations, key=lambda location: (location.address, location.id))]
+    
+    assert walk(db, key) == expected
+    assert walk(db, key, descending=True) == expected[::-1]
+
+
+def test_descending_order(db, locations):
+    assert walk(db, [Location.id], descending=True, limit=3) == sorted((location.id for location in locations), reverse=True)
+
+
+def test_datetime_cursor_round_trip(db, locations):
+    key = [Location.created_at, Location.id]
+    first = Response()
+    page = keyset_page(db.query(Location.id, Location.created_at), key, limit=1, response=first)
+    
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    rest = keyset_page(db.query(Location.id, Location.created_at), key, cursor, limit=10)
+    
+    assert isinstance(page[0]["created_at"], datetime)
+    assert [row["id"] for row in page + rest] == walk(db, key)
+    with pytest.raises(HTTPException):
+        keyset_page(db.query(Location.id), key, encode_cursor(["not a date", 1]))
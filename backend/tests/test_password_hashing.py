@@ -0,0 +1,66 @@
+"""
+Парол хешлаш тестлари: bcrypt event loop'дан ташқарида ишлайди
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password, verify_password_async
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "maxfiy-parol"
+
+
+@pytest.fixture(scope="module")
+def hashed_password():
+    return get_password_hash(PASSWORD)
+
+
+def single_verify_seconds(hashed_password: str) -> float:
+    started = time.perf_counter()
+    assert verify_password(PASSWORD, hashed_password)
+    return time.perf_counter() - started
+
+
+async def test_event_loop_stays_responsive(hashed_password):
+    single = single_verify_seconds(hashed_password)
+    gaps = []
+    done = asyncio.Event()
+    
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+    
+    ticker = asyncio.create_task(heartbeat())
+    results = await asyncio.gather(*(verify_password_async(PASSWORD, hashed_password) for _ in range(4)))
+    done.set()
+    await ticker
+    
+    assert results == [True] * 4
+    # Хешлаш loop'да бўлганда битта танаффус камида битта bcrypt давомийлигича бўларди
+    assert max(gaps) < single / 2
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="параллел хешлаш учун камида 2 CPU керак")
+async def test_concurrent_logins_do_not_serialize(hashed_password):
+    single = single_verify_seconds(hashed_password)
+    workers = min(settings.PASSWORD_HASH_WORKERS, os.cpu_count())
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(verify_password_async(PASSWORD, hashed_password) for _ in range(workers)))
+    elapsed = time.perf_counter() - started
+    
+    # Кетма-кет бўлса workers * single; bcrypt GIL'ни бўшатади - параллел ишлайди
+    assert elapsed < workers * single * 0.75
+
+
+async def test_wrong_password_rejected(hashed_password):
+    assert not await verify_password_async("нотўғри", hashed_password)
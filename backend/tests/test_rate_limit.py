@@ -0,0 +1,111 @@
+"""
+Redis'даги token bucket (Lua скрипт) тестлари
+"""
+import asyncio
+
+import pytest
+
+from app.core.circuit_breaker import OPEN, CircuitBreaker
+from app.core.rate_limit import TOKEN_BUCKET_SCRIPT, RateLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def limiter(redis):
+    return RateLimiter(redis, breaker=CircuitBreaker("test-redis", min_requests=5))
+
+
+async def test_burst_then_limited(limiter):
+    results = [await limiter.hit("user:1", rate=1.0, burst=5) for _ in range(6)]
+    
+    assert results[:5] == [0.0] * 5
+    assert results[5] > 0
+
+
+async def test_keys_are_independent(limiter):
+    for _ in range(3):
+        await limiter.hit("user:1", rate=1.0, burst=3)
+    
+    assert await limiter.hit("user:1", rate=1.0, burst=3) > 0
+    assert await limiter.hit("user:2", rate=1.0, burst=3) == 0.0
+
+
+async def test_retry_after_math(limiter):
+    # 2 токен сарфлангач, кейинги токен 1 / rate = 2 секундда тўлади
+    await limiter.hit("ip:1", rate=0.5, burst=2)
+    await limiter.hit("ip:1", rate=0.5, burst=2)
+    
+    retry_after = await limiter.hit("ip:1", rate=0.5, burst=2)
+    assert 1.9 < retry_after <= 2.0
+    
+    # Рад этилган сўров токен сарфламайди
+    assert await limiter.hit("ip:1", rate=0.5, burst=2) <= retry_after
+
+
+async def test_refill(limiter):
+    for _ in range(2):
+        await limiter.hit("user:1", rate=50.0, burst=2)
+    assert await limiter.hit("user:1", rate=50.0, burst=2) > 0
+    
+    # 50 токен/сек: 0.1 секундда бакет тўлади, лекин сиғимдан ошмайди
+    await asyncio.sleep(0.1)
+    results = [await limiter.hit("user:1", rate=50.0, burst=2) for _ in range(3)]
+    assert results[:2] == [0.0, 0.0]
+    assert results[2] > 0
+
+
+async def test_state_expires(limiter, redis):
+    await limiter.hit("user:1", rate=2.0, burst=10)
+    
+    # Бакет тўлиқ тўладиган вақт + 1 секунд
+    ttl = await redis.pttl("ratelimit:user:1")
+    assert 5000 < ttl <= 6000
+
+
+async def test_script_reloaded_after_noscript(limiter, redis):
+    await limiter.hit("user:1", rate=1.0, burst=2)
+    
+    # Redis қайта ишга тушгандек: скрипт кэши тозаланади, EVALSHA NOSCRIPT қайтаради
+    await redis.script_flush()
+    
+    assert await limiter.hit("user:1", rate=1.0, burst=2) == 0.0
+    assert await limiter.hit("user:1", rate=1.0, burst=2) > 0
+
+
+class FailingRedis:
+    """Ҳар бир EVALSHA'да уланиш хатоси"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def register_script(self, script):
+        assert script == TOKEN_BUCKET_SCRIPT
+        
+        async def run(keys, args):
+            self.calls += 1
+            raise ConnectionError("Redis мавжуд эмас")
+        
+        return run
+
+
+async def test_falls_back_to_local_bucket_and_opens_circuit():
+    redis = FailingRedis()
+    limiter = RateLimiter(redis, breaker=CircuitBreaker("test-redis", min_requests=5, reset_timeout=60))
+    
+    results = [await limiter.hit("user:1", rate=1.0, burst=10) for _ in range(11)]
+    
+    # Процесс ичидаги бакет ҳам ўша лимитни қўллайди
+    assert results[:10] == [0.0] * 10
+    assert results[10] > 0
+    # Circuit очилгач Redis'га мурожаат қилинмайди
+    assert redis.calls == 5
+    assert limiter.breaker.state == OPEN
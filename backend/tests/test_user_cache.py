@@ -0,0 +1,149 @@
+"""
+Фойдаланувчи кэши тестлари (иккита процесс битта Redis билан)
+"""
+import asyncio
+from functools import partial
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core import user_cache as user_cache_module
+from app.core.circuit_breaker import OPEN, CircuitBreaker
+from app.core.database import engine
+from app.core.redis import redis_call
+from app.core.security import create_access_token, get_current_user
+from app.core.user_cache import UserCache, user_cache
+from app.models.user import User, UserRole
+
+fakeredis = pytest.importorskip("fakeredis")
+
+pytestmark = pytest.mark.anyio
+
+PROJECTION = {"id": 1, "username": "ali", "role": "admin", "is_active": True}
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("test-redis", min_requests=3, reset_timeout=60)
+    monkeypatch.setattr(user_cache_module, "redis_call", partial(redis_call, breaker=breaker))
+    return breaker
+
+
+@pytest.fixture
+def redis(monkeypatch, breaker):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(user_cache_module, "get_redis", lambda: redis)
+    return redis
+
+
+async def test_shared_between_processes(redis):
+    first, second = UserCache(ttl=60, local_ttl=5), UserCache(ttl=60, local_ttl=5)
+    
+    await first.set("ali", 100, PROJECTION)
+    
+    assert await second.get("ali", 100) == PROJECTION
+    assert await second.get("ali", 101) is None
+
+
+async def test_invalidation_reaches_other_process_after_local_ttl(redis):
+    first, second = UserCache(ttl=60, local_ttl=0.05), UserCache(ttl=60, local_ttl=0.05)
+    await first.set("ali", 100, PROJECTION)
+    assert await second.get("ali", 100) == PROJECTION
+    
+    first.invalidate("ali")
+    await asyncio.gather(*first._tasks)
+    
+    assert await first.get("ali", 100) is None
+    # Иккинчи процесс эски нусхани фақат local_ttl давомида кўради
+    await asyncio.sleep(0.1)
+    assert await second.get("ali", 100) is None
+
+
+class FailingRedis:
+    def __init__(self):
+        self.calls = 0
+    
+    async def hget(self, key, field):
+        self.calls += 1
+        raise ConnectionError("Redis мавжуд эмас")
+
+
+async def test_redis_failures_open_circuit(monkeypatch, breaker):
+    redis = FailingRedis()
+    monkeypatch.setattr(user_cache_module, "get_redis", lambda: redis)
+    cache = UserCache(ttl=60, local_ttl=5)
+    
+    for _ in range(10):
+        assert await cache.get("ali", 100) is None
+    
+    assert redis.calls == 3
+    assert breaker.state == OPEN
+
+
+@pytest.fixture
+def queries():
+    """Базага юборилган SQL сўровлари"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def user(db):
+    user_cache.local.clear()
+    user = User(
+        username="ali",
+        email="ali@example.uz",
+        hashed_password="-",
+        full_name="Ali Valiyev",
+        role=UserRole.ADMIN
+    )
+    db.add(user)
+    db.commit()
+    yield user
+    user_cache.local.clear()
+
+
+async def test_cached_user_is_served_without_db_query(db, user, queries):
+    token = create_access_token({"sub": "ali"})
+    
+    first = await get_current_user(token, db)
+    assert first.username == "ali"
+    assert len(queries) == 1
+    
+    queries.clear()
+    second = await get_current_user(token, db)
+    assert (second.username, second.role, second.is_active) == ("ali", UserRole.ADMIN, True)
+    assert queries == []
+
+
+async def test_deactivation_evicts_cached_user(db, user):
+    token = create_access_token({"sub": "ali"})
+    await get_current_user(token, db)
+    
+    user.is_active = False
+    db.commit()
+    
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(token, db)
+    assert error.value.status_code == 400
+
+
+async def test_role_change_evicts_cached_user(db, user, queries):
+    token = create_access_token({"sub": "ali"})
+    assert (await get_current_user(token, db)).role == UserRole.ADMIN
+    
+    user.role = UserRole.ANALYST
+    db.commit()
+    
+    queries.clear()
+    assert (await get_current_user(token, db)).role == UserRole.ANALYST
+    assert len(queries) == 1